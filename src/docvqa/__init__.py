@@ -1,10 +1,11 @@
 """DocVQA orchestration package."""
 
-from importlib.metadata import version
-
 
 def get_version() -> str:
     """Return the distribution version."""
+    # importlib.metadata is imported here; it adds ~20 ms to every CLI start otherwise.
+    from importlib.metadata import version
+
     try:
         return version("docvqa")
     except Exception:
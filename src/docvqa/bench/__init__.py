@@ -0,0 +1,14 @@
+"""Reproducible throughput benchmarks against an in-process fake provider."""
+
+from .server import FakeProviderServer, LatencyModel
+from .suite import BenchResult, BenchScenario, build_scenarios, run_scenario, run_suite
+
+__all__ = [
+    "BenchResult",
+    "BenchScenario",
+    "FakeProviderServer",
+    "LatencyModel",
+    "build_scenarios",
+    "run_scenario",
+    "run_suite",
+]
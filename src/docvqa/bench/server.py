@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+"""In-process fake provider serving OpenAI-compatible and Document AI endpoints."""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Literal, Optional, Tuple
+
+LatencyDistribution = Literal["fixed", "uniform", "exponential", "lognormal"]
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Distribution of simulated response times.
+
+    ``median_ms`` is the median of every distribution. ``spread`` is the relative half-width
+    for ``uniform`` and the sigma of the underlying normal for ``lognormal``; it is ignored by
+    ``fixed`` and ``exponential``.
+    """
+
+    distribution: LatencyDistribution = "lognormal"
+    median_ms: float = 50.0
+    spread: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        """Return one latency in seconds."""
+
+        median = self.median_ms / 1000.0
+        if self.distribution == "fixed":
+            return median
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(median * (1 - self.spread), median * (1 + self.spread)))
+        if self.distribution == "exponential":
+            # The median of an exponential distribution is ln(2) times its mean.
+            return rng.expovariate(0.6931471805599453 / median) if median > 0 else 0.0
+        return median * rng.lognormvariate(0.0, self.spread)
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    """Local stand-in for an LLM provider and a Document AI processor.
+
+    Serves ``POST /v1/chat/completions``, the Batch API (``/v1/files`` and ``/v1/batches``;
+    a batch completes on its first status check) and Document AI ``:process`` calls over the
+    REST transport. Every chat completion and process call sleeps for a latency drawn from
+    ``latency`` (the default :class:`LatencyModel` when omitted), then fails with a 500 at
+    ``error_rate`` or a 429 at ``throttle_rate``.
+
+    Use it as a context manager, which serves requests from a background thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        *,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        super().__init__((host, port), _ProviderHandler)
+        self.latency = latency if latency is not None else LatencyModel()
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def llm_api_base(self) -> str:
+        return f"{self.url}/v1/chat/completions"
+
+    def __enter__(self) -> FakeProviderServer:
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="docvqa-fake-provider", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def draw(self) -> Tuple[float, int]:
+        """Return the simulated latency and status code of the next request."""
+
+        with self._lock:
+            self.requests += 1
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                return delay, 500
+            if roll < self.error_rate + self.throttle_rate:
+                self.throttled += 1
+                return delay, 429
+            return delay, 200
+
+    def store_file(self, content: bytes) -> str:
+        with self._lock:
+            file_id = f"file-{len(self._files)}"
+            self._files[file_id] = content
+        return file_id
+
+    def read_file(self, file_id: str) -> Optional[bytes]:
+        with self._lock:
+            return self._files.get(file_id)
+
+    def create_batch(self, input_file_id: str, endpoint: str) -> Dict[str, Any]:
+        with self._lock:
+            batch_id = f"batch-{len(self._batches)}"
+            batch = {
+                "id": batch_id,
+                "status": "validating",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+            }
+            self._batches[batch_id] = batch
+        return batch
+
+    def retrieve_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            batch = self._batches.get(batch_id)
+        if batch is not None and batch["status"] != "completed":
+            self._complete(batch)
+        return batch
+
+    def _complete(self, batch: Dict[str, Any]) -> None:
+        lines = []
+        for line in self.read_file(batch["input_file_id"]).splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            _, status = self.draw()
+            if status != 200:
+                error = {"code": str(status), "message": "simulated failure"}
+                lines.append({"custom_id": request["custom_id"], "response": None, "error": error})
+                continue
+            body = chat_completion(request["body"])
+            response = {"status_code": 200, "body": body}
+            lines.append({"custom_id": request["custom_id"], "response": response, "error": None})
+        output = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+        batch.update(status="completed", output_file_id=self.store_file(output))
+
+
+def chat_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a well-formed completion answering the extraction prompt in ``body``."""
+
+    prompt = "".join(str(message.get("content", "")) for message in body.get("messages", []))
+    content = {
+        "summary": "Synthetic summary produced by the benchmark server.",
+        "fields": [{"name": "total", "value": "42.00"}, {"name": "date", "value": "2024-01-31"}],
+        "tables": [],
+        "answers": [],
+        "warnings": [],
+    }
+    message = json.dumps(content)
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "model": body.get("model", "bench"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": message}}],
+        "usage": {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(message) // 4,
+            "total_tokens": (len(prompt) + len(message)) // 4,
+        },
+    }
+
+
+def process_response(raw_document: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a Document AI ``ProcessResponse`` (REST JSON) for a raw document."""
+
+    size = len(raw_document.get("content", ""))
+    return {
+        "document": {
+            "text": f"Synthetic document of {size} base64 characters.",
+            "entities": [
+                {"type": "total_amount", "mentionText": "42.00", "confidence": 0.98},
+                {"type": "invoice_date", "mentionText": "2024-01-31", "confidence": 0.95},
+            ],
+        }
+    }
+
+
+class _ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's algorithm and delayed
+    # ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    server: FakeProviderServer
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?", 1)[0]
+        if path.endswith("/chat/completions"):
+            return self._simulated(lambda: chat_completion(json.loads(body)))
+        if path.endswith(":process"):
+            return self._simulated(lambda: process_response(json.loads(body)["rawDocument"]))
+        if path == "/v1/files":
+            return self._upload(body)
+        if path == "/v1/batches":
+            payload = json.loads(body)
+            return self._reply(
+                self.server.create_batch(payload["input_file_id"], payload["endpoint"])
+            )
+        return self._reply({"error": {"message": f"Unknown path {path}"}}, status=404)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) == 3 and parts[:2] == ["v1", "batches"]:
+            batch = self.server.retrieve_batch(parts[2])
+            if batch is not None:
+                return self._reply(batch)
+        if len(parts) == 4 and parts[:2] == ["v1", "files"] and parts[3] == "content":
+            content = self.server.read_file(parts[2])
+            if content is not None:
+                return self._send(200, content, "application/jsonl")
+        return self._reply({"error": {"message": "Not found"}}, status=404)
+
+    def _simulated(self, respond: Any) -> None:
+        delay, status = self.server.draw()
+        time.sleep(delay)
+        if status != 200:
+            return self._reply({"error": {"message": "simulated failure"}}, status=status)
+        return self._reply(respond())
+
+    def _upload(self, body: bytes) -> None:
+        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("ascii")
+        message = BytesParser(policy=HTTP).parsebytes(header + body)
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+                return self._reply({"id": self.server.store_file(content), "purpose": "batch"})
+        return self._reply({"error": {"message": "Missing file part"}}, status=400)
+
+    def _reply(self, payload: Dict[str, Any], status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, status: int, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+__all__ = ["FakeProviderServer", "LatencyModel", "chat_completion", "process_response"]
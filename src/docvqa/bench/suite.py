@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+"""Throughput benchmarks of the pipeline engines against the fake provider."""
+
+import itertools
+import json
+import shutil
+import sys
+import time
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from docvqa.bench.server import FakeProviderServer
+from docvqa.config.models import (
+    BatchAPIConfig,
+    DocumentAIConfig,
+    DocumentsConfig,
+    ExtractorConfig,
+    ExtractorProvider,
+    LLMConfig,
+    LocalJSONConfig,
+    ParquetConfig,
+    PipelineConfig,
+    PipelineEngine,
+    StorageConfig,
+    StorageProvider,
+)
+from docvqa.data.dataset import DEFAULT_MANIFEST, DocumentExample, DocVQADataset
+from docvqa.extractors.base import BaseExtractor
+from docvqa.extractors.document_ai import DocumentAIExtractor
+from docvqa.extractors.factory import create_extractor
+from docvqa.extractors.llm import LLMExtractor
+from docvqa.llm.batch import BatchAPIClient
+from docvqa.pipeline.batch import BatchPipelineRunner
+from docvqa.pipeline.run import AsyncPipelineRunner, PipelineRunner
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.storage.base import BaseStorage
+from docvqa.storage.factory import create_storage
+
+try:  # pragma: no cover - platform dependent
+    import resource
+except ImportError:  # pragma: no cover - platform dependent
+    resource = None
+
+try:  # pragma: no cover - optional dependency
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import documentai
+except ImportError:  # pragma: no cover - optional dependency
+    AnonymousCredentials = None
+    documentai = None
+
+# Engines whose throughput does not depend on pipeline.concurrency.
+CONCURRENCY_AGNOSTIC = frozenset({PipelineEngine.BATCH})
+
+DOCUMENT_TEXT = (
+    "INVOICE {index}\nBill to: Example Corp, 1 Main Street\n"
+    "Item  Qty  Price\nWidget  2  10.00\nGadget  1  22.00\nTotal due: 42.00\n"
+    "Payment terms: 30 days from 2024-01-31.\n"
+)
+
+
+class BenchUnsupportedError(RuntimeError):
+    """Raised when a scenario cannot run in this environment or combination."""
+
+
+@dataclass(frozen=True)
+class BenchScenario:
+    """One engine, concurrency and storage combination to measure."""
+
+    engine: PipelineEngine = PipelineEngine.THREADS
+    concurrency: int = 1
+    storage: StorageProvider = StorageProvider.LOCAL_JSON
+    provider: ExtractorProvider = ExtractorProvider.LLM
+
+    @property
+    def label(self) -> str:
+        concurrency = "-" if self.engine in CONCURRENCY_AGNOSTIC else str(self.concurrency)
+        return f"{self.provider.value}/{self.engine.value}/c{concurrency}/{self.storage.value}"
+
+
+@dataclass
+class BenchResult:
+    """Throughput, per-document latency and memory of one scenario run."""
+
+    scenario: str
+    documents: int
+    succeeded: int
+    failed: int
+    retries: int
+    seconds: float
+    docs_per_second: float
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    p99_ms: Optional[float]
+    peak_rss_mb: Optional[float]
+    skipped: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def build_scenarios(
+    engines: Sequence[PipelineEngine],
+    concurrencies: Sequence[int],
+    storages: Sequence[StorageProvider],
+    provider: ExtractorProvider = ExtractorProvider.LLM,
+) -> List[BenchScenario]:
+    """Cross product of the options, measuring concurrency-agnostic engines once."""
+
+    scenarios: List[BenchScenario] = []
+    for engine, storage in itertools.product(engines, storages):
+        levels = concurrencies[:1] if engine in CONCURRENCY_AGNOSTIC else concurrencies
+        for concurrency in levels:
+            scenarios.append(BenchScenario(engine, concurrency, storage, provider))
+    return scenarios
+
+
+def write_manifest(directory: Path, documents: int) -> Path:
+    """Generate ``documents`` small text documents and a manifest listing them."""
+
+    files = directory / "documents"
+    files.mkdir(parents=True, exist_ok=True)
+    with (directory / DEFAULT_MANIFEST).open("w", encoding="utf-8") as manifest:
+        for index in range(documents):
+            name = f"doc-{index:06d}.txt"
+            (files / name).write_text(DOCUMENT_TEXT.format(index=index), encoding="utf-8")
+            record = {
+                "id": f"doc-{index:06d}",
+                "document_path": f"documents/{name}",
+                "questions": ["What is the total due?"],
+            }
+            manifest.write(json.dumps(record) + "\n")
+    return directory
+
+
+def run_scenario(
+    scenario: BenchScenario,
+    server: FakeProviderServer,
+    dataset_dir: Path,
+    work_dir: Path,
+) -> BenchResult:
+    """Run the pipeline once over ``dataset_dir`` against ``server`` and measure it.
+
+    Per-document latency runs from the moment the runner pulls the document from the dataset
+    until its result is handed to storage, so it includes queueing in the in-flight window,
+    retries and, for the batch engine, the batch turnaround.
+
+    Raises :class:`BenchUnsupportedError` when an optional dependency is missing or the engine
+    does not support the provider.
+    """
+
+    scenario_dir = work_dir / scenario.label.replace("/", "-")
+    shutil.rmtree(scenario_dir, ignore_errors=True)
+    extractor_config = _extractor_config(scenario, server, scenario_dir)
+    documents = DocumentsConfig(cache_dir=scenario_dir / "page_text")
+    pipeline = PipelineConfig(
+        engine=scenario.engine,
+        concurrency=scenario.concurrency,
+        async_concurrency=scenario.concurrency,
+        checkpoint_dir=scenario_dir / "checkpoints",
+        # Keep simulated 429s and 5xx from turning the benchmark into a backoff measurement.
+        retry_backoff_seconds=0.1,
+        retry_max_backoff_seconds=1.0,
+    )
+    storage = _TimedStorage(_storage(scenario, scenario_dir))
+    dataset = _TimedDataset(DocVQADataset(dataset_dir), storage.started)
+    try:
+        runner = _runner(scenario, extractor_config, documents, pipeline, dataset, storage)
+    except ImportError as exc:
+        raise BenchUnsupportedError(str(exc)) from exc
+
+    _reset_peak_rss()
+    started = time.perf_counter()
+    stats = runner.run()
+    elapsed = time.perf_counter() - started
+    latencies = sorted(storage.latencies)
+    return BenchResult(
+        scenario=scenario.label,
+        documents=stats.processed,
+        succeeded=stats.succeeded,
+        failed=stats.failed,
+        retries=stats.retries,
+        seconds=round(elapsed, 3),
+        docs_per_second=round(stats.processed / elapsed, 2) if elapsed > 0 else 0.0,
+        p50_ms=_percentile_ms(latencies, 50),
+        p95_ms=_percentile_ms(latencies, 95),
+        p99_ms=_percentile_ms(latencies, 99),
+        peak_rss_mb=_peak_rss_mb(),
+    )
+
+
+def run_suite(
+    scenarios: Iterable[BenchScenario],
+    server: FakeProviderServer,
+    *,
+    documents: int,
+    work_dir: Path,
+) -> Iterator[BenchResult]:
+    """Run every scenario over one synthetic manifest, yielding results as they finish."""
+
+    dataset_dir = write_manifest(work_dir / "dataset", documents)
+    for scenario in scenarios:
+        try:
+            yield run_scenario(scenario, server, dataset_dir, work_dir)
+        except BenchUnsupportedError as exc:
+            yield BenchResult(
+                scenario=scenario.label,
+                documents=0,
+                succeeded=0,
+                failed=0,
+                retries=0,
+                seconds=0.0,
+                docs_per_second=0.0,
+                p50_ms=None,
+                p95_ms=None,
+                p99_ms=None,
+                peak_rss_mb=None,
+                skipped=str(exc),
+            )
+
+
+class _TimedStorage(BaseStorage):
+    """Delegates to a storage backend, recording when each document's result arrives."""
+
+    def __init__(self, storage: BaseStorage) -> None:
+        self._storage = storage
+        self.started: Dict[str, float] = {}
+        self.latencies: List[float] = []
+
+    def write(self, result: ExtractionResult) -> None:
+        self._observe(result.doc_id)
+        self._storage.write(result)
+
+    async def write_async(self, result: ExtractionResult) -> None:
+        self._observe(result.doc_id)
+        await self._storage.write_async(result)
+
+    def flush(self) -> None:
+        self._storage.flush()
+
+    def finalize(self) -> None:
+        self._storage.finalize()
+
+    async def finalize_async(self) -> None:
+        await self._storage.finalize_async()
+
+    def _observe(self, doc_id: str) -> None:
+        started = self.started.pop(doc_id, None)
+        if started is not None:
+            self.latencies.append(time.perf_counter() - started)
+
+
+class _TimedDataset:
+    """Iterates a dataset, stamping the time each document is handed to the runner."""
+
+    def __init__(self, dataset: DocVQADataset, started: Dict[str, float]) -> None:
+        self._dataset = dataset
+        self._started = started
+
+    def __iter__(self) -> Iterator[DocumentExample]:
+        for example in self._dataset:
+            self._started[example.doc_id] = time.perf_counter()
+            yield example
+
+    def __len__(self) -> int:
+        return len(self._dataset)
+
+
+def _extractor_config(
+    scenario: BenchScenario, server: FakeProviderServer, scenario_dir: Path
+) -> ExtractorConfig:
+    if scenario.provider == ExtractorProvider.DOCUMENT_AI:
+        document_ai = DocumentAIConfig(
+            project_id="bench", location="us", processor_id="bench", endpoint=server.url
+        )
+        return ExtractorConfig(provider=scenario.provider, documentAI=document_ai)
+    llm = LLMConfig(
+        api_base=server.llm_api_base,
+        api_key="bench",
+        model="bench",
+        batch_api=BatchAPIConfig(poll_seconds=0.05, work_dir=scenario_dir / "batches"),
+    )
+    return ExtractorConfig(provider=scenario.provider, llm=llm)
+
+
+def _storage(scenario: BenchScenario, scenario_dir: Path) -> BaseStorage:
+    output_dir = scenario_dir / "results"
+    if scenario.storage == StorageProvider.PARQUET:
+        config = StorageConfig(
+            provider=scenario.storage, parquet=ParquetConfig(output_dir=output_dir)
+        )
+    elif scenario.storage == StorageProvider.LOCAL_JSON:
+        config = StorageConfig(
+            provider=scenario.storage, local_json=LocalJSONConfig(output_dir=output_dir)
+        )
+    else:
+        msg = f"Storage {scenario.storage.value} is not benchmarked; it needs a live backend."
+        raise BenchUnsupportedError(msg)
+    try:
+        return create_storage(config, run_id="bench")
+    except ImportError as exc:
+        raise BenchUnsupportedError(str(exc)) from exc
+
+
+def _runner(
+    scenario: BenchScenario,
+    extractor_config: ExtractorConfig,
+    documents: DocumentsConfig,
+    pipeline: PipelineConfig,
+    dataset: _TimedDataset,
+    storage: BaseStorage,
+) -> Union[PipelineRunner, AsyncPipelineRunner, BatchPipelineRunner]:
+    use_asyncio = scenario.engine == PipelineEngine.ASYNCIO
+    extractor_factory = partial(
+        _create_extractor, extractor_config, documents, scenario.concurrency
+    )
+    extractor = _create_extractor(
+        extractor_config, documents, scenario.concurrency, asynchronous=use_asyncio
+    )
+    if scenario.engine == PipelineEngine.BATCH:
+        if not isinstance(extractor, LLMExtractor):
+            msg = "The batch engine only supports the llm provider."
+            raise BenchUnsupportedError(msg)
+        llm = extractor_config.llm
+        return BatchPipelineRunner(
+            dataset,
+            extractor,
+            storage,
+            pipeline,
+            BatchAPIClient(llm),
+            llm.batch_api,
+            run_id="bench",
+        )
+    if use_asyncio:
+        return AsyncPipelineRunner(dataset, extractor, storage, pipeline)
+    return PipelineRunner(
+        dataset, extractor, storage, pipeline, extractor_factory=extractor_factory
+    )
+
+
+def _create_extractor(
+    config: ExtractorConfig,
+    documents: DocumentsConfig,
+    pool_size: int,
+    *,
+    asynchronous: bool = False,
+) -> BaseExtractor:
+    if config.provider != ExtractorProvider.DOCUMENT_AI:
+        return create_extractor(
+            config, pool_size=pool_size, asynchronous=asynchronous, documents=documents
+        )
+    if asynchronous:
+        msg = "The asyncio engine has no native Document AI client."
+        raise BenchUnsupportedError(msg)
+    if documentai is None:
+        msg = (
+            "google-cloud-documentai is required to benchmark Document AI. Install the "
+            "'document-ai' extra: pip install docvqa[document-ai]."
+        )
+        raise ImportError(msg)
+    # The fake server speaks the REST transport; the default gRPC one needs TLS and auth.
+    client = documentai.DocumentProcessorServiceClient(
+        credentials=AnonymousCredentials(),
+        transport="rest",
+        client_options={"api_endpoint": config.document_ai.endpoint},
+    )
+    return DocumentAIExtractor(config.document_ai, client=client)
+
+
+def _percentile_ms(ordered: Sequence[float], percentile: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(len(ordered) * percentile / 100.0))
+    return round(ordered[index] * 1000, 2)
+
+
+def _reset_peak_rss() -> None:
+    """Reset the kernel's peak RSS counter so each scenario reports its own high-water mark."""
+
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as handle:
+            handle.write("5")
+    except OSError:  # pragma: no cover - not Linux, or not permitted
+        pass
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process or any finished child, in MiB."""
+
+    peak: Optional[int] = None
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+                    break
+    except OSError:  # pragma: no cover - not Linux
+        pass
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux and in bytes on macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        if peak is None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+    return round(peak / (1024 * 1024), 1) if peak is not None else None
+
+
+def format_results(results: Iterable[BenchResult]) -> str:
+    """Render results as a fixed-width table."""
+
+    header = (
+        f"{'scenario':<40} {'docs':>6} {'failed':>6} {'docs/s':>9} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MiB':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        if result.skipped is not None:
+            lines.append(f"{result.scenario:<40} skipped: {result.skipped}")
+            continue
+        lines.append(
+            f"{result.scenario:<40} {result.documents:>6} {result.failed:>6} "
+            f"{result.docs_per_second:>9.2f} {_cell(result.p50_ms)} {_cell(result.p95_ms)} "
+            f"{_cell(result.p99_ms)} {_cell(result.peak_rss_mb, 8)}"
+        )
+    return "\n".join(lines)
+
+
+def _cell(value: Optional[float], width: int = 9) -> str:
+    return f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+
+
+__all__ = [
+    "BenchResult",
+    "BenchScenario",
+    "BenchUnsupportedError",
+    "build_scenarios",
+    "format_results",
+    "run_scenario",
+    "run_suite",
+    "write_manifest",
+]
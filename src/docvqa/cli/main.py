@@ -2,21 +2,20 @@ from __future__ import annotations
 
 """Command line entrypoint for DocVQA pipeline."""
 
+import json
+import tempfile
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, get_args
 
 import typer
 
-from docvqa.config.loader import load_config
-from docvqa.config.models import ExtractorProvider, StorageProvider
-from docvqa.data.dataset import DocVQADataset
-from docvqa.extractors.factory import create_extractor
-from docvqa.evaluation.loader import load_results
-from docvqa.evaluation.metrics import compare_runs
-from docvqa.pipeline.schemas import ExtractionResult
-from docvqa.storage.factory import create_storage
-from docvqa.pipeline.run import PipelineRunner
-from docvqa.utils.logging import configure_logging, get_logger
+from docvqa.config.enums import ExtractorProvider, PipelineEngine, ShardStrategy, StorageProvider
+
+# Only the option enums are imported up front. Each command imports what it needs,
+# so `--help`, `evaluate` and `merge` never load the config models, HTTP clients, pyarrow or
+# the Google SDKs; tests/cli/test_startup.py keeps it that way.
 
 app = typer.Typer(help="Run document extraction pipelines against DocVQA datasets.")
 
@@ -26,16 +25,31 @@ def _build_overrides(
     limit: Optional[int],
     extractor_provider: Optional[str],
     storage_provider: Optional[str],
+    engine: Optional[str] = None,
+    start: Optional[int] = None,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    shard_strategy: Optional[str] = None,
 ) -> dict:
     overrides: dict[str, object] = {}
     if dataset_path is not None:
         overrides.setdefault("dataset", {})["path"] = str(dataset_path)
     if limit is not None:
         overrides.setdefault("dataset", {})["limit"] = limit
+    if start is not None:
+        overrides.setdefault("dataset", {})["start"] = start
+    if shard_index is not None:
+        overrides.setdefault("dataset", {})["shard_index"] = shard_index
+    if shard_count is not None:
+        overrides.setdefault("dataset", {})["shard_count"] = shard_count
+    if shard_strategy is not None:
+        overrides.setdefault("dataset", {})["shard_strategy"] = shard_strategy
     if extractor_provider is not None:
         overrides.setdefault("extractor", {})["provider"] = extractor_provider
     if storage_provider is not None:
         overrides.setdefault("storage", {})["provider"] = storage_provider
+    if engine is not None:
+        overrides.setdefault("pipeline", {})["engine"] = engine
     return overrides
 
 
@@ -56,6 +70,26 @@ def run(
         min=1,
         help="Maximum number of documents to process.",
     ),
+    start: Optional[int] = typer.Option(
+        None,
+        min=0,
+        help="Position in the dataset of the first document to process.",
+    ),
+    shard_index: Optional[int] = typer.Option(
+        None,
+        min=0,
+        help="Zero-based shard of the dataset processed by this invocation.",
+    ),
+    shard_count: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Number of shards the dataset is split into across processes or machines.",
+    ),
+    shard_strategy: Optional[ShardStrategy] = typer.Option(
+        None,
+        case_sensitive=False,
+        help="Assign documents to shards by doc_id hash or by contiguous ranges.",
+    ),
     extractor_provider: Optional[ExtractorProvider] = typer.Option(
         None,
         case_sensitive=False,
@@ -64,20 +98,61 @@ def run(
     storage_provider: Optional[StorageProvider] = typer.Option(
         None,
         case_sensitive=False,
-        help="Storage backend to use (firestore or local_json).",
+        help="Storage backend to use (firestore, local_json or parquet).",
     ),
     run_id: Optional[str] = typer.Option(
         None,
         help="Optional identifier for this pipeline run.",
     ),
+    engine: Optional[PipelineEngine] = typer.Option(
+        None,
+        case_sensitive=False,
+        help="Execution engine (threads, asyncio, processes or batch).",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Neither read nor write the extraction result cache.",
+    ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Ignore cached results but store fresh ones.",
+    ),
+    resume: Optional[str] = typer.Option(
+        None,
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue an interrupted run, skipping documents it already persisted.",
+    ),
 ) -> None:
     """Execute the DocVQA extraction pipeline."""
 
+    from docvqa.config.loader import load_config
+    from docvqa.data.dataset import DocVQADataset
+    from docvqa.data.sharding import shard_partition
+    from docvqa.extractors.cache import ResultCache
+    from docvqa.extractors.factory import create_extractor
+    from docvqa.pipeline.checkpoint import CheckpointIndex
+    from docvqa.pipeline.run import AsyncPipelineRunner, PipelineRunner
+    from docvqa.storage.factory import create_storage
+    from docvqa.utils.logging import configure_logging, get_logger
+    from docvqa.utils.metrics import MetricsExporter, get_metrics
+
+    if resume is not None and run_id is not None and resume != run_id:
+        msg = "--resume and --run-id refer to different runs."
+        raise typer.BadParameter(msg, param_hint="--resume")
+
     overrides = _build_overrides(
         dataset_path,
         limit,
         extractor_provider.value if extractor_provider else None,
         storage_provider.value if storage_provider else None,
+        engine.value if engine else None,
+        start,
+        shard_index,
+        shard_count,
+        shard_strategy.value if shard_strategy else None,
     )
 
     try:
@@ -89,31 +164,127 @@ def run(
     configure_logging(app_config.logging.level)
     logger = get_logger(__name__)
 
+    run_id = resume or run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    dataset_config = app_config.dataset
+    partition = None
+    checkpoint_id = run_id
+    if dataset_config.shard_count > 1:
+        partition = shard_partition(dataset_config.shard_index, dataset_config.shard_count)
+        checkpoint_id = f"{run_id}.{partition}"
+    checkpoint = CheckpointIndex.for_run(app_config.pipeline.checkpoint_dir, checkpoint_id)
+    if resume is not None:
+        logger.info("run_resumed", run_id=run_id, completed=len(checkpoint.completed))
+    elif checkpoint.completed:
+        logger.error("run_id_in_use", run_id=run_id, checkpoint=str(checkpoint.path))
+        raise typer.Exit(code=1)
+    else:
+        logger.info("run_started", run_id=run_id, partition=partition)
+
     dataset = DocVQADataset(
-        app_config.dataset.path,
-        limit=app_config.dataset.limit,
+        dataset_config.path,
+        limit=dataset_config.limit,
+        skip_ids=checkpoint.completed,
+        start=dataset_config.start,
+        shard_index=dataset_config.shard_index,
+        shard_count=dataset_config.shard_count,
+        shard_strategy=dataset_config.shard_strategy,
     )
 
+    use_asyncio = app_config.pipeline.engine == PipelineEngine.ASYNCIO
     try:
-        extractor = create_extractor(app_config.extractor)
+        extractor = create_extractor(
+            app_config.extractor,
+            pool_size=(
+                app_config.pipeline.async_concurrency
+                if use_asyncio
+                else app_config.pipeline.concurrency
+            ),
+            asynchronous=use_asyncio,
+            documents=app_config.documents,
+        )
     except Exception as exc:
         logger.error("extractor_init_failed", error=str(exc))
         raise typer.Exit(code=2) from exc
 
+    cache = None
+    if app_config.cache.enabled and not no_cache:
+        cache = ResultCache(
+            app_config.cache.directory, max_bytes=app_config.cache.max_size_mb * 1024 * 1024
+        )
+        extractor.use_cache(cache, refresh=refresh)
+
     try:
-        storage = create_storage(app_config.storage, run_id=run_id)
+        storage = create_storage(
+            app_config.storage, run_id=run_id, resume=resume is not None, partition=partition
+        )
     except Exception as exc:
         logger.error("storage_init_failed", error=str(exc))
         raise typer.Exit(code=3) from exc
 
-    runner = PipelineRunner(dataset, extractor, storage, app_config.pipeline)
-    stats = runner.run()
+    if app_config.pipeline.engine == PipelineEngine.BATCH:
+        from docvqa.extractors.llm import LLMExtractor
+        from docvqa.llm.batch import BatchAPIClient
+        from docvqa.pipeline.batch import BatchPipelineRunner
+
+        if not isinstance(extractor, LLMExtractor):
+            logger.error("batch_engine_unsupported", provider=app_config.extractor.provider.value)
+            raise typer.Exit(code=2)
+        llm_config = app_config.extractor.llm
+        runner = BatchPipelineRunner(
+            dataset,
+            extractor,
+            storage,
+            app_config.pipeline,
+            BatchAPIClient(llm_config),
+            llm_config.batch_api,
+            run_id=checkpoint_id,
+            checkpoint=checkpoint,
+        )
+    elif use_asyncio:
+        runner = AsyncPipelineRunner(
+            dataset, extractor, storage, app_config.pipeline, checkpoint=checkpoint
+        )
+    else:
+        runner = PipelineRunner(
+            dataset,
+            extractor,
+            storage,
+            app_config.pipeline,
+            checkpoint=checkpoint,
+            extractor_factory=partial(
+                create_extractor, app_config.extractor, documents=app_config.documents
+            ),
+        )
+    metrics_config = app_config.metrics
+    exporter = MetricsExporter(
+        get_metrics(),
+        port=metrics_config.port,
+        host=metrics_config.host,
+        textfile=metrics_config.textfile,
+        interval_seconds=metrics_config.textfile_interval_seconds,
+    )
+    exporter.start()
+    if exporter.address is not None:
+        host, port = exporter.address
+        logger.info("metrics_endpoint", url=f"http://{host}:{port}/metrics")
+    try:
+        stats = runner.run()
+    finally:
+        exporter.stop()
     logger.info(
         "run_complete",
         processed=stats.processed,
         succeeded=stats.succeeded,
         failed=stats.failed,
+        retries=stats.retries,
+        skipped=dataset.skipped,
     )
+    if cache is not None:
+        logger.info("result_cache", hits=cache.hits, misses=cache.misses)
+        cache.close()
+    pool_stats = getattr(extractor, "pool_stats", lambda: None)()
+    if pool_stats is not None:
+        logger.info("connection_pool", hits=pool_stats.hits, misses=pool_stats.misses)
 
 
 @app.command()
@@ -127,7 +298,9 @@ def evaluate(
 ) -> None:
     """Compare extraction outputs across providers using aggregated metrics."""
 
-    runs: Dict[str, List[ExtractionResult]] = {}
+    from docvqa.evaluation.loader import evaluate_result_files
+
+    runs: Dict[str, Path] = {}
     for entry in run:
         if "=" not in entry:
             raise typer.BadParameter(
@@ -138,15 +311,14 @@ def evaluate(
         if not provider:
             raise typer.BadParameter("Provider label cannot be empty.", param_hint="--run")
         path = Path(path_str.strip())
-        try:
-            runs[provider] = load_results(path)
-        except FileNotFoundError as exc:
-            raise typer.BadParameter(str(exc), param_hint="--run") from exc
+        if not path.exists():
+            raise typer.BadParameter(f"Results file not found: {path}", param_hint="--run")
+        runs[provider] = path
 
     if len(runs) < 2:
         raise typer.BadParameter("Provide at least two runs to compare.", param_hint="--run")
 
-    report = compare_runs(runs)
+    report = evaluate_result_files(runs)
 
     typer.echo("Provider Metrics:")
     for metrics in report.providers:
@@ -165,5 +337,114 @@ def evaluate(
         typer.echo(f"  - {provider}: {count}")
 
 
+@app.command()
+def merge(
+    run_id: str = typer.Argument(..., help="Run whose shard outputs should be combined."),
+    output_dir: Optional[Path] = typer.Option(
+        None,
+        help=(
+            "Directory holding the <run_id>.shard-*-of-*.jsonl files. Defaults to the "
+            "local_json output directory."
+        ),
+    ),
+    allow_partial: bool = typer.Option(
+        False,
+        "--allow-partial",
+        help="Merge even if some shards have not produced a finalized output yet.",
+    ),
+) -> None:
+    """Combine the local JSONL outputs of a sharded run into <run_id>.jsonl."""
+
+    from docvqa.config.models import LocalJSONConfig
+    from docvqa.storage.local import merge_partitions
+
+    output_dir = output_dir or LocalJSONConfig().output_dir
+    try:
+        path, written = merge_partitions(output_dir, run_id, allow_partial=allow_partial)
+    except (FileNotFoundError, ValueError) as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(code=1) from exc
+    typer.echo(f"Merged {written} results into {path}")
+
+
+@app.command()
+def bench(
+    documents: int = typer.Option(200, min=1, help="Synthetic documents per scenario."),
+    engine: Optional[List[PipelineEngine]] = typer.Option(
+        None,
+        case_sensitive=False,
+        help="Engine to measure. Repeat for several; defaults to every engine.",
+    ),
+    concurrency: Optional[List[int]] = typer.Option(
+        None, min=1, help="Concurrency level to measure. Repeat for several; defaults to 1 and 8."
+    ),
+    storage_provider: Optional[List[StorageProvider]] = typer.Option(
+        None,
+        "--storage",
+        case_sensitive=False,
+        help="Storage backend to measure. Repeat for several; defaults to local_json and parquet.",
+    ),
+    extractor_provider: ExtractorProvider = typer.Option(
+        ExtractorProvider.LLM,
+        "--provider",
+        case_sensitive=False,
+        help="Extraction backend simulated by the fake server (llm or document_ai).",
+    ),
+    latency_ms: float = typer.Option(50.0, min=0, help="Median simulated response time."),
+    latency_distribution: str = typer.Option(
+        "lognormal", help="Response time distribution: fixed, uniform, exponential or lognormal."
+    ),
+    latency_spread: float = typer.Option(
+        0.5, min=0, help="Sigma for lognormal, relative half-width for uniform latencies."
+    ),
+    error_rate: float = typer.Option(0.0, min=0, max=1, help="Share of requests failing with 500."),
+    throttle_rate: float = typer.Option(
+        0.0, min=0, max=1, help="Share of requests rejected with 429."
+    ),
+    seed: int = typer.Option(0, help="Seed for simulated latencies and failures."),
+    work_dir: Optional[Path] = typer.Option(
+        None, help="Directory for the synthetic dataset and outputs. Defaults to a temporary one."
+    ),
+    output: Optional[Path] = typer.Option(None, help="Also write the results as JSON to this file."),
+) -> None:
+    """Measure throughput, latency and memory of the pipeline against a local fake provider."""
+
+    from docvqa.bench.server import FakeProviderServer, LatencyDistribution, LatencyModel
+    from docvqa.bench.suite import build_scenarios, format_results, run_suite
+    from docvqa.utils.logging import configure_logging
+
+    if latency_distribution not in get_args(LatencyDistribution):
+        msg = f"Unknown distribution {latency_distribution!r}."
+        raise typer.BadParameter(msg, param_hint="--latency-distribution")
+    if error_rate + throttle_rate > 1:
+        msg = "--error-rate and --throttle-rate must not add up to more than 1."
+        raise typer.BadParameter(msg, param_hint="--throttle-rate")
+
+    configure_logging("ERROR")
+    scenarios = build_scenarios(
+        engine or list(PipelineEngine),
+        concurrency or [1, 8],
+        storage_provider or [StorageProvider.LOCAL_JSON, StorageProvider.PARQUET],
+        extractor_provider,
+    )
+    latency = LatencyModel(latency_distribution, latency_ms, latency_spread)
+    server = FakeProviderServer(
+        latency, error_rate=error_rate, throttle_rate=throttle_rate, seed=seed
+    )
+    with tempfile.TemporaryDirectory(prefix="docvqa-bench-") as temporary, server:
+        directory = work_dir or Path(temporary)
+        results = list(run_suite(scenarios, server, documents=documents, work_dir=directory))
+
+    typer.echo(format_results(results))
+    typer.echo(
+        f"\nServer: {server.requests} requests, {server.errors} errors, "
+        f"{server.throttled} throttled"
+    )
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        report = [result.as_dict() for result in results]
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
 if __name__ == "__main__":
     app()
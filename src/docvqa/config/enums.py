@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+"""Provider and engine choices shared by the configuration models and the CLI.
+
+Kept free of pydantic so the CLI can declare its options without building the config models.
+"""
+
+from enum import Enum
+
+
+class ExtractorProvider(str, Enum):
+    """Supported extraction backends."""
+
+    LLM = "llm"
+    DOCUMENT_AI = "document_ai"
+
+
+class ShardStrategy(str, Enum):
+    """How documents are assigned to shards."""
+
+    HASH = "hash"
+    RANGE = "range"
+
+
+class StorageProvider(str, Enum):
+    """Supported persistence backends."""
+
+    FIRESTORE = "firestore"
+    LOCAL_JSON = "local_json"
+    PARQUET = "parquet"
+
+
+class PipelineEngine(str, Enum):
+    """Execution engines for the extraction pipeline."""
+
+    THREADS = "threads"
+    ASYNCIO = "asyncio"
+    PROCESSES = "processes"
+    BATCH = "batch"
+
+
+__all__ = ["ExtractorProvider", "PipelineEngine", "ShardStrategy", "StorageProvider"]
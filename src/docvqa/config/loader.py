@@ -11,10 +11,18 @@ from dotenv import load_dotenv
 from .models import AppConfig
 
 
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 # Mapping of environment variables to config paths and optional converters.
 ENV_VAR_MAPPING: Dict[str, tuple[tuple[str, ...], Callable[[str], object]]] = {
     "DOCVQA_DATASET_PATH": (("dataset", "path"), lambda v: Path(v).expanduser()),
     "DOCVQA_DATASET_LIMIT": (("dataset", "limit"), int),
+    "DOCVQA_DATASET_START": (("dataset", "start"), int),
+    "DOCVQA_DATASET_SHARD_COUNT": (("dataset", "shard_count"), int),
+    "DOCVQA_DATASET_SHARD_INDEX": (("dataset", "shard_index"), int),
+    "DOCVQA_DATASET_SHARD_STRATEGY": (("dataset", "shard_strategy"), str),
     "DOCVQA_EXTRACTOR_PROVIDER": (("extractor", "provider"), str.lower),
     "DOCVQA_LLM_PROVIDER": (("extractor", "llm", "provider"), str),
     "DOCVQA_LLM_API_BASE": (("extractor", "llm", "api_base"), str),
@@ -23,6 +31,24 @@ ENV_VAR_MAPPING: Dict[str, tuple[tuple[str, ...], Callable[[str], object]]] = {
     "DOCVQA_LLM_TEMPERATURE": (("extractor", "llm", "temperature"), float),
     "DOCVQA_LLM_MAX_OUTPUT_TOKENS": (("extractor", "llm", "max_output_tokens"), int),
     "DOCVQA_LLM_TIMEOUT_SECONDS": (("extractor", "llm", "timeout_seconds"), float),
+    "DOCVQA_LLM_REQUESTS_PER_MINUTE": (("extractor", "llm", "requests_per_minute"), int),
+    "DOCVQA_LLM_BATCH_DOCUMENTS": (("extractor", "llm", "batch_documents"), int),
+    "DOCVQA_LLM_CONTEXT_TOKENS": (("extractor", "llm", "context_tokens"), int),
+    "DOCVQA_LLM_TOKENS_PER_MINUTE": (("extractor", "llm", "tokens_per_minute"), int),
+    "DOCVQA_LLM_BATCH_API_BASE": (("extractor", "llm", "batch_api", "api_base"), str),
+    "DOCVQA_LLM_BATCH_API_COMPLETION_WINDOW": (
+        ("extractor", "llm", "batch_api", "completion_window"),
+        str,
+    ),
+    "DOCVQA_LLM_BATCH_API_POLL_SECONDS": (("extractor", "llm", "batch_api", "poll_seconds"), float),
+    "DOCVQA_LLM_BATCH_API_MAX_REQUESTS_PER_FILE": (
+        ("extractor", "llm", "batch_api", "max_requests_per_file"),
+        int,
+    ),
+    "DOCVQA_LLM_BATCH_API_WORK_DIR": (
+        ("extractor", "llm", "batch_api", "work_dir"),
+        lambda v: Path(v).expanduser(),
+    ),
     "DOCVQA_DOCUMENT_AI_PROJECT_ID": (("extractor", "document_ai", "project_id"), str),
     "DOCVQA_DOCUMENT_AI_LOCATION": (("extractor", "document_ai", "location"), str),
     "DOCVQA_DOCUMENT_AI_PROCESSOR_ID": (("extractor", "document_ai", "processor_id"), str),
@@ -35,10 +61,29 @@ ENV_VAR_MAPPING: Dict[str, tuple[tuple[str, ...], Callable[[str], object]]] = {
         ("extractor", "document_ai", "timeout_seconds"),
         float,
     ),
+    "DOCVQA_DOCUMENT_AI_REQUESTS_PER_MINUTE": (
+        ("extractor", "document_ai", "requests_per_minute"),
+        int,
+    ),
+    "DOCVQA_DOCUMENT_AI_BATCH_SIZE": (("extractor", "document_ai", "batch_size"), int),
+    "DOCVQA_DOCUMENT_AI_GCS_STAGING_URI": (
+        ("extractor", "document_ai", "gcs_staging_uri"),
+        str,
+    ),
+    "DOCVQA_DOCUMENT_AI_BATCH_TIMEOUT_SECONDS": (
+        ("extractor", "document_ai", "batch_timeout_seconds"),
+        float,
+    ),
     "DOCVQA_STORAGE_PROVIDER": (("storage", "provider"), str.lower),
     "DOCVQA_FIRESTORE_PROJECT_ID": (("storage", "firestore", "project_id"), str),
     "DOCVQA_FIRESTORE_COLLECTION": (("storage", "firestore", "collection"), str),
     "DOCVQA_FIRESTORE_BATCH_SIZE": (("storage", "firestore", "batch_size"), int),
+    "DOCVQA_FIRESTORE_BACKGROUND": (("storage", "firestore", "background"), _to_bool),
+    "DOCVQA_FIRESTORE_QUEUE_SIZE": (("storage", "firestore", "queue_size"), int),
+    "DOCVQA_FIRESTORE_MAX_INFLIGHT_COMMITS": (
+        ("storage", "firestore", "max_inflight_commits"),
+        int,
+    ),
     "DOCVQA_FIRESTORE_CREDENTIALS": (
         ("storage", "firestore", "credentials_path"),
         lambda v: Path(v).expanduser(),
@@ -47,9 +92,70 @@ ENV_VAR_MAPPING: Dict[str, tuple[tuple[str, ...], Callable[[str], object]]] = {
         ("storage", "local_json", "output_dir"),
         lambda v: Path(v).expanduser(),
     ),
+    "DOCVQA_LOCAL_JSON_STREAMING": (("storage", "local_json", "streaming"), _to_bool),
+    "DOCVQA_LOCAL_JSON_FLUSH_EVERY": (("storage", "local_json", "flush_every"), int),
+    "DOCVQA_LOCAL_JSON_FLUSH_INTERVAL_SECONDS": (
+        ("storage", "local_json", "flush_interval_seconds"),
+        float,
+    ),
+    "DOCVQA_LOCAL_JSON_FSYNC": (("storage", "local_json", "fsync"), str.lower),
+    "DOCVQA_PARQUET_OUTPUT_DIR": (
+        ("storage", "parquet", "output_dir"),
+        lambda v: Path(v).expanduser(),
+    ),
+    "DOCVQA_PARQUET_ROW_GROUP_SIZE": (("storage", "parquet", "row_group_size"), int),
+    "DOCVQA_PARQUET_ROWS_PER_PART": (("storage", "parquet", "rows_per_part"), int),
+    "DOCVQA_PARQUET_COMPRESSION": (("storage", "parquet", "compression"), str.lower),
+    "DOCVQA_PARQUET_RAW_RESPONSE": (("storage", "parquet", "raw_response"), str.lower),
+    "DOCVQA_RAW_RESPONSE_POLICY": (("storage", "raw_response", "policy"), str.lower),
+    "DOCVQA_RAW_RESPONSE_COMPRESSION": (("storage", "raw_response", "compression"), str.lower),
+    "DOCVQA_RAW_RESPONSE_LEVEL": (("storage", "raw_response", "level"), int),
+    "DOCVQA_RAW_RESPONSE_DIR": (
+        ("storage", "raw_response", "directory"),
+        lambda v: Path(v).expanduser(),
+    ),
+    "DOCVQA_PIPELINE_ENGINE": (("pipeline", "engine"), str.lower),
     "DOCVQA_PIPELINE_CONCURRENCY": (("pipeline", "concurrency"), int),
+    "DOCVQA_PIPELINE_ADAPTIVE_CONCURRENCY": (("pipeline", "adaptive_concurrency"), _to_bool),
+    "DOCVQA_PIPELINE_MIN_CONCURRENCY": (("pipeline", "min_concurrency"), int),
+    "DOCVQA_PIPELINE_LATENCY_TARGET_SECONDS": (("pipeline", "latency_target_seconds"), float),
+    "DOCVQA_PIPELINE_ASYNC_CONCURRENCY": (("pipeline", "async_concurrency"), int),
+    "DOCVQA_PIPELINE_PROCESS_WORKERS": (("pipeline", "process_workers"), int),
+    "DOCVQA_PIPELINE_MAX_IN_FLIGHT": (("pipeline", "max_in_flight"), int),
+    "DOCVQA_PIPELINE_HEDGE_PERCENTILE": (("pipeline", "hedge_percentile"), float),
+    "DOCVQA_PIPELINE_HEDGE_MIN_SAMPLES": (("pipeline", "hedge_min_samples"), int),
+    "DOCVQA_PIPELINE_HEDGE_BUDGET_RATIO": (("pipeline", "hedge_budget_ratio"), float),
+    "DOCVQA_PIPELINE_DOCUMENT_DEADLINE_SECONDS": (
+        ("pipeline", "document_deadline_seconds"),
+        float,
+    ),
+    "DOCVQA_PIPELINE_CHECKPOINT_DIR": (
+        ("pipeline", "checkpoint_dir"),
+        lambda v: Path(v).expanduser(),
+    ),
+    "DOCVQA_PIPELINE_CHECKPOINT_EVERY": (("pipeline", "checkpoint_every"), int),
     "DOCVQA_PIPELINE_RETRY_ATTEMPTS": (("pipeline", "retry_attempts"), int),
     "DOCVQA_PIPELINE_RETRY_BACKOFF_SECONDS": (("pipeline", "retry_backoff_seconds"), float),
+    "DOCVQA_PIPELINE_RETRY_MAX_BACKOFF_SECONDS": (
+        ("pipeline", "retry_max_backoff_seconds"),
+        float,
+    ),
+    "DOCVQA_PIPELINE_RETRY_BUDGET_RATIO": (("pipeline", "retry_budget_ratio"), float),
+    "DOCVQA_CACHE_ENABLED": (("cache", "enabled"), _to_bool),
+    "DOCVQA_CACHE_DIR": (("cache", "directory"), lambda v: Path(v).expanduser()),
+    "DOCVQA_CACHE_MAX_SIZE_MB": (("cache", "max_size_mb"), int),
+    "DOCVQA_DOCUMENTS_ENABLED": (("documents", "enabled"), _to_bool),
+    "DOCVQA_DOCUMENTS_OCR_BACKEND": (("documents", "ocr_backend"), str.lower),
+    "DOCVQA_DOCUMENTS_OCR_LANGUAGES": (("documents", "ocr_languages"), str),
+    "DOCVQA_DOCUMENTS_CACHE_DIR": (("documents", "cache_dir"), lambda v: Path(v).expanduser()),
+    "DOCVQA_DOCUMENTS_MAX_DOCUMENT_TOKENS": (("documents", "max_document_tokens"), int),
+    "DOCVQA_METRICS_PORT": (("metrics", "port"), int),
+    "DOCVQA_METRICS_HOST": (("metrics", "host"), str),
+    "DOCVQA_METRICS_TEXTFILE": (("metrics", "textfile"), lambda v: Path(v).expanduser()),
+    "DOCVQA_METRICS_TEXTFILE_INTERVAL_SECONDS": (
+        ("metrics", "textfile_interval_seconds"),
+        float,
+    ),
     "DOCVQA_LOG_LEVEL": (("logging", "level"), str.upper),
 }
 
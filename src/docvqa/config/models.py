@@ -2,18 +2,12 @@ from __future__ import annotations
 
 """Configuration models for the DocVQA pipeline."""
 
-from enum import Enum
 from pathlib import Path
 from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
-
-class ExtractorProvider(str, Enum):
-    """Supported extraction backends."""
-
-    LLM = "llm"
-    DOCUMENT_AI = "document_ai"
+from docvqa.config.enums import ExtractorProvider, PipelineEngine, ShardStrategy, StorageProvider
 
 
 class DatasetConfig(BaseModel):
@@ -21,6 +15,43 @@ class DatasetConfig(BaseModel):
 
     path: Path = Field(..., description="Directory containing DocVQA samples.")
     limit: Optional[int] = Field(None, ge=1, description="Optional max number of documents to process.")
+    start: int = Field(0, ge=0, description="Position of the first document to process.")
+    shard_count: int = Field(1, ge=1, description="Number of shards the dataset is split into.")
+    shard_index: int = Field(0, ge=0, description="Zero-based shard processed by this run.")
+    shard_strategy: ShardStrategy = Field(
+        ShardStrategy.HASH,
+        description="Assign documents by stable hash of doc_id or by contiguous position ranges.",
+    )
+
+    @field_validator("shard_index")
+    @classmethod
+    def check_shard_index(cls, value: int, info):
+        shard_count = info.data.get("shard_count", 1)
+        if value >= shard_count:
+            msg = f"shard_index must be lower than shard_count ({shard_count})."
+            raise ValueError(msg)
+        return value
+
+
+class BatchAPIConfig(BaseModel):
+    """Parameters for offline submission through an OpenAI-compatible Batch API."""
+
+    api_base: Optional[str] = Field(
+        None,
+        description=(
+            "Base URL exposing /files and /batches. Defaults to llm.api_base without its "
+            "trailing /chat/completions."
+        ),
+    )
+    completion_window: str = Field("24h", description="Completion window requested per batch.")
+    poll_seconds: float = Field(30.0, gt=0, description="Delay between batch status checks.")
+    max_requests_per_file: int = Field(
+        50_000, ge=1, description="Requests per uploaded input file (one batch per file)."
+    )
+    work_dir: Path = Field(
+        Path("artifacts/batches"),
+        description="Directory holding input files and the submitted-batch state of each run.",
+    )
 
 
 class LLMConfig(BaseModel):
@@ -32,7 +63,28 @@ class LLMConfig(BaseModel):
     model: str = Field(..., description="Model identifier to query.")
     temperature: float = Field(0.0, ge=0.0, le=2.0)
     max_output_tokens: int = Field(1024, gt=0)
+    batch_documents: int = Field(
+        1,
+        ge=1,
+        le=32,
+        description=(
+            "Documents packed into one chat completion. Values above 1 share the instructions "
+            "across documents and multiply max_output_tokens by the batch size."
+        ),
+    )
+    context_tokens: int = Field(
+        128_000,
+        gt=0,
+        description="Model context window; document text is truncated to fit it.",
+    )
     timeout_seconds: float = Field(60.0, gt=0)
+    requests_per_minute: Optional[int] = Field(
+        None, gt=0, description="Client-side request budget shared by all workers."
+    )
+    tokens_per_minute: Optional[int] = Field(
+        None, gt=0, description="Client-side prompt plus completion token budget."
+    )
+    batch_api: BatchAPIConfig = BatchAPIConfig()
 
 
 class DocumentAIConfig(BaseModel):
@@ -46,6 +98,25 @@ class DocumentAIConfig(BaseModel):
     )
     endpoint: Optional[str] = Field(None, description="Override endpoint for Document AI API.")
     timeout_seconds: float = Field(60.0, gt=0)
+    requests_per_minute: Optional[int] = Field(
+        None, gt=0, description="Client-side request budget shared by all workers."
+    )
+    batch_size: int = Field(
+        1,
+        ge=1,
+        le=1000,
+        description=(
+            "Documents grouped into one batch_process_documents operation. 1 keeps the "
+            "synchronous process_document call per document."
+        ),
+    )
+    gcs_staging_uri: Optional[str] = Field(
+        None,
+        description="gs://bucket/prefix where batch mode stages inputs and receives outputs.",
+    )
+    batch_timeout_seconds: float = Field(
+        3600.0, gt=0, description="Maximum wait for one batch operation to finish."
+    )
 
 
 class ExtractorConfig(BaseModel):
@@ -86,6 +157,20 @@ class FirestoreConfig(BaseModel):
     credentials_path: Optional[Path] = Field(
         None, description="Optional path to service account JSON credentials."
     )
+    background: bool = Field(
+        False, description="Commit from a dedicated writer thread instead of the caller."
+    )
+    queue_size: int = Field(
+        2000, ge=1, description="Results buffered for the background writer before blocking."
+    )
+    max_inflight_commits: int = Field(
+        4, ge=1, le=32, description="Batch commits the background writer keeps in flight."
+    )
+    linger_seconds: float = Field(
+        0.5, gt=0, description="Commit a partial batch after the queue has been idle this long."
+    )
+    commit_retries: int = Field(3, ge=0, le=10)
+    commit_backoff_seconds: float = Field(0.5, ge=0)
 
 
 class LocalJSONConfig(BaseModel):
@@ -94,14 +179,70 @@ class LocalJSONConfig(BaseModel):
     output_dir: Path = Field(
         Path("artifacts/results"), description="Directory to store JSON output files."
     )
-    indent: int = Field(2, ge=0, le=4)
+    indent: int = Field(
+        0,
+        ge=0,
+        le=4,
+        description=(
+            "Pretty-print indentation. Zero writes one compact record per line; larger values "
+            "span multiple lines and are not readable as JSONL."
+        ),
+    )
+    streaming: bool = Field(
+        True,
+        description="Append each result to disk as it arrives instead of buffering the run.",
+    )
+    flush_every: int = Field(100, ge=1, description="Flush after this many buffered records.")
+    flush_interval_seconds: float = Field(
+        5.0, gt=0, description="Flush when this long has passed since the previous flush."
+    )
+    fsync: Literal["never", "flush", "finalize"] = Field(
+        "finalize",
+        description="When to fsync the output: never, on every flush, or only at finalize.",
+    )
 
 
-class StorageProvider(str, Enum):
-    """Supported persistence backends."""
+class ParquetConfig(BaseModel):
+    """Columnar Parquet persistence for large runs."""
+
+    output_dir: Path = Field(
+        Path("artifacts/results"), description="Directory receiving one folder per run."
+    )
+    row_group_size: int = Field(
+        50_000, ge=1, description="Results buffered in memory before a row group is written."
+    )
+    rows_per_part: int = Field(
+        500_000, ge=1, description="Results written to a part file before the next one starts."
+    )
+    compression: Literal["zstd", "snappy", "gzip", "none"] = "zstd"
+    raw_response: Literal["file", "column"] = Field(
+        "file",
+        description=(
+            "Store raw provider responses in a sibling raw/ part file (default) or as a column "
+            "of the results file."
+        ),
+    )
 
-    FIRESTORE = "firestore"
-    LOCAL_JSON = "local_json"
+
+class RawResponseConfig(BaseModel):
+    """Handling of the provider payload carried in ``ExtractionResult.raw_response``."""
+
+    policy: Literal["inline", "drop", "offload"] = Field(
+        "inline",
+        description=(
+            "Keep the payload in each stored result, drop it, or offload it to a compressed "
+            "pack file and store a reference in its place."
+        ),
+    )
+    compression: Literal["zstd", "gzip", "none"] = Field(
+        "gzip", description="Compression of offloaded payloads; zstd needs the 'zstd' extra."
+    )
+    level: Optional[int] = Field(
+        None, ge=1, le=22, description="Compression level; the codec default when unset."
+    )
+    directory: Path = Field(
+        Path("artifacts/raw"), description="Directory receiving one pack file per run or shard."
+    )
 
 
 class StorageConfig(BaseModel):
@@ -110,6 +251,8 @@ class StorageConfig(BaseModel):
     provider: StorageProvider = Field(default=StorageProvider.LOCAL_JSON)
     firestore: Optional[FirestoreConfig] = None
     local_json: Optional[LocalJSONConfig] = None
+    parquet: Optional[ParquetConfig] = None
+    raw_response: RawResponseConfig = RawResponseConfig()
 
     @field_validator("firestore")
     @classmethod
@@ -129,6 +272,52 @@ class StorageConfig(BaseModel):
         return value
 
 
+class CacheConfig(BaseModel):
+    """Persistent extraction result cache settings."""
+
+    enabled: bool = True
+    directory: Path = Field(
+        Path("artifacts/cache"), description="Directory holding the result cache database."
+    )
+    max_size_mb: int = Field(1024, ge=1, description="Size at which LRU eviction kicks in.")
+
+
+class DocumentsConfig(BaseModel):
+    """Loading of document text sent to LLM extractors."""
+
+    enabled: bool = Field(True, description="Include document text in LLM prompts.")
+    ocr_backend: Literal["none", "tesseract"] = Field(
+        "none", description="Local OCR engine used for image documents."
+    )
+    ocr_languages: str = Field("eng", description="OCR language codes, e.g. 'eng+deu'.")
+    cache_dir: Path = Field(
+        Path("artifacts/page_text"),
+        description="Directory caching extracted per-page text by document hash.",
+    )
+    max_document_tokens: Optional[int] = Field(
+        None,
+        gt=0,
+        description=(
+            "Cap on document text per request. The context window minus max_output_tokens is "
+            "always enforced."
+        ),
+    )
+
+
+class MetricsConfig(BaseModel):
+    """Export of pipeline metrics in the Prometheus text format while a run is active."""
+
+    port: Optional[int] = Field(
+        None, ge=0, le=65535, description="Serve /metrics on this local port during runs."
+    )
+    host: str = Field("127.0.0.1", description="Interface the /metrics endpoint binds to.")
+    textfile: Optional[Path] = Field(
+        None,
+        description="Periodically write the metrics to this file (node_exporter textfile format).",
+    )
+    textfile_interval_seconds: float = Field(15.0, gt=0)
+
+
 class LoggingConfig(BaseModel):
     """Logging-related configuration."""
 
@@ -138,9 +327,79 @@ class LoggingConfig(BaseModel):
 class PipelineConfig(BaseModel):
     """Configuration for pipeline-specific options."""
 
+    engine: PipelineEngine = Field(default=PipelineEngine.THREADS)
     concurrency: int = Field(1, ge=1, le=16, description="Number of concurrent workers.")
+    adaptive_concurrency: bool = Field(
+        False,
+        description=(
+            "Start at min_concurrency and adjust in-flight extractions (AIMD) up to concurrency "
+            "based on observed latency and overload errors."
+        ),
+    )
+    min_concurrency: int = Field(1, ge=1, le=16)
+    latency_target_seconds: float = Field(
+        30.0, gt=0, description="p95 extraction latency above which adaptive mode backs off."
+    )
+    async_concurrency: int = Field(
+        64, ge=1, le=1024, description="Maximum in-flight extractions for the asyncio engine."
+    )
+    process_workers: Optional[int] = Field(
+        None,
+        ge=1,
+        description=(
+            "Worker processes parsing responses for the processes engine. Defaults to the "
+            "CPU count."
+        ),
+    )
+    max_in_flight: Optional[int] = Field(
+        None,
+        ge=1,
+        description=(
+            "Maximum number of documents submitted but not yet persisted. Defaults to twice "
+            "the concurrency."
+        ),
+    )
+    checkpoint_dir: Path = Field(
+        Path("artifacts/checkpoints"),
+        description="Directory holding per-run logs of persisted doc_ids for --resume.",
+    )
+    checkpoint_every: int = Field(
+        100, ge=1, description="Flush storage and the checkpoint log after this many results."
+    )
+    hedge_percentile: Optional[float] = Field(
+        None,
+        gt=0,
+        lt=100,
+        description=(
+            "Send one duplicate of an extraction still running after this percentile of recent "
+            "latencies and keep whichever finishes first. Disabled when unset."
+        ),
+    )
+    hedge_min_samples: int = Field(
+        20, ge=1, description="Latencies observed before hedging starts."
+    )
+    hedge_budget_ratio: float = Field(
+        0.1,
+        ge=0.0,
+        le=1.0,
+        description="Hedged requests allowed per extraction, bounding the extra load.",
+    )
+    document_deadline_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description="End-to-end time limit per document, across hedges and retries.",
+    )
     retry_attempts: int = Field(3, ge=0, le=5)
     retry_backoff_seconds: float = Field(2.0, ge=0.1)
+    retry_max_backoff_seconds: float = Field(
+        30.0, gt=0, description="Upper bound for a single backoff delay."
+    )
+    retry_budget_ratio: float = Field(
+        0.2,
+        ge=0.0,
+        le=1.0,
+        description="Retries allowed per first attempt across the run, to avoid retry storms.",
+    )
 
 
 class AppConfig(BaseModel):
@@ -150,6 +409,9 @@ class AppConfig(BaseModel):
     extractor: ExtractorConfig
     storage: StorageConfig
     pipeline: PipelineConfig = PipelineConfig()
+    cache: CacheConfig = CacheConfig()
+    documents: DocumentsConfig = DocumentsConfig()
+    metrics: MetricsConfig = MetricsConfig()
     logging: LoggingConfig = LoggingConfig()
 
     @classmethod
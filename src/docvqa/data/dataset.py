@@ -2,12 +2,14 @@ from __future__ import annotations
 
 """Dataset loading utilities for DocVQA samples."""
 
+from array import array
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterator, List, Optional
-
-import json
+from typing import Container, Dict, Iterator, List, Optional, Sequence, Union, overload
 
+from docvqa.config.enums import ShardStrategy
+from docvqa.data.index import ManifestIndex, record_doc_id
+from docvqa.data.sharding import shard_of, shard_range
 
 DEFAULT_MANIFEST = "manifest.jsonl"
 
@@ -23,49 +25,167 @@ class DocumentExample:
 
 
 class DocVQADataset:
-    """Iterates over DocVQA samples defined in a manifest file or directory listing."""
-
-    def __init__(self, root: Path, *, limit: Optional[int] = None) -> None:
+    """Iterates over DocVQA samples defined in a manifest file or directory listing.
+
+    The dataset is also a sequence: ``len(dataset)``, ``dataset[i]``, ``dataset[doc_id]`` and
+    ``dataset[a:b]`` (a lazy view) are served from a sidecar byte-offset index for manifests
+    (see :class:`~docvqa.data.index.ManifestIndex`), so none of them parse records they do not
+    return. ``start`` skips that many documents before ``limit`` is applied.
+
+    With ``shard_count`` above one only the documents of shard ``shard_index`` are visible,
+    assigned either by a stable hash of ``doc_id`` (the default; shards stay balanced and a
+    document keeps its shard when the manifest grows) or by contiguous position ranges. Every
+    node computes the same partition independently, so no coordination is needed. ``start``
+    and ``limit`` apply within the shard.
+
+    Documents whose id is in ``skip_ids`` (for example those completed by an earlier attempt of
+    a resumed run) are not yielded but still count towards ``limit`` and ``len``, so a resumed
+    run covers the same slice as the original.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        limit: Optional[int] = None,
+        skip_ids: Optional[Container[str]] = None,
+        start: int = 0,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        shard_strategy: ShardStrategy = ShardStrategy.HASH,
+    ) -> None:
+        if not 0 <= shard_index < shard_count:
+            msg = f"shard_index must be in [0, {shard_count}), got {shard_index}."
+            raise ValueError(msg)
         self.root = root
         self.limit = limit
+        self.skip_ids = skip_ids
+        self.start = start
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.shard_strategy = shard_strategy
+        self.skipped = 0
+        self._selection: Optional[Sequence[int]] = None
+        self._shard: Optional[Sequence[int]] = None
+        self._index: Optional[ManifestIndex] = None
+        self._files: Optional[List[Path]] = None
+        self._file_positions: Optional[Dict[str, int]] = None
 
     def __iter__(self) -> Iterator[DocumentExample]:
-        if not self.root.exists():
-            msg = f"Dataset path does not exist: {self.root}"
-            raise FileNotFoundError(msg)
-
-        manifest_path = self.root / DEFAULT_MANIFEST
-        if manifest_path.exists():
-            yield from self._from_manifest(manifest_path)
-        else:
-            yield from self._from_directory()
-
-    def _from_manifest(self, manifest_path: Path) -> Iterator[DocumentExample]:
-        count = 0
-        with manifest_path.open("r", encoding="utf-8") as handle:
-            for line in handle:
-                if self.limit is not None and count >= self.limit:
-                    break
-                if not line.strip():
-                    continue
-                sample = json.loads(line)
-                document_path = self.root / sample["document_path"]
-                questions = sample.get("questions")
-                metadata = sample.get("metadata")
-                doc_id = sample.get("id") or document_path.stem
-                yield DocumentExample(doc_id=doc_id, document_path=document_path, questions=questions, metadata=metadata)
-                count += 1
-
-    def _from_directory(self) -> Iterator[DocumentExample]:
-        supported_suffixes = {".pdf", ".png", ".jpg", ".jpeg", ".tiff"}
-        files = sorted(
-            path for path in self.root.iterdir() if path.suffix.lower() in supported_suffixes
-        )
-        for index, document_path in enumerate(files):
-            if self.limit is not None and index >= self.limit:
-                break
-            doc_id = document_path.stem
-            yield DocumentExample(doc_id=doc_id, document_path=document_path)
+        for position in self._positions():
+            example = self._example(position)
+            if self._should_skip(example.doc_id):
+                continue
+            yield example
+
+    def __len__(self) -> int:
+        return len(self._positions())
+
+    @overload
+    def __getitem__(self, key: Union[int, str]) -> DocumentExample: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> DocVQADataset: ...
+
+    def __getitem__(
+        self, key: Union[int, str, slice]
+    ) -> Union[DocumentExample, DocVQADataset]:
+        if isinstance(key, str):
+            return self._example(self._position_of(key))
+        positions = self._positions()
+        if isinstance(key, slice):
+            view = DocVQADataset(self.root, skip_ids=self.skip_ids)
+            view._index = self._index
+            view._files = self._files
+            view._file_positions = self._file_positions
+            view._selection = positions[key]
+            return view
+        return self._example(positions[key])
+
+    def _positions(self) -> Sequence[int]:
+        if self._selection is not None:
+            return self._selection
+        positions = self._shard_positions()[self.start :]
+        if self.limit is not None:
+            positions = positions[: self.limit]
+        return positions
+
+    def _shard_positions(self) -> Sequence[int]:
+        if self._shard is None:
+            total = self._total()
+            if self.shard_count == 1:
+                self._shard = range(total)
+            elif self.shard_strategy == ShardStrategy.RANGE:
+                self._shard = shard_range(total, self.shard_index, self.shard_count)
+            else:
+                self._shard = array(
+                    "q",
+                    (
+                        position
+                        for position, doc_id in enumerate(self._doc_ids())
+                        if shard_of(doc_id, self.shard_count) == self.shard_index
+                    ),
+                )
+        return self._shard
+
+    def _total(self) -> int:
+        index = self._manifest_index()
+        if index is not None:
+            return len(index)
+        return len(self._directory_files())
+
+    def _example(self, position: int) -> DocumentExample:
+        index = self._manifest_index()
+        if index is not None:
+            sample = index.record(position)
+            return DocumentExample(
+                doc_id=record_doc_id(sample),
+                document_path=self.root / sample["document_path"],
+                questions=sample.get("questions"),
+                metadata=sample.get("metadata"),
+            )
+        document_path = self._directory_files()[position]
+        return DocumentExample(doc_id=document_path.stem, document_path=document_path)
+
+    def _doc_ids(self) -> List[str]:
+        index = self._manifest_index()
+        if index is not None:
+            return index.doc_ids()
+        return [path.stem for path in self._directory_files()]
+
+    def _position_of(self, doc_id: str) -> int:
+        index = self._manifest_index()
+        if index is not None:
+            return index.position(doc_id)
+        if self._file_positions is None:
+            self._file_positions = {
+                path.stem: position for position, path in enumerate(self._directory_files())
+            }
+        return self._file_positions[doc_id]
+
+    def _manifest_index(self) -> Optional[ManifestIndex]:
+        if self._index is None and self._files is None:
+            if not self.root.exists():
+                msg = f"Dataset path does not exist: {self.root}"
+                raise FileNotFoundError(msg)
+            manifest_path = self.root / DEFAULT_MANIFEST
+            if manifest_path.exists():
+                self._index = ManifestIndex(manifest_path)
+        return self._index
+
+    def _directory_files(self) -> List[Path]:
+        if self._files is None:
+            supported_suffixes = {".pdf", ".png", ".jpg", ".jpeg", ".tiff"}
+            self._files = sorted(
+                path for path in self.root.iterdir() if path.suffix.lower() in supported_suffixes
+            )
+        return self._files
+
+    def _should_skip(self, doc_id: str) -> bool:
+        if self.skip_ids is None or doc_id not in self.skip_ids:
+            return False
+        self.skipped += 1
+        return True
 
 
 __all__ = ["DocVQADataset", "DocumentExample", "DEFAULT_MANIFEST"]
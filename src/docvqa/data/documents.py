@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+"""Document text loading: plain text, PDF text layers and OCR, with a page-text cache."""
+
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docvqa.config.models import DocumentsConfig, LLMConfig
+from docvqa.extractors.base import ExtractionError
+from docvqa.utils import codec
+from docvqa.utils.hashing import file_digest
+from docvqa.utils.logging import get_logger
+from docvqa.utils.ratelimit import estimate_tokens
+
+try:  # pragma: no cover - optional dependency
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+try:  # pragma: no cover - optional dependency
+    import pytesseract
+    from PIL import Image, ImageSequence
+except ImportError:  # pragma: no cover - optional dependency
+    pytesseract = None
+    Image = None
+    ImageSequence = None
+
+TEXT_SUFFIXES = frozenset({".txt", ".md", ".csv", ".json"})
+PDF_SUFFIXES = frozenset({".pdf"})
+IMAGE_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".tif", ".tiff"})
+
+# Tokens reserved for the instructions, questions and metadata around the document text.
+PROMPT_OVERHEAD_TOKENS = 1024
+
+
+class DocumentLoadError(ExtractionError):
+    """Raised when the text of a document cannot be obtained."""
+
+
+class OCRBackend(ABC):
+    """Local OCR engine turning an image file into per-page text."""
+
+    name: str = "ocr"
+
+    @abstractmethod
+    def recognize(self, path: Path) -> List[str]:
+        """Return the text of every page (frame) of the image at ``path``."""
+
+
+class TesseractOCR(OCRBackend):
+    """OCR through a local Tesseract install via ``pytesseract``."""
+
+    name = "tesseract"
+
+    def __init__(self, languages: str = "eng") -> None:
+        if pytesseract is None:
+            msg = (
+                "pytesseract and Pillow are required for Tesseract OCR. Install the 'ocr' "
+                "extra: pip install docvqa[ocr]."
+            )
+            raise ImportError(msg)
+        self._languages = languages
+
+    def recognize(self, path: Path) -> List[str]:
+        with Image.open(path) as image:
+            return [
+                pytesseract.image_to_string(frame, lang=self._languages)
+                for frame in ImageSequence.Iterator(image)
+            ]
+
+
+class PageTextCache:
+    """Extracted page text stored as one JSON file per document under ``directory``.
+
+    Keys combine the document's content hash with the extraction method, so renamed or copied
+    files hit the cache and changing the OCR engine does not return stale text.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._logger = get_logger(__name__)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        try:
+            with self._path(key).open("r", encoding="utf-8") as handle:
+                return codec.loads(handle.read())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, pages: List[str]) -> None:
+        """Store ``pages`` under ``key``; failures are logged, since the text is already known."""
+
+        path = self._path(key)
+        temporary: Optional[str] = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+            ) as handle:
+                temporary = handle.name
+                handle.write(codec.dumpb(pages))
+            os.replace(temporary, path)
+        except OSError as exc:
+            self._logger.warning("page_text_cache_write_failed", key=key, error=str(exc))
+            if temporary is not None:
+                Path(temporary).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self._directory / key[:2] / f"{key}.json"
+
+
+class DocumentLoader:
+    """Reads the text of dataset documents for inclusion in prompts.
+
+    Text files are read directly, PDFs through their text layer (``pypdf``) and images through
+    the configured :class:`OCRBackend`. Per-page text is cached by file hash. :meth:`load_text`
+    renders the pages and truncates them, whole pages first, to ``max_tokens``; for images
+    without an OCR backend and unsupported file types it returns ``None``, and the prompt
+    carries only the document path.
+    """
+
+    def __init__(
+        self,
+        *,
+        ocr: Optional[OCRBackend] = None,
+        cache: Optional[PageTextCache] = None,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        self._ocr = ocr
+        self._cache = cache
+        self._max_tokens = max_tokens
+
+    @classmethod
+    def from_config(cls, config: DocumentsConfig, llm: LLMConfig) -> DocumentLoader:
+        ocr = TesseractOCR(config.ocr_languages) if config.ocr_backend == "tesseract" else None
+        # A batched prompt shares the context window between ``batch_documents`` documents.
+        documents = llm.batch_documents
+        budget = llm.context_tokens - llm.max_output_tokens * documents - PROMPT_OVERHEAD_TOKENS
+        budget //= documents
+        if config.max_document_tokens is not None:
+            budget = min(budget, config.max_document_tokens)
+        return cls(ocr=ocr, cache=PageTextCache(config.cache_dir), max_tokens=max(1, budget))
+
+    def fingerprint(self) -> Dict[str, object]:
+        """Settings that change the text produced for a given document."""
+
+        return {"ocr": self._ocr.name if self._ocr else None, "max_tokens": self._max_tokens}
+
+    def text_source(self, path: Path) -> Optional[str]:
+        """Extraction method for ``path``, or ``None`` when nothing can read its file type."""
+
+        suffix = path.suffix.lower()
+        if suffix in TEXT_SUFFIXES:
+            return "text"
+        if suffix in PDF_SUFFIXES:
+            return "pdf"
+        if suffix in IMAGE_SUFFIXES and self._ocr is not None:
+            return f"ocr:{self._ocr.name}"
+        return None
+
+    def load_pages(self, path: Path) -> List[str]:
+        method = self.text_source(path)
+        if method is None:
+            if path.suffix.lower() in IMAGE_SUFFIXES:
+                msg = f"No OCR backend configured to read image document {path.name}"
+            else:
+                msg = f"Unsupported document type: {path.suffix or path.name}"
+            raise DocumentLoadError(msg)
+
+        try:
+            digest = file_digest(path)
+        except OSError as exc:
+            msg = f"Cannot read document {path}: {exc}"
+            raise DocumentLoadError(msg) from exc
+        key = hashlib.sha256(f"{digest}:{method}".encode()).hexdigest()
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        pages = self._extract_pages(path, method)
+        if self._cache is not None:
+            self._cache.put(key, pages)
+        return pages
+
+    def load_text(self, path: Path) -> Optional[str]:
+        """Prompt-ready text of ``path``, or ``None`` if no text source handles its type."""
+
+        if self.text_source(path) is None:
+            return None
+        text, _ = fit_pages(self.load_pages(path), self._max_tokens)
+        return text
+
+    def _extract_pages(self, path: Path, method: str) -> List[str]:
+        if method == "pdf" and PdfReader is None:
+            msg = (
+                f"Cannot read PDF document {path.name}: pypdf is not installed. Install the "
+                "'pdf' extra: pip install docvqa[pdf]."
+            )
+            raise DocumentLoadError(msg)
+        try:
+            if method == "text":
+                return [path.read_text(encoding="utf-8", errors="replace")]
+            if method == "pdf":
+                return [page.extract_text() or "" for page in PdfReader(str(path)).pages]
+            return self._ocr.recognize(path)
+        except Exception as exc:
+            msg = f"Failed to extract text from {path.name}: {exc}"
+            raise DocumentLoadError(msg) from exc
+
+
+def fit_pages(pages: List[str], max_tokens: Optional[int]) -> Tuple[str, int]:
+    """Render ``pages`` within ``max_tokens``; return the text and the number of pages cut.
+
+    Whole pages are kept while they fit; the first page that does not fit is cut short and a
+    marker tells the model how much was left out.
+    """
+
+    if len(pages) == 1:
+        rendered = [pages[0].strip()]
+    else:
+        rendered = [
+            f"--- Page {number} ---\n{page.strip()}" for number, page in enumerate(pages, 1)
+        ]
+    text = "\n\n".join(rendered)
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text, 0
+
+    budget_chars = max_tokens * 4
+    kept: List[str] = []
+    used = 0
+    complete = 0
+    for page in rendered:
+        if used + len(page) > budget_chars:
+            if budget_chars > used:
+                kept.append(page[: budget_chars - used])
+            break
+        kept.append(page)
+        used += len(page) + 2
+        complete += 1
+    omitted = len(rendered) - complete
+    kept.append(f"[... truncated: {omitted} of {len(rendered)} pages not fully included ...]")
+    return "\n\n".join(kept), omitted
+
+
+__all__ = [
+    "DocumentLoadError",
+    "DocumentLoader",
+    "OCRBackend",
+    "PageTextCache",
+    "TesseractOCR",
+    "fit_pages",
+]
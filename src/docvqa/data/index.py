@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+"""Sidecar byte-offset index for random access into ``manifest.jsonl``."""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from docvqa.utils import codec
+
+INDEX_SUFFIX = ".idx"
+IDS_SUFFIX = ".ids"
+
+_MAGIC = b"DVQAIDX1"
+_HEADER = struct.Struct("<8sQQQ")
+
+
+def record_doc_id(record: Dict[str, object]) -> str:
+    """Return the doc_id of a manifest record, falling back to the document file stem."""
+
+    return str(record.get("id") or Path(str(record["document_path"])).stem)
+
+
+class ManifestIndex:
+    """Byte offsets of every record in a JSONL manifest, persisted next to it.
+
+    ``<manifest>.idx`` holds a small header (manifest size, mtime and record count) followed by
+    one little-endian ``uint64`` start offset per record; ``<manifest>.ids`` holds the matching
+    doc ids, one JSON string per line. Both are rebuilt whenever the manifest's size or mtime
+    no longer match the header. The manifest and offsets are memory-mapped so fetching record
+    ``i`` is a slice of the mapping rather than a scan. If the sidecars cannot be written (for
+    example on a read-only dataset) the index is kept in memory for the process lifetime.
+    """
+
+    def __init__(self, manifest_path: Path) -> None:
+        self._manifest_path = manifest_path
+        self._index_path = manifest_path.with_name(manifest_path.name + INDEX_SUFFIX)
+        self._ids_path = manifest_path.with_name(manifest_path.name + IDS_SUFFIX)
+        self._manifest_map: Optional[mmap.mmap] = None
+        self._offsets: Sequence[int] = array("Q")
+        self._index_map: Optional[mmap.mmap] = None
+        self._positions: Optional[Dict[str, int]] = None
+        self._ids: Optional[List[str]] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def record(self, position: int) -> Dict[str, object]:
+        """Parse and return the manifest record at ``position``."""
+
+        start = self._offsets[position]
+        if position + 1 < len(self._offsets):
+            end = self._offsets[position + 1]
+        else:
+            end = len(self._manifest_map)
+        return codec.loads(self._manifest_map[start:end])
+
+    def position(self, doc_id: str) -> int:
+        """Return the position of ``doc_id``; raises ``KeyError`` if it is not in the manifest."""
+
+        if self._positions is None:
+            self._positions = {doc_id: index for index, doc_id in enumerate(self.doc_ids())}
+        return self._positions[doc_id]
+
+    def close(self) -> None:
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+            self._offsets = array("Q")
+        for mapped in (self._index_map, self._manifest_map):
+            if mapped is not None:
+                mapped.close()
+        self._index_map = None
+        self._manifest_map = None
+
+    def _load(self) -> None:
+        stat = self._manifest_path.stat()
+        self._manifest_map = _map_file(self._manifest_path)
+        if not self._load_sidecar(stat):
+            offsets, ids = self._scan()
+            self._offsets = offsets
+            self._ids = ids
+            self._write_sidecar(stat, offsets, ids)
+
+    def _load_sidecar(self, stat: os.stat_result) -> bool:
+        if not self._index_path.exists() or not self._ids_path.exists():
+            return False
+        index_map = _map_file(self._index_path)
+        if index_map is None or len(index_map) < _HEADER.size:
+            return False
+        magic, size, mtime_ns, count = _HEADER.unpack_from(index_map)
+        expected = _HEADER.size + count * 8
+        if (
+            magic != _MAGIC
+            or size != stat.st_size
+            or mtime_ns != stat.st_mtime_ns
+            or len(index_map) != expected
+        ):
+            index_map.close()
+            return False
+        self._index_map = index_map
+        self._offsets = memoryview(index_map)[_HEADER.size :].cast("Q")
+        return True
+
+    def _scan(self) -> Tuple[array, List[str]]:
+        offsets = array("Q")
+        ids: List[str] = []
+        for start, line in _iter_lines(self._manifest_map):
+            if not line.strip():
+                continue
+            offsets.append(start)
+            ids.append(record_doc_id(codec.loads(line)))
+        return offsets, ids
+
+    def _write_sidecar(self, stat: os.stat_result, offsets: array, ids: List[str]) -> None:
+        if offsets.itemsize != 8:  # pragma: no cover - exotic platforms
+            return
+        header = _HEADER.pack(_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets))
+        try:
+            _atomic_write(self._ids_path, "".join(json.dumps(i) + "\n" for i in ids).encode())
+            _atomic_write(self._index_path, header + offsets.tobytes())
+        except OSError:
+            return
+
+    def doc_ids(self) -> List[str]:
+        """Doc ids of every record, in manifest order, without parsing the manifest."""
+
+        if self._ids is None:
+            with self._ids_path.open("r", encoding="utf-8") as handle:
+                self._ids = [json.loads(line) for line in handle]
+        return self._ids
+
+
+def _map_file(path: Path) -> Optional[mmap.mmap]:
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _iter_lines(data: Optional[mmap.mmap]) -> Iterator[Tuple[int, bytes]]:
+    if data is None:
+        return
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", start)
+        if end == -1:
+            end = size
+        yield start, data[start:end]
+        start = end + 1
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_bytes(payload)
+    os.replace(temporary, path)
+
+
+__all__ = ["ManifestIndex", "record_doc_id"]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+"""Deterministic assignment of dataset documents to shards."""
+
+import hashlib
+
+
+def shard_of(doc_id: str, shard_count: int) -> int:
+    """Return the shard owning ``doc_id`` under hash sharding.
+
+    Uses BLAKE2b rather than :func:`hash` so the assignment is identical across processes,
+    machines and Python versions.
+    """
+
+    digest = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def shard_range(total: int, shard_index: int, shard_count: int) -> range:
+    """Return the contiguous positions owned by ``shard_index`` out of ``total`` documents."""
+
+    return range(total * shard_index // shard_count, total * (shard_index + 1) // shard_count)
+
+
+def shard_partition(shard_index: int, shard_count: int) -> str:
+    """Name of the storage partition written by one shard, e.g. ``shard-00002-of-00008``."""
+
+    return f"shard-{shard_index:05d}-of-{shard_count:05d}"
+
+
+__all__ = ["shard_of", "shard_partition", "shard_range"]
@@ -3,10 +3,26 @@ from __future__ import annotations
 """Helpers for loading ExtractionResult payloads from JSONL artifacts."""
 
 import json
+from concurrent.futures import ProcessPoolExecutor
+from json.decoder import WHITESPACE, scanstring
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Collection, Dict, Iterator, List, Mapping, Optional
 
+from docvqa.evaluation.metrics import (
+    METRIC_COLUMNS,
+    EvaluationReport,
+    MetricsAccumulator,
+    compare_accumulators,
+)
 from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.utils import codec
+
+EVALUATION_FIELDS = ("doc_id", "content")
+
+# Below this many bytes of input, starting worker processes costs more than it saves.
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+_DECODER = json.JSONDecoder()
 
 
 def load_results(path: Path) -> List[ExtractionResult]:
@@ -21,9 +37,118 @@ def load_results(path: Path) -> List[ExtractionResult]:
         for line in handle:
             if not line.strip():
                 continue
-            payload: Dict[str, object] = json.loads(line)
-            results.append(ExtractionResult.model_validate(payload))
+            results.append(codec.load_model(ExtractionResult, line))
     return results
 
 
-__all__ = ["load_results"]
+def iter_result_fields(
+    path: Path, fields: Collection[str] = EVALUATION_FIELDS
+) -> Iterator[Dict[str, Any]]:
+    """Yield only ``fields`` of every record in a results JSONL file, without validation.
+
+    Each line is decoded key by key and decoding stops as soon as all requested fields have
+    been seen. The pipeline writes ``raw_response`` last, so for evaluation the (usually
+    largest) blob is never parsed.
+    """
+
+    if not path.exists():
+        msg = f"Results file not found: {path}"
+        raise FileNotFoundError(msg)
+
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            yield _decode_fields(line, fields)
+
+
+def accumulate_results(provider: str, path: Path) -> MetricsAccumulator:
+    """Summarize one results file in a single streaming pass.
+
+    ``path`` is either a JSONL file or a Parquet run (a directory of part files or a single
+    ``.parquet`` file), which is summarized from its count columns batch by batch.
+    """
+
+    if path.is_dir() or path.suffix == ".parquet":
+        return _accumulate_parquet(provider, path)
+    accumulator = MetricsAccumulator(provider)
+    for record in iter_result_fields(path):
+        accumulator.add(record["doc_id"], record.get("content") or {})
+    return accumulator
+
+
+def evaluate_result_files(
+    runs: Mapping[str, Path], *, max_workers: Optional[int] = None
+) -> EvaluationReport:
+    """Compare several results files, reading them in parallel worker processes.
+
+    Without an explicit ``max_workers``, runs that are files totalling less than
+    :data:`PARALLEL_MIN_BYTES` are read in this process instead.
+    """
+
+    if max_workers is None and all(path.is_file() for path in runs.values()):
+        if sum(path.stat().st_size for path in runs.values()) < PARALLEL_MIN_BYTES:
+            max_workers = 1
+    if len(runs) <= 1 or max_workers == 1:
+        return compare_accumulators(
+            accumulate_results(provider, path) for provider, path in runs.items()
+        )
+    with ProcessPoolExecutor(max_workers=max_workers or len(runs)) as executor:
+        futures = [
+            executor.submit(accumulate_results, provider, path) for provider, path in runs.items()
+        ]
+        return compare_accumulators(future.result() for future in futures)
+
+
+def _accumulate_parquet(provider: str, path: Path) -> MetricsAccumulator:
+    # Imported here so evaluating JSONL runs never loads pyarrow or the storage backends.
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        msg = "pyarrow is required to evaluate Parquet runs. Install the 'parquet' extra."
+        raise ImportError(msg) from exc
+    from docvqa.storage import parquet as parquet_storage
+
+    accumulator = MetricsAccumulator(provider)
+    for part in parquet_storage.list_parts(path):
+        for batch in pq.ParquetFile(part).iter_batches(columns=list(METRIC_COLUMNS)):
+            accumulator.add_columns(batch)
+    return accumulator
+
+
+def _decode_fields(line: str, fields: Collection[str]) -> Dict[str, Any]:
+    index = WHITESPACE.match(line, 0).end()
+    if line[index : index + 1] != "{":
+        return _select(codec.loads(line), fields)
+    index += 1
+    found: Dict[str, Any] = {}
+    while len(found) < len(fields):
+        index = WHITESPACE.match(line, index).end()
+        if line[index : index + 1] != '"':
+            break
+        key, index = scanstring(line, index + 1)
+        index = WHITESPACE.match(line, index).end()
+        if line[index : index + 1] != ":":
+            return _select(codec.loads(line), fields)
+        index = WHITESPACE.match(line, index + 1).end()
+        value, index = _DECODER.raw_decode(line, index)
+        if key in fields:
+            found[key] = value
+        index = WHITESPACE.match(line, index).end()
+        if line[index : index + 1] != ",":
+            break
+        index += 1
+    return found
+
+
+def _select(payload: Dict[str, Any], fields: Collection[str]) -> Dict[str, Any]:
+    return {key: payload[key] for key in fields if key in payload}
+
+
+__all__ = [
+    "PARALLEL_MIN_BYTES",
+    "accumulate_results",
+    "evaluate_result_files",
+    "iter_result_fields",
+    "load_results",
+]
@@ -2,13 +2,22 @@ from __future__ import annotations
 
 """Simple evaluation metrics for comparing extraction outputs across providers."""
 
-from statistics import mean
-from typing import Dict, List, Mapping, Optional, Sequence
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set
 
 from pydantic import BaseModel, Field
 
 from docvqa.pipeline.schemas import ExtractionResult
 
+# Columns of a Parquet results file that the vectorized metrics path reads.
+METRIC_COLUMNS = (
+    "doc_id",
+    "field_count",
+    "answer_count",
+    "table_count",
+    "summary_word_count",
+)
+
 
 class ProviderMetrics(BaseModel):
     """Aggregate metrics for a single extractor provider."""
@@ -35,61 +44,143 @@ class EvaluationReport(BaseModel):
     provider_document_counts: Dict[str, int]
 
 
-def _safe_mean(values: Sequence[float]) -> float:
-    return float(mean(values)) if values else 0.0
-
-
 def _word_count(text: Optional[str]) -> int:
     if not text:
         return 0
     return len(text.split())
 
 
-def compute_provider_metrics(provider: str, results: Sequence[ExtractionResult]) -> ProviderMetrics:
-    documents = len(results)
-    if documents == 0:
-        return ProviderMetrics(provider=provider, documents=0)
+@dataclass(frozen=True)
+class ContentCounts:
+    """Per-document quantities the provider metrics are averaged from."""
+
+    fields: int
+    answers: int
+    tables: int
+    summary_words: int
+
+    @classmethod
+    def from_content(cls, content: Mapping[str, Any]) -> ContentCounts:
+        return cls(
+            fields=len(content.get("fields") or []),
+            answers=len(content.get("answers") or []),
+            tables=len(content.get("tables") or []),
+            summary_words=_word_count(content.get("summary") or ""),
+        )
+
+
+class MetricsAccumulator:
+    """Running totals behind :class:`ProviderMetrics`, updated one result at a time.
+
+    Only counters and the set of seen doc ids are kept, so a run of any size is summarized in a
+    single pass without holding its results. Accumulators are picklable and can be combined
+    with :meth:`merge`, which lets runs be summarized in parallel processes.
+    """
+
+    def __init__(self, provider: str) -> None:
+        self.provider = provider
+        self.documents = 0
+        self.doc_ids: Set[str] = set()
+        self._fields = 0
+        self._answers = 0
+        self._tables = 0
+        self._summary_words = 0
+        self._empty_summaries = 0
+
+    def add(self, doc_id: str, content: Mapping[str, Any]) -> None:
+        counts = ContentCounts.from_content(content)
+        self.documents += 1
+        self.doc_ids.add(doc_id)
+        self._fields += counts.fields
+        self._answers += counts.answers
+        self._tables += counts.tables
+        self._summary_words += counts.summary_words
+        if counts.summary_words == 0:
+            self._empty_summaries += 1
+
+    def add_columns(self, batch: Any) -> None:
+        """Add a pyarrow table or record batch holding :data:`METRIC_COLUMNS` in one step."""
+
+        pc = _pyarrow_compute()
+        self.documents += batch.num_rows
+        self.doc_ids.update(batch.column("doc_id").to_pylist())
+        self._fields += pc.sum(batch.column("field_count")).as_py() or 0
+        self._answers += pc.sum(batch.column("answer_count")).as_py() or 0
+        self._tables += pc.sum(batch.column("table_count")).as_py() or 0
+        words = batch.column("summary_word_count")
+        self._summary_words += pc.sum(words).as_py() or 0
+        self._empty_summaries += pc.sum(pc.equal(words, 0)).as_py() or 0
+
+    def merge(self, other: MetricsAccumulator) -> None:
+        self.documents += other.documents
+        self.doc_ids |= other.doc_ids
+        self._fields += other._fields
+        self._answers += other._answers
+        self._tables += other._tables
+        self._summary_words += other._summary_words
+        self._empty_summaries += other._empty_summaries
+
+    def metrics(self) -> ProviderMetrics:
+        documents = self.documents
+        if documents == 0:
+            return ProviderMetrics(provider=self.provider, documents=0)
+        return ProviderMetrics(
+            provider=self.provider,
+            documents=documents,
+            avg_field_count=self._fields / documents,
+            avg_answer_count=self._answers / documents,
+            avg_table_count=self._tables / documents,
+            avg_summary_word_count=self._summary_words / documents,
+            empty_summary_rate=self._empty_summaries / documents,
+        )
+
+
+def _pyarrow_compute() -> Any:
+    # Imported on first use: pyarrow only serves Parquet runs and takes ~100 ms to import.
+    try:
+        import pyarrow.compute as pc
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        msg = "pyarrow is required for columnar metrics. Install the 'parquet' extra."
+        raise ImportError(msg) from exc
+    return pc
 
-    field_counts: List[int] = []
-    answer_counts: List[int] = []
-    table_counts: List[int] = []
-    summary_word_counts: List[int] = []
-    empty_summary = 0
 
+def compute_provider_metrics(provider: str, results: Sequence[ExtractionResult]) -> ProviderMetrics:
+    accumulator = MetricsAccumulator(provider)
     for result in results:
-        content = result.content
-        fields = content.get("fields") or []
-        answers = content.get("answers") or []
-        tables = content.get("tables") or []
-        summary = content.get("summary") or ""
-
-        field_counts.append(len(fields))
-        answer_counts.append(len(answers))
-        table_counts.append(len(tables))
-        summary_word_counts.append(_word_count(summary))
-        if not summary.strip():
-            empty_summary += 1
-
-    return ProviderMetrics(
-        provider=provider,
-        documents=documents,
-        avg_field_count=_safe_mean(field_counts),
-        avg_answer_count=_safe_mean(answer_counts),
-        avg_table_count=_safe_mean(table_counts),
-        avg_summary_word_count=_safe_mean(summary_word_counts),
-        empty_summary_rate=empty_summary / documents,
-    )
+        accumulator.add(result.doc_id, result.content)
+    return accumulator.metrics()
+
+
+def compute_provider_metrics_from_table(provider: str, table: Any) -> ProviderMetrics:
+    """Vectorized :func:`compute_provider_metrics` over a pyarrow table of a Parquet run."""
+
+    accumulator = MetricsAccumulator(provider)
+    accumulator.add_columns(table)
+    return accumulator.metrics()
 
 
 def compare_runs(runs: Mapping[str, Sequence[ExtractionResult]]) -> EvaluationReport:
     """Compute aggregate metrics for multiple extractor runs."""
 
+    accumulators = []
+    for provider, results in runs.items():
+        accumulator = MetricsAccumulator(provider)
+        for result in results:
+            accumulator.add(result.doc_id, result.content)
+        accumulators.append(accumulator)
+    return compare_accumulators(accumulators)
+
+
+def compare_accumulators(accumulators: Iterable[MetricsAccumulator]) -> EvaluationReport:
+    """Build the comparison report from per-run accumulators."""
+
     provider_metrics: List[ProviderMetrics] = []
-    document_sets: Dict[str, set[str]] = {}
+    document_sets: Dict[str, Set[str]] = {}
 
-    for provider, results in runs.items():
-        provider_metrics.append(compute_provider_metrics(provider, results))
-        document_sets[provider] = {result.doc_id for result in results}
+    for accumulator in accumulators:
+        provider_metrics.append(accumulator.metrics())
+        document_sets[accumulator.provider] = accumulator.doc_ids
 
     if document_sets:
         union_documents = len(set().union(*document_sets.values()))
@@ -110,4 +201,14 @@ def compare_runs(runs: Mapping[str, Sequence[ExtractionResult]]) -> EvaluationRe
     )
 
 
-__all__ = ["ProviderMetrics", "EvaluationReport", "compare_runs", "compute_provider_metrics"]
+__all__ = [
+    "ContentCounts",
+    "EvaluationReport",
+    "METRIC_COLUMNS",
+    "MetricsAccumulator",
+    "ProviderMetrics",
+    "compare_accumulators",
+    "compare_runs",
+    "compute_provider_metrics",
+    "compute_provider_metrics_from_table",
+]
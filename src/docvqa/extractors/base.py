@@ -2,33 +2,212 @@ from __future__ import annotations
 
 """Abstract base classes for extraction backends."""
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
 from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.cache import ResultCache
 from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.utils.hashing import file_digest
+from docvqa.utils.metrics import get_metrics
 
 
 class ExtractionError(RuntimeError):
     """Raised when an extractor fails to process a document."""
 
 
+class TransientExtractionError(ExtractionError):
+    """Raised for failures that may succeed on retry, such as throttling, 5xx or timeouts."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+ExtractionOutcome = Union[ExtractionResult, ExtractionError]
+
+
 class BaseExtractor(ABC):
     """Interface implemented by all extractors."""
 
+    name: str = "extractor"
+    _cache: Optional[ResultCache] = None
+    _cache_refresh: bool = False
+
+    @property
+    def batch_size(self) -> int:
+        """Number of documents :meth:`extract_many` handles in one provider call."""
+
+        return 1
+
     @abstractmethod
     def extract(self, request: ExtractionRequest) -> ExtractionResult:
         """Perform extraction for a document and return structured results."""
 
-    def from_example(self, example: DocumentExample) -> ExtractionResult:
-        """Helper to convert dataset examples into extractor requests."""
+    def extract_many(self, requests: Sequence[ExtractionRequest]) -> List[ExtractionOutcome]:
+        """Extract several documents, returning a result or the error for each, in order.
+
+        The default extracts one document at a time. Extractors with a batched call override
+        this; they may raise :class:`TransientExtractionError` when the shared call should be
+        retried as a whole.
+        """
+
+        outcomes: List[ExtractionOutcome] = []
+        for request in requests:
+            try:
+                outcomes.append(self.extract(request))
+            except ExtractionError as exc:
+                outcomes.append(exc)
+        return outcomes
+
+    async def extract_async(self, request: ExtractionRequest) -> ExtractionResult:
+        """Asynchronous extraction used by the asyncio engine.
+
+        The default runs :meth:`extract` in a worker thread; extractors with a native async
+        client override this to avoid occupying a thread per request.
+        """
+
+        return await asyncio.to_thread(self.extract, request)
+
+    def fetch(self, request: ExtractionRequest) -> Any:
+        """Network phase of :meth:`extract`, returning a picklable payload for :meth:`parse`.
+
+        Extractors whose response handling is CPU-heavy split :meth:`extract` into ``fetch``
+        and ``parse`` so the processes engine can run the parse in worker processes. The
+        default performs the whole extraction here.
+        """
+
+        return self.extract(request)
+
+    def parse(self, request: ExtractionRequest, payload: Any) -> ExtractionResult:
+        """CPU phase of :meth:`extract`: turn a :meth:`fetch` payload into a result.
+
+        Must not rely on network clients, since it may run on an extractor rebuilt in another
+        process.
+        """
+
+        return payload
 
-        request = ExtractionRequest(
+    async def aclose(self) -> None:  # noqa: B027 - optional hook, most extractors hold no loop state
+        """Release resources bound to the event loop used by :meth:`extract_async`.
+
+        The default does nothing, for extractors that keep no loop-bound clients.
+        """
+
+        return None
+
+    def cache_fingerprint(self, request: ExtractionRequest) -> Optional[Dict[str, Any]]:
+        """Describe every non-document input that shapes the result for ``request``.
+
+        Together with the document bytes this forms the result cache key. Returning ``None``
+        (the default) marks the extractor as uncacheable.
+        """
+
+        return None
+
+    def use_cache(self, cache: Optional[ResultCache], *, refresh: bool = False) -> None:
+        """Consult ``cache`` before extracting; with ``refresh`` only repopulate it."""
+
+        self._cache = cache
+        self._cache_refresh = refresh
+
+    def from_example(
+        self,
+        example: DocumentExample,
+        *,
+        parse: Optional[Callable[[ExtractionRequest, Any], ExtractionResult]] = None,
+    ) -> ExtractionResult:
+        """Helper to convert dataset examples into extractor requests.
+
+        With ``parse`` the extraction runs as :meth:`fetch` followed by ``parse`` (typically
+        :meth:`parse` on a worker process) instead of :meth:`extract`.
+        """
+
+        request = self.build_request(example)
+        cache_key = self._cache_key(request)
+        cached = self._cache_lookup(cache_key, request)
+        if cached is not None:
+            return cached
+        if parse is not None:
+            result = parse(request, self.fetch(request))
+        else:
+            result = self.extract(request)
+        if cache_key is not None:
+            self._cache.put(cache_key, result)
+        return result
+
+    def from_examples(self, examples: Sequence[DocumentExample]) -> List[ExtractionOutcome]:
+        """Batched counterpart of :meth:`from_example`; cache hits never reach the provider."""
+
+        requests = [self.build_request(example) for example in examples]
+        cache_keys = [self._cache_key(request) for request in requests]
+        outcomes: List[Optional[ExtractionOutcome]] = [
+            self._cache_lookup(cache_key, request)
+            for cache_key, request in zip(cache_keys, requests)
+        ]
+        misses = [index for index, outcome in enumerate(outcomes) if outcome is None]
+        if misses:
+            fresh = self.extract_many([requests[index] for index in misses])
+            for index, outcome in zip(misses, fresh):
+                outcomes[index] = outcome
+                if cache_keys[index] is not None and isinstance(outcome, ExtractionResult):
+                    self._cache.put(cache_keys[index], outcome)
+        return outcomes
+
+    async def from_example_async(self, example: DocumentExample) -> ExtractionResult:
+        """Asynchronous counterpart of :meth:`from_example`."""
+
+        request = self.build_request(example)
+        cache_key = await asyncio.to_thread(self._cache_key, request)
+        cached = self._cache_lookup(cache_key, request)
+        if cached is not None:
+            return cached
+        result = await self.extract_async(request)
+        if cache_key is not None:
+            self._cache.put(cache_key, result)
+        return result
+
+    @staticmethod
+    def build_request(example: DocumentExample) -> ExtractionRequest:
+        """Extractor request for a dataset example; document text is loaded later, if at all."""
+
+        return ExtractionRequest(
             doc_id=example.doc_id,
             document_path=example.document_path,
             questions=example.questions,
             metadata=example.metadata or {},
         )
-        return self.extract(request)
+
+    def _cache_key(self, request: ExtractionRequest) -> Optional[str]:
+        if self._cache is None:
+            return None
+        fingerprint = self.cache_fingerprint(request)
+        if fingerprint is None:
+            return None
+        try:
+            document_digest = file_digest(request.document_path)
+        except OSError:
+            return None
+        return ResultCache.make_key(document_digest, fingerprint)
+
+    def _cache_lookup(
+        self, cache_key: Optional[str], request: ExtractionRequest
+    ) -> Optional[ExtractionResult]:
+        if cache_key is None or self._cache_refresh:
+            return None
+        cached = self._cache.get(cache_key)
+        get_metrics().cache.inc(provider=self.name, result="miss" if cached is None else "hit")
+        if cached is None:
+            return None
+        return cached.model_copy(update={"doc_id": request.doc_id})
 
 
-__all__ = ["BaseExtractor", "ExtractionError"]
+__all__ = ["BaseExtractor", "ExtractionError", "ExtractionOutcome", "TransientExtractionError"]
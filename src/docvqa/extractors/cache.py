@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+"""Persistent, content-addressed cache of extraction results."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.utils import codec
+
+CACHE_FILENAME = "results.sqlite3"
+
+
+class ResultCache:
+    """SQLite-backed cache of extraction results with size-based LRU eviction.
+
+    Keys are derived from the document bytes and an extractor fingerprint (prompt, model,
+    temperature, provider), so unchanged work is skipped across runs while any input change
+    produces a miss. When the stored payloads exceed ``max_bytes`` the least recently used
+    entries are evicted down to 90% of the limit.
+    """
+
+    def __init__(self, directory: Path, *, max_bytes: int) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(directory / CACHE_FILENAME), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, "
+            "accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self._total_bytes = int(total)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(document_digest: str, fingerprint: Mapping[str, Any]) -> str:
+        """Combine a document digest and extractor fingerprint into a cache key."""
+
+        digest = hashlib.sha256(document_digest.encode("utf-8"))
+        digest.update(json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[ExtractionResult]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        return codec.load_model(ExtractionResult, row[0])
+
+    def put(self, key: str, result: ExtractionResult) -> None:
+        payload = codec.dump_model(result).encode("utf-8")
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, payload, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self._total_bytes += len(payload) - (previous[0] if previous else 0)
+            if self._total_bytes > self._max_bytes:
+                self._evict(int(self._max_bytes * 0.9))
+
+    @property
+    def size_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, target_bytes: int) -> None:
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed")
+        evicted = []
+        for key, size in cursor:
+            if self._total_bytes <= target_bytes:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        cursor.close()
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+
+__all__ = ["ResultCache"]
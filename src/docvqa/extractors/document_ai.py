@@ -3,21 +3,39 @@ from __future__ import annotations
 """Extractor that delegates to Google Document AI or similar services."""
 
 import mimetypes
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from docvqa.config.models import DocumentAIConfig
-from docvqa.extractors.base import BaseExtractor, ExtractionError
+from docvqa.extractors.base import (
+    BaseExtractor,
+    ExtractionError,
+    ExtractionOutcome,
+    TransientExtractionError,
+)
 from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.utils.metrics import get_metrics
+from docvqa.utils.ratelimit import get_rate_limiter
 
 try:  # pragma: no cover - optional dependency
+    from google.api_core import exceptions as google_exceptions
     from google.cloud import documentai
     from google.oauth2 import service_account
 except ImportError:  # pragma: no cover - optional dependency
+    google_exceptions = None
     documentai = None
     service_account = None
 
+try:  # pragma: no cover - optional dependency
+    from google.cloud import storage as gcs
+except ImportError:  # pragma: no cover - optional dependency
+    gcs = None
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
 
 @dataclass
 class _DocumentAIResources:
@@ -26,58 +44,248 @@ class _DocumentAIResources:
 
 
 class DocumentAIExtractor(BaseExtractor):
-    """Extraction backend using Google Document AI processors."""
+    """Extraction backend using Google Document AI processors.
+
+    With ``batch_size`` above 1, :meth:`extract_many` stages the documents under
+    ``gcs_staging_uri`` (streamed from disk, never read whole into memory) and submits them as
+    one ``batch_process_documents`` long-running operation. Each runner worker waits on its own
+    operation, so ``pipeline.concurrency`` operations are polled concurrently. The JSON outputs
+    are read back one document at a time and normalized like synchronous responses. Staged
+    objects are left in place; expire them with a bucket lifecycle rule.
+
+    ``client`` and ``storage_client`` replace the Document AI and Cloud Storage clients, e.g.
+    with stand-ins in tests.
+    """
+
+    name = "document_ai"
 
-    def __init__(self, config: DocumentAIConfig) -> None:
+    def __init__(
+        self,
+        config: DocumentAIConfig,
+        *,
+        client: Optional["documentai.DocumentProcessorServiceClient"] = None,
+        storage_client: Optional["gcs.Client"] = None,
+    ) -> None:
         if documentai is None:
             msg = (
                 "google-cloud-documentai is required for DocumentAIExtractor. Install the "
                 "'document-ai' extra: pip install docvqa[document-ai]."
             )
             raise ImportError(msg)
+        if config.batch_size > 1 and not config.gcs_staging_uri:
+            msg = "Document AI batch mode requires gcs_staging_uri."
+            raise ValueError(msg)
+        if config.gcs_staging_uri:
+            _split_gcs_uri(config.gcs_staging_uri)
         self._config = config
-        self._resources = self._create_resources(config)
+        self._resources = self._create_resources(config, client)
+        self._storage_client = storage_client
+        if config.batch_size > 1 and storage_client is None:
+            self._storage_client = self._create_storage_client(config)
+        self._limiter = get_rate_limiter(
+            ("document_ai", config.project_id, config.location),
+            requests_per_minute=config.requests_per_minute,
+        )
+
+    @property
+    def batch_size(self) -> int:
+        return self._config.batch_size
 
     def extract(self, request: ExtractionRequest) -> ExtractionResult:
+        return self._build_result(request, self._process(request))
+
+    def extract_many(self, requests: Sequence[ExtractionRequest]) -> List[ExtractionOutcome]:
+        if len(requests) <= 1 or self._config.batch_size <= 1:
+            return super().extract_many(requests)
+
+        prefix = f"{self._config.gcs_staging_uri.rstrip('/')}/{uuid.uuid4().hex}"
+        outcomes: List[Optional[ExtractionOutcome]] = [None] * len(requests)
+        staged: Dict[str, int] = {}
+        documents: List["documentai.GcsDocument"] = []
+        for index, request in enumerate(requests):
+            path = request.document_path
+            uri = f"{prefix}/input/{index:05d}-{path.name}"
+            try:
+                self._upload(path, uri)
+            except (FileNotFoundError, IsADirectoryError, PermissionError) as exc:
+                outcomes[index] = ExtractionError(f"Cannot read document {path}: {exc}")
+                continue
+            except Exception as exc:  # noqa: BLE001 - recorded as this document's outcome
+                outcomes[index] = _storage_error(f"Cannot stage document {path.name}", exc)
+                continue
+            staged[uri] = index
+            documents.append(documentai.GcsDocument(gcs_uri=uri, mime_type=_mime_type(path)))
+
+        if documents:
+            metadata = self._run_batch(documents, f"{prefix}/output/")
+            for status in metadata.individual_process_statuses:
+                index = staged.get(status.input_gcs_source)
+                if index is None:
+                    continue
+                if status.status.code != 0:
+                    msg = f"Document AI batch processing failed: {status.status.message}"
+                    outcomes[index] = ExtractionError(msg)
+                    continue
+                try:
+                    document = self._read_output(status.output_gcs_destination)
+                except ExtractionError as exc:
+                    outcomes[index] = exc
+                    continue
+                response = documentai.ProcessResponse(document=document)
+                outcomes[index] = self._build_result(requests[index], response)
+
+        for index, outcome in enumerate(outcomes):
+            if outcome is None:
+                outcomes[index] = ExtractionError("Document AI batch returned no output")
+        return outcomes
+
+    def fetch(self, request: ExtractionRequest) -> bytes:
+        """Return the serialized ``ProcessResponse`` so it can cross a process boundary."""
+
+        return documentai.ProcessResponse.serialize(self._process(request))
+
+    def parse(self, request: ExtractionRequest, payload: bytes) -> ExtractionResult:
+        return self._build_result(request, documentai.ProcessResponse.deserialize(payload))
+
+    def _process(self, request: ExtractionRequest) -> "documentai.ProcessResponse":
         raw_document = self._build_raw_document(request.document_path)
         process_request = documentai.ProcessRequest(
             name=self._resources.name,
             raw_document=raw_document,
         )
+        if self._limiter is not None:
+            self._limiter.acquire()
+        try:
+            with get_metrics().time("network", provider=self.name):
+                response = self._resources.client.process_document(process_request)
+        except Exception as exc:  # pragma: no cover - network/external
+            msg = f"Document AI processing failed: {exc}"
+            if _is_retryable(exc):
+                raise TransientExtractionError(msg, status_code=getattr(exc, "code", None)) from exc
+            raise ExtractionError(msg) from exc
+        return response
+
+    def _run_batch(
+        self, documents: List["documentai.GcsDocument"], output_uri: str
+    ) -> "documentai.BatchProcessMetadata":
+        batch_request = documentai.BatchProcessRequest(
+            name=self._resources.name,
+            input_documents=documentai.BatchDocumentsInputConfig(
+                gcs_documents=documentai.GcsDocuments(documents=documents)
+            ),
+            document_output_config=documentai.DocumentOutputConfig(
+                gcs_output_config=documentai.DocumentOutputConfig.GcsOutputConfig(
+                    gcs_uri=output_uri
+                )
+            ),
+        )
+        if self._limiter is not None:
+            self._limiter.acquire()
         try:
-            response = self._resources.client.process_document(process_request)
+            with get_metrics().time("network", provider=self.name):
+                operation = self._resources.client.batch_process_documents(batch_request)
+                operation.result(timeout=self._config.batch_timeout_seconds)
+        except FutureTimeoutError as exc:
+            msg = (
+                "Document AI batch did not finish within "
+                f"{self._config.batch_timeout_seconds:.0f}s"
+            )
+            raise ExtractionError(msg) from exc
         except Exception as exc:  # pragma: no cover - network/external
-            msg = "Document AI processing failed"
+            msg = f"Document AI batch processing failed: {exc}"
+            if _is_retryable(exc):
+                raise TransientExtractionError(msg, status_code=getattr(exc, "code", None)) from exc
             raise ExtractionError(msg) from exc
+        return operation.metadata
+
+    def _upload(self, path: Path, uri: str) -> None:
+        bucket, name = _split_gcs_uri(uri)
+        blob = self._storage_client.bucket(bucket).blob(name)
+        blob.upload_from_filename(str(path), content_type=_mime_type(path))
+
+    def _read_output(self, uri: str) -> "documentai.Document":
+        """Load the output of one document, merging the shards of large documents."""
 
-        content = self._normalize_response(response, request)
-        return ExtractionResult(doc_id=request.doc_id, content=content, raw_response=response.to_dict())
-
-    def _create_resources(self, config: DocumentAIConfig) -> _DocumentAIResources:
-        credentials = None
-        if config.credentials_path:
-            if service_account is None:
-                msg = "google-auth is required when credentials_path is provided."
-                raise ImportError(msg)
-            credentials = service_account.Credentials.from_service_account_file(
-                str(config.credentials_path)
+        bucket, prefix = _split_gcs_uri(uri.rstrip("/") + "/")
+        try:
+            blobs = sorted(
+                (
+                    blob
+                    for blob in self._storage_client.list_blobs(bucket, prefix=prefix)
+                    if blob.name.endswith(".json")
+                ),
+                key=lambda blob: blob.name,
+            )
+        except Exception as exc:  # noqa: BLE001 - mapped like other client errors
+            raise _storage_error(f"Cannot list Document AI output under {uri}", exc) from exc
+        if not blobs:
+            msg = f"No Document AI output found under {uri}"
+            raise ExtractionError(msg)
+        document: Optional["documentai.Document"] = None
+        for blob in blobs:
+            try:
+                data = blob.download_as_bytes()
+            except Exception as exc:  # noqa: BLE001 - mapped like other client errors
+                raise _storage_error(f"Cannot read Document AI output {blob.name}", exc) from exc
+            shard = documentai.Document.from_json(data, ignore_unknown_fields=True)
+            if document is None:
+                document = shard
+                continue
+            document.text += shard.text
+            document.pages.extend(shard.pages)
+            document.entities.extend(shard.entities)
+        return document
+
+    def _build_result(
+        self, request: ExtractionRequest, response: "documentai.ProcessResponse"
+    ) -> ExtractionResult:
+        metrics = get_metrics()
+        with metrics.time("parse", provider=self.name):
+            content = self._normalize_response(response, request)
+            raw_response = documentai.ProcessResponse.to_dict(response)
+        with metrics.time("validate", provider=self.name):
+            return ExtractionResult(
+                doc_id=request.doc_id, content=content, raw_response=raw_response
+            )
+
+    def cache_fingerprint(self, request: ExtractionRequest) -> Optional[Dict[str, Any]]:
+        return {
+            "extractor": "document_ai",
+            "processor": self._resources.name,
+            "metadata": request.metadata,
+        }
+
+    def _create_resources(
+        self,
+        config: DocumentAIConfig,
+        client: Optional["documentai.DocumentProcessorServiceClient"] = None,
+    ) -> _DocumentAIResources:
+        if client is None:
+            client_options = None
+            if config.endpoint:
+                client_options = {"api_endpoint": config.endpoint}
+            client = documentai.DocumentProcessorServiceClient(
+                credentials=_load_credentials(config), client_options=client_options
             )
-        client_options = None
-        if config.endpoint:
-            client_options = {"api_endpoint": config.endpoint}
-        client = documentai.DocumentProcessorServiceClient(
-            credentials=credentials, client_options=client_options
+        name = documentai.DocumentProcessorServiceClient.processor_path(
+            config.project_id, config.location, config.processor_id
         )
-        name = client.processor_path(config.project_id, config.location, config.processor_id)
         return _DocumentAIResources(client=client, name=name)
 
+    @staticmethod
+    def _create_storage_client(config: DocumentAIConfig) -> "gcs.Client":
+        if gcs is None:
+            msg = (
+                "google-cloud-storage is required for Document AI batch mode. Install the "
+                "'document-ai' extra: pip install docvqa[document-ai]."
+            )
+            raise ImportError(msg)
+        return gcs.Client(project=config.project_id, credentials=_load_credentials(config))
+
     def _build_raw_document(self, path: Path) -> "documentai.RawDocument":
-        mime_type, _ = mimetypes.guess_type(path)
-        if mime_type is None:
-            mime_type = "application/pdf"
         with path.open("rb") as handle:
             content = handle.read()
-        return documentai.RawDocument(content=content, mime_type=mime_type)
+        return documentai.RawDocument(content=content, mime_type=_mime_type(path))
 
     @staticmethod
     def _normalize_response(
@@ -96,7 +304,7 @@ class DocumentAIExtractor(BaseExtractor):
         tables = []
         for page in getattr(document, "pages", []):
             for table in getattr(page, "tables", []):
-                tables.append(table.to_dict())
+                tables.append(type(table).to_dict(table))
 
         return {
             "summary": document.text[:5000] if getattr(document, "text", "") else "",
@@ -108,4 +316,49 @@ class DocumentAIExtractor(BaseExtractor):
         }
 
 
+def _load_credentials(config: DocumentAIConfig) -> Optional["service_account.Credentials"]:
+    if not config.credentials_path:
+        return None
+    if service_account is None:
+        msg = "google-auth is required when credentials_path is provided."
+        raise ImportError(msg)
+    return service_account.Credentials.from_service_account_file(str(config.credentials_path))
+
+
+def _mime_type(path: Path) -> str:
+    mime_type, _ = mimetypes.guess_type(path)
+    return mime_type or "application/pdf"
+
+
+def _split_gcs_uri(uri: str) -> Tuple[str, str]:
+    """Split ``gs://bucket/name`` into the bucket and object name."""
+
+    if not uri.startswith("gs://"):
+        msg = f"Expected a gs:// URI, got {uri!r}"
+        raise ValueError(msg)
+    bucket, _, name = uri[len("gs://") :].partition("/")
+    return bucket, name
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Return whether a Document AI client error is worth retrying."""
+
+    if google_exceptions is None:  # pragma: no cover - optional dependency
+        return False
+    if isinstance(exc, google_exceptions.RetryError):
+        return True
+    if isinstance(exc, google_exceptions.GoogleAPICallError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def _storage_error(message: str, exc: Exception) -> ExtractionError:
+    """Map a Cloud Storage client error to a (transient, if retryable) extraction error."""
+
+    msg = f"{message}: {exc}"
+    if _is_retryable(exc) or isinstance(exc, (ConnectionError, TimeoutError)):
+        return TransientExtractionError(msg, status_code=getattr(exc, "code", None))
+    return ExtractionError(msg)
+
+
 __all__ = ["DocumentAIExtractor"]
@@ -2,27 +2,55 @@ from __future__ import annotations
 
 """Factory helpers to instantiate extractors based on configuration."""
 
-from docvqa.config.models import ExtractorConfig, ExtractorProvider
+from typing import Optional
+
+from docvqa.config.models import DocumentsConfig, ExtractorConfig, ExtractorProvider
 from docvqa.extractors.base import BaseExtractor
-from docvqa.extractors.document_ai import DocumentAIExtractor
-from docvqa.extractors.llm import LLMExtractor
-from docvqa.llm.client import LLMClient
 
 
-def create_extractor(config: ExtractorConfig) -> BaseExtractor:
-    """Return an extractor implementation matching the configuration."""
+def create_extractor(
+    config: ExtractorConfig,
+    *,
+    pool_size: Optional[int] = None,
+    asynchronous: bool = False,
+    documents: Optional[DocumentsConfig] = None,
+) -> BaseExtractor:
+    """Return an extractor implementation matching the configuration.
+
+    ``pool_size`` sizes HTTP connection pools and should match the pipeline concurrency.
+    ``asynchronous`` additionally wires native async clients for the asyncio engine.
+    ``documents`` enables loading document text into LLM prompts.
+
+    Provider modules are imported on demand, so the HTTP clients and the Google SDK are only
+    loaded by the process that uses them.
+    """
 
     if config.provider == ExtractorProvider.LLM:
         if config.llm is None:  # pragma: no cover - validated earlier
             msg = "LLM configuration is required for LLM provider"
             raise ValueError(msg)
-        client = LLMClient(config.llm)
-        return LLMExtractor(client)
+        from docvqa.data.documents import DocumentLoader
+        from docvqa.extractors.llm import LLMExtractor
+        from docvqa.llm.client import AsyncLLMClient, LLMClient
+
+        client = LLMClient(config.llm, pool_size=pool_size)
+        async_client = AsyncLLMClient(config.llm, pool_size=pool_size) if asynchronous else None
+        loader = None
+        if documents is not None and documents.enabled:
+            loader = DocumentLoader.from_config(documents, config.llm)
+        return LLMExtractor(
+            client,
+            async_client=async_client,
+            loader=loader,
+            batch_size=config.llm.batch_documents,
+        )
 
     if config.provider == ExtractorProvider.DOCUMENT_AI:
         if config.document_ai is None:  # pragma: no cover - validated earlier
             msg = "Document AI configuration is required for document_ai provider"
             raise ValueError(msg)
+        from docvqa.extractors.document_ai import DocumentAIExtractor
+
         return DocumentAIExtractor(config.document_ai)
 
     msg = f"Unsupported extractor provider: {config.provider}"
@@ -2,36 +2,233 @@ from __future__ import annotations
 
 """Extractor that relies on LLM completions."""
 
-import json
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
 
-from docvqa.extractors.base import BaseExtractor, ExtractionError
-from docvqa.llm.client import LLMClient
-from docvqa.pipeline.prompts import build_prompt
+from docvqa.data.documents import DocumentLoader
+from docvqa.extractors.base import (
+    BaseExtractor,
+    ExtractionError,
+    ExtractionOutcome,
+    TransientExtractionError,
+)
+from docvqa.llm.client import AsyncLLMClient, ConnectionPoolStats, LLMClient, build_payload
+from docvqa.pipeline.prompts import build_batch_prompt, build_prompt, prompt_instructions
 from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.utils import codec
+from docvqa.utils.logging import get_logger
+from docvqa.utils.metrics import get_metrics
 
 
 class LLMExtractor(BaseExtractor):
-    """Extraction backend that prompts an LLM for structured JSON output."""
+    """Extraction backend that prompts an LLM for structured JSON output.
 
-    def __init__(self, client: LLMClient) -> None:
+    With a ``loader`` the document's text (read, PDF-extracted or OCRed, and truncated to the
+    context budget) is embedded in the prompt; without one, or for file types the loader has no
+    text source for, only the path is sent.
+
+    With ``batch_size`` above 1, :meth:`extract_many` packs that many documents into one chat
+    completion whose answer is keyed per document. Documents missing from, or malformed in,
+    the batched answer are retried as single-document requests.
+    """
+
+    name = "llm"
+
+    def __init__(
+        self,
+        client: LLMClient,
+        *,
+        async_client: Optional[AsyncLLMClient] = None,
+        loader: Optional[DocumentLoader] = None,
+        batch_size: int = 1,
+    ) -> None:
         self._client = client
+        self._async_client = async_client
+        self._loader = loader
+        self._batch_size = batch_size
+        self._logger = get_logger(__name__)
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
 
     def extract(self, request: ExtractionRequest) -> ExtractionResult:
-        prompt = build_prompt(request)
-        response = self._client.generate(prompt)
+        return self._parse_response(request, self.fetch(request))
+
+    def fetch(self, request: ExtractionRequest) -> Dict[str, Any]:
+        prompt = self._prompt(request)
+        with get_metrics().time("network", provider=self.name):
+            return self._client.generate(prompt)
+
+    def parse(self, request: ExtractionRequest, payload: Dict[str, Any]) -> ExtractionResult:
+        return self._parse_response(request, payload)
+
+    def batch_body(self, request: ExtractionRequest) -> Dict[str, Any]:
+        """Chat completion body for ``request``, for submission through a Batch API.
+
+        The provider's answer to it is handled by :meth:`parse`, as for :meth:`fetch`.
+        """
+
+        return build_payload(self._client.config, self._prompt(request))
+
+    def extract_many(self, requests: Sequence[ExtractionRequest]) -> List[ExtractionOutcome]:
+        if len(requests) <= 1:
+            return super().extract_many(requests)
+
+        outcomes: List[Optional[ExtractionOutcome]] = [None] * len(requests)
+        keyed: Dict[str, ExtractionRequest] = {}
+        positions: Dict[str, int] = {}
+        for index, request in enumerate(requests):
+            try:
+                request_with_text = self._with_text(request)
+            except ExtractionError as exc:
+                outcomes[index] = exc
+                continue
+            key = f"doc_{index}"
+            keyed[key] = request_with_text
+            positions[key] = index
+
+        entries: Dict[str, Any] = {}
+        response: Optional[Dict[str, Any]] = None
+        if keyed:
+            metrics = get_metrics()
+            try:
+                with metrics.time("prompt_build", provider=self.name):
+                    prompt = build_batch_prompt(keyed)
+                with metrics.time("network", provider=self.name):
+                    response = self._client.generate(
+                        prompt, max_tokens=self._batch_max_tokens(len(keyed))
+                    )
+                with metrics.time("parse", provider=self.name):
+                    entries = self._parse_batch_response(response)
+            except TransientExtractionError:
+                raise
+            except ExtractionError as exc:
+                self._logger.warning("llm_batch_failed", documents=len(keyed), error=str(exc))
+
+        fallback = 0
+        for key, index in positions.items():
+            content = entries.get(key)
+            if isinstance(content, dict):
+                raw = _batch_raw_response(response, key, len(keyed))
+                outcomes[index] = ExtractionResult(
+                    doc_id=requests[index].doc_id, content=content, raw_response=raw
+                )
+                continue
+            fallback += 1
+            try:
+                outcomes[index] = self.extract(keyed[key])
+            except ExtractionError as exc:
+                outcomes[index] = exc
+        if fallback and entries:
+            self._logger.warning("llm_batch_fallback", documents=len(keyed), fallback=fallback)
+        return outcomes
+
+    async def extract_async(self, request: ExtractionRequest) -> ExtractionResult:
+        if self._async_client is None:
+            return await super().extract_async(request)
+        prompt = await asyncio.to_thread(self._prompt, request)
+        with get_metrics().time("network", provider=self.name):
+            response = await self._async_client.generate(prompt)
+        return self._parse_response(request, response)
+
+    def cache_fingerprint(self, request: ExtractionRequest) -> Optional[Dict[str, Any]]:
+        config = getattr(self._client, "config", None)
+        if config is None:
+            return None
+        # The document itself is keyed by its content hash; only a path-only prompt depends on
+        # where the file lives.
+        path = None
+        if self._loader is None or self._loader.text_source(request.document_path) is None:
+            path = str(request.document_path)
+        return {
+            "extractor": "llm",
+            "provider": config.provider,
+            "model": config.model,
+            "temperature": config.temperature,
+            "instructions": prompt_instructions(request),
+            "questions": request.questions,
+            "metadata": request.metadata,
+            "document_path": path,
+            "documents": self._loader.fingerprint() if self._loader is not None else None,
+        }
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+
+    def _batch_max_tokens(self, documents: int) -> Optional[int]:
+        config = getattr(self._client, "config", None)
+        return config.max_output_tokens * documents if config is not None else None
+
+    def _prompt(self, request: ExtractionRequest) -> str:
+        request_with_text = self._with_text(request)
+        with get_metrics().time("prompt_build", provider=self.name):
+            return build_prompt(request_with_text)
+
+    def _with_text(self, request: ExtractionRequest) -> ExtractionRequest:
+        if self._loader is None or request.text is not None:
+            return request
+        with get_metrics().time("document_load", provider=self.name):
+            text = self._loader.load_text(request.document_path)
+        if text is None:
+            return request
+        return request.model_copy(update={"text": text})
+
+    @classmethod
+    def _parse_response(
+        cls, request: ExtractionRequest, response: Dict[str, Any]
+    ) -> ExtractionResult:
         try:
             message = response["choices"][0]["message"]["content"]
         except (KeyError, IndexError) as exc:  # pragma: no cover - depends on provider
             msg = "Unexpected LLM response format"
             raise ExtractionError(msg) from exc
 
+        metrics = get_metrics()
         try:
-            content = json.loads(message)
-        except json.JSONDecodeError as exc:
+            with metrics.time("parse", provider=cls.name):
+                content = codec.loads(message)
+        except (TypeError, ValueError) as exc:
             msg = "LLM response is not valid JSON"
             raise ExtractionError(msg) from exc
 
-        return ExtractionResult(doc_id=request.doc_id, content=content, raw_response=response)
+        with metrics.time("validate", provider=cls.name):
+            return ExtractionResult(doc_id=request.doc_id, content=content, raw_response=response)
+
+    @staticmethod
+    def _parse_batch_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            message = response["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as exc:
+            msg = "Unexpected LLM response format"
+            raise ExtractionError(msg) from exc
+
+        try:
+            entries = codec.loads(message)
+        except (TypeError, ValueError) as exc:
+            msg = "Batched LLM response is not valid JSON"
+            raise ExtractionError(msg) from exc
+        if not isinstance(entries, dict):
+            msg = "Batched LLM response is not a JSON object"
+            raise ExtractionError(msg)
+        return entries
+
+    def pool_stats(self) -> Optional[ConnectionPoolStats]:
+        """Connection reuse counters of the underlying client, when it tracks them."""
+
+        pool_stats = getattr(self._client, "pool_stats", None)
+        return pool_stats() if pool_stats is not None else None
+
+
+def _batch_raw_response(
+    response: Optional[Dict[str, Any]], key: str, documents: int
+) -> Dict[str, Any]:
+    """Per-document raw response for a batched call: the shared metadata, not the full text."""
+
+    raw = {name: value for name, value in (response or {}).items() if name != "choices"}
+    raw["batch"] = {"key": key, "documents": documents}
+    return raw
 
 
 __all__ = ["LLMExtractor"]
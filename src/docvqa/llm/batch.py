@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""Client for OpenAI-compatible Batch APIs (``/files`` and ``/batches``)."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from docvqa.config.models import LLMConfig
+from docvqa.extractors.base import ExtractionError, TransientExtractionError
+from docvqa.llm.client import status_error
+from docvqa.utils import codec
+
+CHAT_COMPLETIONS_SUFFIX = "/chat/completions"
+
+# Batch states after which a batch will not make further progress.
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """Server-side state of one submitted batch."""
+
+    id: str
+    status: str
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> BatchJob:
+        return cls(
+            id=payload["id"],
+            status=payload.get("status", "validating"),
+            output_file_id=payload.get("output_file_id"),
+            error_file_id=payload.get("error_file_id"),
+        )
+
+
+class BatchAPIClient:
+    """Uploads batch input files, creates batches, polls them and streams their output.
+
+    Requests inside the input file target the path of ``llm.api_base`` (normally
+    ``/v1/chat/completions``); the file and batch endpoints live under ``batch_api.api_base``,
+    which defaults to ``llm.api_base`` without the chat completions suffix.
+    """
+
+    def __init__(self, config: LLMConfig, *, session: Optional[requests.Session] = None) -> None:
+        self._config = config
+        base = config.batch_api.api_base or config.api_base.removesuffix(CHAT_COMPLETIONS_SUFFIX)
+        self._base = base.rstrip("/")
+        self._session = session or requests.Session()
+        self._session.headers.update({"Authorization": f"Bearer {config.api_key}"})
+
+    @property
+    def endpoint(self) -> str:
+        """Request path used for every line of the input files."""
+
+        return urlsplit(self._config.api_base).path or CHAT_COMPLETIONS_SUFFIX
+
+    def request_line(self, custom_id: str, body: Dict[str, Any]) -> str:
+        """Serialize one input-file line for a chat completion ``body``."""
+
+        line = {"custom_id": custom_id, "method": "POST", "url": self.endpoint, "body": body}
+        return codec.dumps(line)
+
+    def upload(self, path: Path) -> str:
+        """Upload a JSONL input file and return its file id."""
+
+        with path.open("rb") as handle:
+            response = self._request(
+                "POST",
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": (path.name, handle, "application/jsonl")},
+            )
+        return response.json()["id"]
+
+    def create(self, input_file_id: str) -> BatchJob:
+        payload = {
+            "input_file_id": input_file_id,
+            "endpoint": self.endpoint,
+            "completion_window": self._config.batch_api.completion_window,
+        }
+        return BatchJob.from_payload(self._request("POST", "/batches", json=payload).json())
+
+    def retrieve(self, batch_id: str) -> BatchJob:
+        return BatchJob.from_payload(self._request("GET", f"/batches/{batch_id}").json())
+
+    def iter_file(self, file_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream the JSON lines of an output or error file without loading it whole."""
+
+        response = self._request("GET", f"/files/{file_id}/content", stream=True)
+        with response:
+            for line in response.iter_lines():
+                if line.strip():
+                    yield codec.loads(line)
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        try:
+            response = self._session.request(
+                method, self._base + path, timeout=self._config.timeout_seconds, **kwargs
+            )
+        except (requests.Timeout, requests.ConnectionError) as exc:  # pragma: no cover - network
+            msg = f"Batch API request failed: {exc}"
+            raise TransientExtractionError(msg) from exc
+        except requests.RequestException as exc:  # pragma: no cover - network failures
+            msg = "Batch API request failed"
+            raise ExtractionError(msg) from exc
+        if not response.ok:
+            raise status_error(
+                response.status_code, response.text, response.headers.get("Retry-After")
+            )
+        return response
+
+    def close(self) -> None:
+        self._session.close()
+
+
+__all__ = ["BatchAPIClient", "BatchJob", "TERMINAL_STATUSES"]
@@ -2,67 +2,291 @@ from __future__ import annotations
 
 """HTTP client used by LLM extractors."""
 
-from typing import Any, Dict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from importlib.util import find_spec
+from typing import Any, Dict, Optional
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
 
 from docvqa.config.models import LLMConfig
-from docvqa.extractors.base import ExtractionError
+from docvqa.extractors.base import ExtractionError, TransientExtractionError
+from docvqa.utils import codec
+from docvqa.utils.metrics import get_metrics
+from docvqa.utils.ratelimit import RateLimiter, estimate_tokens, get_rate_limiter
+
+try:  # pragma: no cover - optional dependency
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that extracts structured information from "
+    "documents. Respond strictly with JSON."
+)
+
+
+@dataclass(frozen=True)
+class ConnectionPoolStats:
+    """Connection reuse counters for an HTTP client's pool."""
+
+    requests: int
+    connections: int
+
+    @property
+    def hits(self) -> int:
+        """Requests served over an already-open keep-alive connection."""
+
+        return max(0, self.requests - self.connections)
+
+    @property
+    def misses(self) -> int:
+        """Requests that had to open a new TCP/TLS connection."""
+
+        return self.connections
 
 
 class LLMClient:
-    """Minimal client compatible with OpenAI-style chat completion APIs."""
+    """Minimal client compatible with OpenAI-style chat completion APIs.
 
-    def __init__(self, config: LLMConfig) -> None:
+    The client owns a keep-alive :class:`requests.Session` whose connection pool is sized to
+    ``pool_size`` (normally ``pipeline.concurrency``), so concurrent workers reuse open
+    connections instead of paying a TCP and TLS handshake per document.
+    """
+
+    def __init__(self, config: LLMConfig, *, pool_size: Optional[int] = None) -> None:
         self._config = config
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size or 1))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update(
+            {
+                "Authorization": f"Bearer {config.api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        self._limiter = shared_rate_limiter(config)
 
-    def generate(self, prompt: str) -> Dict[str, Any]:
-        """Send a prompt to the LLM and return the JSON response."""
+    @property
+    def config(self) -> LLMConfig:
+        return self._config
+
+    def generate(self, prompt: str, *, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Send a prompt to the LLM and return the JSON response.
 
-        payload = {
-            "model": self._config.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a helpful assistant that extracts structured information from "
-                        "documents. Respond strictly with JSON."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": self._config.temperature,
-            "max_tokens": self._config.max_output_tokens,
-            "response_format": {"type": "json_object"},
-        }
-        headers = {
-            "Authorization": f"Bearer {self._config.api_key}",
-            "Content-Type": "application/json",
-        }
+        ``max_tokens`` overrides the configured output allowance, e.g. for batched prompts.
+        """
+
+        payload = build_payload(self._config, prompt, max_tokens=max_tokens)
+        estimate = estimate_request_tokens(self._config, prompt, max_tokens=max_tokens)
+        if self._limiter is not None:
+            self._limiter.acquire(estimate)
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 self._config.api_base,
                 json=payload,
-                headers=headers,
                 timeout=self._config.timeout_seconds,
             )
+        except (requests.Timeout, requests.ConnectionError) as exc:  # pragma: no cover - network
+            msg = f"LLM request failed: {exc}"
+            raise TransientExtractionError(msg) from exc
         except requests.RequestException as exc:  # pragma: no cover - network failures
             msg = "LLM request failed"
             raise ExtractionError(msg) from exc
 
         self._raise_for_status(response)
 
-        return response.json()
+        body = codec.loads(response.content)
+        record_usage(self._limiter, body, estimate)
+        count_tokens(self._config, body)
+        return body
+
+    def pool_stats(self) -> ConnectionPoolStats:
+        """Return connection pool hit/miss counters accumulated since the client was created."""
+
+        requests_count = 0
+        connections = 0
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:  # pragma: no cover - evicted concurrently
+                    continue
+                requests_count += pool.num_requests
+                connections += pool.num_connections
+        return ConnectionPoolStats(requests=requests_count, connections=connections)
+
+    def close(self) -> None:
+        """Close pooled connections."""
+
+        self._session.close()
 
     @staticmethod
     def _raise_for_status(response: Response) -> None:
         try:
             response.raise_for_status()
-        except requests.HTTPError as exc:  # pragma: no cover - network failures
-            msg = f"LLM API returned {response.status_code}: {response.text}"
+        except requests.HTTPError as exc:
+            raise status_error(
+                response.status_code, response.text, response.headers.get("Retry-After")
+            ) from exc
+
+
+class AsyncLLMClient:
+    """Asyncio counterpart of :class:`LLMClient` built on ``httpx.AsyncClient``.
+
+    Connections are pooled up to ``pool_size`` and negotiated over HTTP/2 when the ``h2``
+    package is installed. The client binds to the event loop it is first used on; close it with
+    :meth:`aclose` from that loop.
+    """
+
+    def __init__(self, config: LLMConfig, *, pool_size: Optional[int] = None) -> None:
+        if httpx is None:
+            msg = (
+                "httpx is required for AsyncLLMClient. Install the 'async' extra: "
+                "pip install docvqa[async]."
+            )
+            raise ImportError(msg)
+        self._config = config
+        size = max(1, pool_size or 1)
+        self._client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {config.api_key}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+            timeout=config.timeout_seconds,
+            http2=find_spec("h2") is not None,
+        )
+        self._limiter = shared_rate_limiter(config)
+
+    async def generate(self, prompt: str, *, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Send a prompt to the LLM and return the JSON response."""
+
+        payload = build_payload(self._config, prompt, max_tokens=max_tokens)
+        estimate = estimate_request_tokens(self._config, prompt, max_tokens=max_tokens)
+        if self._limiter is not None:
+            await self._limiter.acquire_async(estimate)
+        try:
+            response = await self._client.post(self._config.api_base, json=payload)
+        except (httpx.TimeoutException, httpx.NetworkError) as exc:  # pragma: no cover - network
+            msg = f"LLM request failed: {exc}"
+            raise TransientExtractionError(msg) from exc
+        except httpx.HTTPError as exc:  # pragma: no cover - network failures
+            msg = "LLM request failed"
             raise ExtractionError(msg) from exc
 
+        if response.is_error:
+            raise status_error(
+                response.status_code, response.text, response.headers.get("Retry-After")
+            )
+        body = codec.loads(response.content)
+        record_usage(self._limiter, body, estimate)
+        count_tokens(self._config, body)
+        return body
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+
+        await self._client.aclose()
+
+
+def build_payload(
+    config: LLMConfig, prompt: str, *, max_tokens: Optional[int] = None
+) -> Dict[str, Any]:
+    """Build the chat completion request body for ``prompt``."""
+
+    return {
+        "model": config.model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": config.temperature,
+        "max_tokens": max_tokens or config.max_output_tokens,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def shared_rate_limiter(config: LLMConfig) -> Optional[RateLimiter]:
+    """Return the limiter shared by every client of the same endpoint and model quota."""
+
+    return get_rate_limiter(
+        ("llm", config.api_base, config.model),
+        requests_per_minute=config.requests_per_minute,
+        tokens_per_minute=config.tokens_per_minute,
+    )
+
+
+def estimate_request_tokens(
+    config: LLMConfig, prompt: str, *, max_tokens: Optional[int] = None
+) -> int:
+    """Upper-bound token estimate for a request: prompt plus the full output allowance."""
+
+    output = max_tokens or config.max_output_tokens
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt) + output
+
+
+def record_usage(limiter: Optional[RateLimiter], body: Dict[str, Any], estimate: int) -> None:
+    """Correct the limiter's token estimate using the response ``usage`` block."""
+
+    if limiter is None:
+        return
+    usage = body.get("usage") or {}
+    total = usage.get("total_tokens")
+    if isinstance(total, int):
+        limiter.adjust(total - estimate)
+
+
+def count_tokens(config: LLMConfig, body: Dict[str, Any]) -> None:
+    """Add the response ``usage`` block to the token counters."""
+
+    usage = body.get("usage") or {}
+    tokens = get_metrics().tokens
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    for kind, value in (
+        ("prompt", usage.get("prompt_tokens")),
+        ("completion", usage.get("completion_tokens")),
+        ("cached_prompt", cached),
+    ):
+        if isinstance(value, int) and value:
+            tokens.inc(value, provider=config.provider, model=config.model, kind=kind)
+
+
+def status_error(status_code: int, text: str, retry_after: Optional[str]) -> ExtractionError:
+    """Map an HTTP error status to the matching extraction error."""
+
+    msg = f"LLM API returned {status_code}: {text}"
+    if status_code in RETRYABLE_STATUS_CODES:
+        return TransientExtractionError(
+            msg, status_code=status_code, retry_after=parse_retry_after(retry_after)
+        )
+    return ExtractionError(msg)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a ``Retry-After`` header (delta-seconds or HTTP-date) to seconds."""
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
 
-__all__ = ["LLMClient"]
+__all__ = ["AsyncLLMClient", "ConnectionPoolStats", "LLMClient"]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+"""Adaptive (AIMD) concurrency control for the extraction pipeline."""
+
+import math
+import threading
+from collections import deque
+from typing import Deque, Optional
+
+
+class AdaptiveConcurrencyController:
+    """Additive-increase, multiplicative-decrease limit on in-flight extractions.
+
+    The limit starts at ``minimum`` and grows by one after every full round of ``limit``
+    successful completions whose p95 latency stays within ``latency_target_seconds``. An
+    overload signal (429, 5xx or timeout) or a p95 above target multiplies the limit by
+    ``decrease_factor``. After a decrease, further cuts wait for one round of completions so a
+    single burst of errors is not punished several times.
+    """
+
+    def __init__(
+        self,
+        *,
+        minimum: int,
+        maximum: int,
+        latency_target_seconds: float,
+        decrease_factor: float = 0.5,
+        window: int = 50,
+    ) -> None:
+        self._minimum = max(1, minimum)
+        self._maximum = max(self._minimum, maximum)
+        self._latency_target = latency_target_seconds
+        self._decrease_factor = decrease_factor
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._limit = self._minimum
+        self._round_successes = 0
+        self._cooldown = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def on_success(self, latency_seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_seconds)
+            if self._cooldown:
+                self._cooldown -= 1
+            self._round_successes += 1
+            if self._round_successes < self._limit:
+                return
+            self._round_successes = 0
+            p95 = self._p95()
+            if p95 is not None and p95 > self._latency_target:
+                self._decrease()
+            elif self._limit < self._maximum:
+                self._limit += 1
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        if self._cooldown:
+            return
+        self._limit = max(self._minimum, math.floor(self._limit * self._decrease_factor))
+        self._round_successes = 0
+        self._cooldown = self._limit
+
+    def _p95(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+__all__ = ["AdaptiveConcurrencyController"]
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+"""Offline pipeline engine submitting prompts through a provider Batch API."""
+
+import json
+import os
+import time
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from docvqa.config.models import BatchAPIConfig, PipelineConfig
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.base import ExtractionError, TransientExtractionError
+from docvqa.extractors.llm import LLMExtractor
+from docvqa.llm.batch import BatchAPIClient, BatchJob
+from docvqa.pipeline.checkpoint import CheckpointIndex
+from docvqa.pipeline.run import PipelineStats, commit_storage, count_lost, log_completion
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.base import BaseStorage
+from docvqa.utils import codec
+from docvqa.utils.logging import get_logger
+from docvqa.utils.metrics import get_metrics
+
+STATE_FILE = "state.json"
+
+
+class BatchPipelineRunner:
+    """Runs extraction through a provider Batch API instead of interactive requests.
+
+    Prompts for the whole dataset are written to JSONL input files of at most
+    ``max_requests_per_file`` lines under ``<work_dir>/<run_id>/``; each file is uploaded and
+    submitted as one batch as soon as it is full. The runner then polls the batches and streams
+    every finished output file through :meth:`LLMExtractor.parse` into storage.
+
+    Each input file has a ``requests-NNNNN.jsonl`` companion holding the extractor request of
+    every line, which is what the provider's answers are parsed against. Submitted batch ids
+    are saved in ``state.json`` next to the input files, along with whether the whole dataset
+    has been submitted. Running again with the same run id (``--resume``) keeps polling the
+    existing batches instead of paying for them twice, first submitting any documents an
+    interrupted submission did not reach; documents already in the checkpoint are not written
+    again. Documents of collected batches that are missing from the checkpoint, because their
+    line failed or the batch expired, failed or was cancelled, are submitted again as a new
+    batch.
+    """
+
+    def __init__(
+        self,
+        dataset: Iterable[DocumentExample],
+        extractor: LLMExtractor,
+        storage: BaseStorage,
+        config: PipelineConfig,
+        client: BatchAPIClient,
+        batch_config: BatchAPIConfig,
+        *,
+        run_id: str,
+        checkpoint: Optional[CheckpointIndex] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._dataset = dataset
+        self._extractor = extractor
+        self._storage = storage
+        self._config = config
+        self._client = client
+        self._batch_config = batch_config
+        self._checkpoint = checkpoint
+        self._sleep = sleep
+        self._directory = batch_config.work_dir / run_id
+        self._state_path = self._directory / STATE_FILE
+        self._logger = get_logger(__name__)
+        self._lost = 0
+
+    def run(self) -> PipelineStats:
+        stats = PipelineStats()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        jobs, submitted = self._load_state()
+        if jobs:
+            self._logger.info("batch_state_loaded", batches=len(jobs), submitted=submitted)
+        self._submit(jobs, stats, () if submitted else self._dataset)
+        self._collect(jobs, stats)
+
+        self._lost += len(commit_storage(self._storage.finalize, self._checkpoint, self._logger))
+        count_lost(stats, self._lost)
+        log_completion(self._logger, stats)
+        return stats
+
+    def _submit(
+        self,
+        jobs: List[Dict[str, Any]],
+        stats: PipelineStats,
+        dataset: Iterable[DocumentExample],
+    ) -> None:
+        """Submit every document still owed a result, appending the new batches to ``jobs``.
+
+        These are the documents of ``dataset`` no batch covers yet and, with a checkpoint, the
+        documents of collected batches that never reached it: lines that failed, and whole
+        batches that expired, failed or were cancelled.
+        """
+
+        known: Dict[str, ExtractionRequest] = {}
+        pending: Set[str] = set()
+        for job in jobs:
+            requests = self._load_requests(job)
+            known.update(requests)
+            if not job["collected"]:
+                pending.update(requests)
+        stats.processed = len(known)
+        retry = [
+            request
+            for doc_id, request in known.items()
+            if doc_id not in pending and not self._persisted(doc_id)
+        ]
+        if retry:
+            self._logger.info("batch_resubmitting", documents=len(retry))
+        fresh = (
+            self._extractor.build_request(example)
+            for example in dataset
+            if example.doc_id not in known
+        )
+
+        handles: Optional[Tuple[TextIO, TextIO]] = None
+        count = 0
+        for request in chain(retry, fresh):
+            if request.doc_id not in known:
+                stats.processed += 1
+            try:
+                body = self._extractor.batch_body(request)
+            except ExtractionError as exc:
+                stats.failed += 1
+                self._logger.error("extraction_failed", doc_id=request.doc_id, error=str(exc))
+                continue
+            if handles is None:
+                handles = tuple(
+                    (self._directory / name).open("w", encoding="utf-8")
+                    for name in _file_names(len(jobs))
+                )
+            handles[0].write(self._client.request_line(request.doc_id, body))
+            handles[0].write("\n")
+            handles[1].write(codec.dump_model(request))
+            handles[1].write("\n")
+            count += 1
+            if count >= self._batch_config.max_requests_per_file:
+                jobs.append(self._create(handles, count, jobs))
+                handles, count = None, 0
+        if handles is not None:
+            jobs.append(self._create(handles, count, jobs))
+        self._save_state(jobs, submitted=True)
+
+    def _persisted(self, doc_id: str) -> bool:
+        """Whether ``doc_id`` is known to be stored; always assumed without a checkpoint."""
+
+        return self._checkpoint is None or doc_id in self._checkpoint.completed
+
+    def _create(
+        self, handles: Tuple[TextIO, TextIO], count: int, jobs: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        for handle in handles:
+            handle.close()
+        input_name, requests_name = _file_names(len(jobs))
+        file_id = self._client.upload(self._directory / input_name)
+        batch = self._client.create(file_id)
+        job = {
+            "id": batch.id,
+            "input": input_name,
+            "requests_file": requests_name,
+            "requests": count,
+            "collected": False,
+        }
+        self._save_state([*jobs, job], submitted=False)
+        self._logger.info("batch_submitted", batch_id=batch.id, requests=count)
+        return job
+
+    def _load_requests(self, job: Dict[str, Any]) -> Dict[str, ExtractionRequest]:
+        requests: Dict[str, ExtractionRequest] = {}
+        with (self._directory / job["requests_file"]).open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    request = codec.load_model(ExtractionRequest, line)
+                    requests[request.doc_id] = request
+        return requests
+
+    def _collect(self, jobs: List[Dict[str, Any]], stats: PipelineStats) -> None:
+        while True:
+            waiting = 0
+            for job in jobs:
+                if job["collected"]:
+                    continue
+                try:
+                    batch = self._client.retrieve(job["id"])
+                except TransientExtractionError as exc:
+                    self._logger.warning("batch_poll_failed", batch_id=job["id"], error=str(exc))
+                    waiting += 1
+                    continue
+                if not batch.finished:
+                    waiting += 1
+                    continue
+                self._collect_job(job, batch, stats)
+                job["collected"] = True
+                self._save_state(jobs, submitted=True)
+            if not waiting:
+                return
+            self._sleep(self._batch_config.poll_seconds)
+
+    def _collect_job(self, job: Dict[str, Any], batch: BatchJob, stats: PipelineStats) -> None:
+        requests = self._load_requests(job)
+        succeeded = 0
+        if batch.output_file_id is not None:
+            for record in self._client.iter_file(batch.output_file_id):
+                if self._handle_record(record, requests):
+                    succeeded += 1
+        if batch.error_file_id is not None:
+            for record in self._client.iter_file(batch.error_file_id):
+                self._handle_record(record, requests)
+        failed = job["requests"] - succeeded
+        stats.succeeded += succeeded
+        stats.failed += failed
+        documents = get_metrics().documents
+        documents.inc(succeeded, provider=self._extractor.name, outcome="succeeded")
+        documents.inc(failed, provider=self._extractor.name, outcome="failed")
+        self._logger.info(
+            "batch_collected",
+            batch_id=batch.id,
+            status=batch.status,
+            succeeded=succeeded,
+            failed=failed,
+        )
+
+    def _handle_record(
+        self, record: Dict[str, Any], requests: Dict[str, ExtractionRequest]
+    ) -> bool:
+        """Persist one output line; return whether it holds a usable result."""
+
+        doc_id = record.get("custom_id")
+        response = record.get("response") or {}
+        error = record.get("error")
+        status_code = response.get("status_code", 200)
+        if error or status_code >= 400 or "body" not in response:
+            message = error.get("message") if isinstance(error, dict) else error
+            self._logger.error(
+                "extraction_failed", doc_id=doc_id, error=str(message or status_code)
+            )
+            return False
+        if self._checkpoint is not None and doc_id in self._checkpoint.completed:
+            return True
+        request = requests.get(doc_id)
+        if request is None:
+            self._logger.error("batch_unknown_custom_id", doc_id=doc_id)
+            return False
+        try:
+            result = self._extractor.parse(request, response["body"])
+        except ExtractionError as exc:
+            self._logger.error("extraction_failed", doc_id=doc_id, error=str(exc))
+            return False
+        self._persist(result)
+        return True
+
+    def _persist(self, result: ExtractionResult) -> None:
+        metrics = get_metrics()
+        with metrics.time("storage_write", provider=self._extractor.name):
+            self._storage.write(result)
+        if self._checkpoint is None:
+            return
+        self._checkpoint.record(result.doc_id)
+        if self._checkpoint.pending >= self._config.checkpoint_every:
+            with metrics.time("storage_commit", provider=self._extractor.name):
+                lost = commit_storage(self._storage.flush, self._checkpoint, self._logger)
+                self._lost += len(lost)
+
+    def _load_state(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Saved batches and whether the whole dataset had been submitted."""
+
+        try:
+            with self._state_path.open("r", encoding="utf-8") as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            return [], False
+        return state["batches"], state.get("submitted", False)
+
+    def _save_state(self, jobs: List[Dict[str, Any]], *, submitted: bool) -> None:
+        temporary = self._state_path.with_name(f"{STATE_FILE}.tmp")
+        temporary.write_text(
+            json.dumps({"batches": jobs, "submitted": submitted}), encoding="utf-8"
+        )
+        os.replace(temporary, self._state_path)
+
+
+def _file_names(index: int) -> Tuple[str, str]:
+    """Names of the input file and its requests companion for the ``index``-th batch."""
+
+    return f"input-{index:05d}.jsonl", f"requests-{index:05d}.jsonl"
+
+
+__all__ = ["BatchPipelineRunner"]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+"""Per-run checkpoint index of documents that have been persisted."""
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Set
+
+
+class CheckpointIndex:
+    """Append-only log of completed ``doc_id`` values for a single run.
+
+    The log holds one id per line. Ids are buffered by :meth:`record` and only appended by
+    :meth:`flush`, which the runner calls right after flushing storage, so every id in the log
+    refers to a result that has already been handed to the storage backend. A torn final line
+    left by a crash is truncated away on load.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._completed: Set[str] = self._load()
+        self._pending: List[str] = []
+
+    @classmethod
+    def for_run(cls, directory: Path, run_id: str) -> "CheckpointIndex":
+        return cls(directory / f"{run_id}.done")
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def completed(self) -> Set[str]:
+        """Ids persisted by earlier attempts of this run, for cheap membership checks."""
+
+        return self._completed
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, doc_id: str) -> None:
+        self._pending.append(doc_id)
+
+    def discard(self, doc_ids: Iterable[str]) -> None:
+        """Drop ``doc_ids`` from the pending ids, e.g. because storage failed to persist them."""
+
+        rejected = set(doc_ids)
+        if rejected:
+            self._pending = [doc_id for doc_id in self._pending if doc_id not in rejected]
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with self._path.open("a", encoding="utf-8") as handle:
+            handle.write("\n".join(self._pending))
+            handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._completed.update(self._pending)
+        self._pending.clear()
+
+    def _load(self) -> Set[str]:
+        if not self._path.exists():
+            return set()
+        data = self._path.read_bytes()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            with self._path.open("r+b") as handle:
+                handle.truncate(complete)
+        return {line for line in data[:complete].decode("utf-8").split("\n") if line}
+
+
+__all__ = ["CheckpointIndex"]
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+"""Hedged extraction attempts and per-document deadlines for long-tail latency."""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from docvqa.config.models import PipelineConfig
+from docvqa.extractors.base import ExtractionError
+from docvqa.pipeline.retry import RetryBudget
+from docvqa.utils.logging import get_logger
+
+T = TypeVar("T")
+
+
+class DeadlineExceededError(ExtractionError):
+    """Raised when a document's end-to-end deadline passes before an attempt succeeds."""
+
+
+class LatencyTracker:
+    """Rolling window of recent attempt latencies."""
+
+    def __init__(self, window: int = 1024) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100.0))
+        return ordered[index]
+
+
+class Hedger:
+    """Runs extraction attempts with hedging and an optional deadline.
+
+    An attempt that is still running after the ``percentile`` of recent attempt latencies gets
+    one duplicate, and whichever finishes first wins. Hedges draw from a
+    :class:`RetryBudget`, so at most ``budget_ratio`` extra requests are sent per attempt and
+    total load stays close to one request per document. Until ``min_samples`` latencies have
+    been observed no hedges are sent.
+
+    A ``deadline`` (a :func:`time.monotonic` timestamp) bounds the wait for an attempt.
+    Threads cannot be interrupted, so in the threaded engine an abandoned attempt finishes in
+    the background and its result is discarded. In the asyncio engine it is cancelled.
+
+    Attempts run on an elastic pool that starts a thread whenever none is idle, so attempts
+    abandoned on a stuck provider never delay later attempts or hedges; ``max_workers`` only
+    caps the idle threads kept for reuse.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: Optional[float],
+        min_samples: int = 20,
+        budget_ratio: float = 0.1,
+        max_workers: int = 4,
+    ) -> None:
+        self._percentile = percentile
+        self._min_samples = min_samples
+        self._budget = RetryBudget(budget_ratio, reserve=1.0, capacity=10.0)
+        self._tracker = LatencyTracker()
+        self._executor: Optional[_ElasticPool] = None
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._logger = get_logger(__name__)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_config(cls, config: PipelineConfig, *, max_workers: int) -> Optional[Hedger]:
+        """Return a hedger when hedging or deadlines are configured, otherwise ``None``."""
+
+        if config.hedge_percentile is None and config.document_deadline_seconds is None:
+            return None
+        return cls(
+            percentile=config.hedge_percentile,
+            min_samples=config.hedge_min_samples,
+            budget_ratio=config.hedge_budget_ratio,
+            max_workers=max_workers,
+        )
+
+    @property
+    def tracker(self) -> LatencyTracker:
+        return self._tracker
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a still-running attempt is duplicated, if hedging applies."""
+
+        if self._percentile is None or len(self._tracker) < self._min_samples:
+            return None
+        return self._tracker.percentile(self._percentile)
+
+    def call(
+        self,
+        func: Callable[[], T],
+        *,
+        deadline: Optional[float] = None,
+        doc_id: Optional[str] = None,
+    ) -> T:
+        """Run ``func`` in the hedging pool, duplicating it once if it runs long."""
+
+        executor = self._pool()
+        self._budget.record_attempt()
+        started = time.monotonic()
+        delay = self.hedge_delay()
+        hedge_at = started + delay if delay is not None else None
+        futures: Dict[Future[Tuple[T, float]], bool] = {executor.submit(_timed, func): False}
+        error: Optional[Exception] = None
+        while futures:
+            wake = min((t for t in (hedge_at, deadline) if t is not None), default=None)
+            timeout = None if wake is None else max(0.0, wake - time.monotonic())
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                is_hedge = futures.pop(future)
+                try:
+                    result, elapsed = future.result()
+                except Exception as exc:  # noqa: BLE001 - re-raised below if nothing wins
+                    error = error or exc
+                    continue
+                self._record_win(elapsed, is_hedge, doc_id)
+                return result
+            now = time.monotonic()
+            if futures and deadline is not None and now >= deadline:
+                raise self._deadline_error(started, doc_id)
+            if futures and hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                if self._budget.try_spend():
+                    futures[executor.submit(_timed, func)] = True
+                    self._record_hedge(now - started, doc_id)
+        raise error
+
+    async def call_async(
+        self,
+        func: Callable[[], Awaitable[T]],
+        *,
+        deadline: Optional[float] = None,
+        doc_id: Optional[str] = None,
+    ) -> T:
+        """Asynchronous counterpart of :meth:`call`; losing attempts are cancelled."""
+
+        self._budget.record_attempt()
+        started = time.monotonic()
+        delay = self.hedge_delay()
+        hedge_at = started + delay if delay is not None else None
+        tasks: Dict[asyncio.Task[Tuple[T, float]], bool] = {
+            asyncio.ensure_future(_timed_async(func)): False
+        }
+        error: Optional[Exception] = None
+        try:
+            while tasks:
+                wake = min((t for t in (hedge_at, deadline) if t is not None), default=None)
+                timeout = None if wake is None else max(0.0, wake - time.monotonic())
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    is_hedge = tasks.pop(task)
+                    try:
+                        result, elapsed = task.result()
+                    except Exception as exc:  # noqa: BLE001 - re-raised below if nothing wins
+                        error = error or exc
+                        continue
+                    self._record_win(elapsed, is_hedge, doc_id)
+                    return result
+                now = time.monotonic()
+                if tasks and deadline is not None and now >= deadline:
+                    raise self._deadline_error(started, doc_id)
+                if tasks and hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    if self._budget.try_spend():
+                        tasks[asyncio.ensure_future(_timed_async(func))] = True
+                        self._record_hedge(now - started, doc_id)
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _pool(self) -> _ElasticPool:
+        with self._lock:
+            if self._executor is None:
+                self._executor = _ElasticPool(self._max_workers, name="docvqa-hedge")
+            return self._executor
+
+    def _record_win(self, elapsed: float, is_hedge: bool, doc_id: Optional[str]) -> None:
+        self._tracker.record(elapsed)
+        if is_hedge:
+            with self._lock:
+                self.hedge_wins += 1
+            self._logger.info("hedge_won", doc_id=doc_id, latency_seconds=round(elapsed, 3))
+
+    def _record_hedge(self, waited: float, doc_id: Optional[str]) -> None:
+        with self._lock:
+            self.hedged += 1
+        self._logger.info("request_hedged", doc_id=doc_id, after_seconds=round(waited, 3))
+
+    def _deadline_error(self, started: float, doc_id: Optional[str]) -> DeadlineExceededError:
+        waited = time.monotonic() - started
+        self._logger.warning("document_deadline_exceeded", doc_id=doc_id, waited_seconds=waited)
+        msg = f"Document deadline exceeded after {waited:.1f}s"
+        return DeadlineExceededError(msg)
+
+
+_Work = Tuple[Future, Callable[[], object]]
+
+
+class _ElasticPool:
+    """Thread pool that never queues: work goes to an idle thread or to a new one.
+
+    A fixed-size executor lets attempts stuck past their deadline occupy every worker, so new
+    attempts and hedges wait in its queue instead of starting on time. Here a thread blocked
+    on a slow call costs only itself; at most ``max_idle`` finished threads are kept.
+    """
+
+    def __init__(self, max_idle: int, *, name: str) -> None:
+        self._max_idle = max_idle
+        self._name = name
+        self._work: queue.SimpleQueue[Optional[_Work]] = queue.SimpleQueue()
+        self._idle = 0
+        self._spawned = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., T], *args: object) -> Future[T]:
+        future: Future[T] = Future()
+        work: _Work = (future, lambda: func(*args))
+        with self._lock:
+            if self._closed:
+                msg = "cannot submit to a pool that has been shut down"
+                raise RuntimeError(msg)
+            if self._idle:
+                self._idle -= 1
+                self._work.put(work)
+                return future
+            self._spawned += 1
+            name = f"{self._name}_{self._spawned}"
+        threading.Thread(target=self._worker, args=(work,), name=name, daemon=True).start()
+        return future
+
+    def shutdown(self) -> None:
+        """Stop idle threads; running ones exit once their work finishes."""
+
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, 0
+        for _ in range(idle):
+            self._work.put(None)
+
+    def _worker(self, work: Optional[_Work]) -> None:
+        while work is not None:
+            future, call = work
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(call())
+                except BaseException as exc:  # noqa: BLE001 - delivered through the future
+                    future.set_exception(exc)
+            del work, future, call
+            with self._lock:
+                if self._closed or self._idle >= self._max_idle:
+                    return
+                self._idle += 1
+            work = self._work.get()
+
+
+def _timed(func: Callable[[], T]) -> Tuple[T, float]:
+    started = time.monotonic()
+    return func(), time.monotonic() - started
+
+
+async def _timed_async(func: Callable[[], Awaitable[T]]) -> Tuple[T, float]:
+    started = time.monotonic()
+    return await func(), time.monotonic() - started
+
+
+__all__ = ["DeadlineExceededError", "Hedger", "LatencyTracker"]
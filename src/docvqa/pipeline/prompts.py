@@ -2,14 +2,33 @@ from __future__ import annotations
 
 """Prompt generation utilities."""
 
-from typing import List
+import json
+from typing import Any, Dict, List, Mapping, Sequence
 
 from docvqa.pipeline.schemas import ExtractionRequest
 
+DOCUMENT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "fields": {"type": "array"},
+        "tables": {"type": "array"},
+        "answers": {"type": "array"},
+        "warnings": {"type": "array"},
+    },
+    "required": ["summary", "fields", "tables", "answers", "warnings"],
+}
+
 
 def build_prompt(request: ExtractionRequest) -> str:
     """Create a prompt instructing the LLM to extract document data."""
 
+    return "\n".join([*prompt_instructions(request), *_document_lines(request)])
+
+
+def prompt_instructions(request: ExtractionRequest) -> List[str]:
+    """The instructions of :func:`build_prompt`, without the document-specific lines."""
+
     instructions: List[str] = [
         "You receive a document and optional questions from the DocVQA dataset.",
         "Return a JSON object with keys: summary, fields, tables, answers, warnings.",
@@ -17,13 +36,50 @@ def build_prompt(request: ExtractionRequest) -> str:
     ]
     if request.questions:
         instructions.append("Answer the provided questions and include them in the answers array.")
-    instructions.append("Document path: {path}".format(path=request.document_path))
-    if request.metadata:
-        instructions.append(f"Metadata: {request.metadata}")
-    if request.questions:
-        instructions.append(f"Questions: {request.questions}")
+    return instructions
+
+
+def batch_response_schema(keys: Sequence[str]) -> Dict[str, Any]:
+    """JSON schema of a batched response: one extraction object per document key."""
+
+    return {
+        "type": "object",
+        "properties": {key: DOCUMENT_SCHEMA for key in keys},
+        "required": list(keys),
+    }
+
+
+def build_batch_prompt(requests: Mapping[str, ExtractionRequest]) -> str:
+    """Create one prompt covering several documents, each identified by its key.
+
+    The shared instructions are sent once; the model answers with an object keyed like
+    ``requests`` so the response can be split back into per-document results.
+    """
+
+    instructions: List[str] = [
+        "You receive several documents, each with optional questions, from the DocVQA dataset.",
+        "Return a JSON object with exactly one entry per document key listed below.",
+        "Each entry is an object with keys: summary, fields, tables, answers, warnings.",
+        "Use empty lists when information is missing and answer each document's questions in "
+        "its own answers array.",
+        f"Response schema: {json.dumps(batch_response_schema(list(requests)))}",
+    ]
+    for key, request in requests.items():
+        instructions.append(f"=== Document key: {key} ===")
+        instructions.extend(_document_lines(request))
 
     return "\n".join(instructions)
 
 
-__all__ = ["build_prompt"]
+def _document_lines(request: ExtractionRequest) -> List[str]:
+    lines = ["Document path: {path}".format(path=request.document_path)]
+    if request.metadata:
+        lines.append(f"Metadata: {request.metadata}")
+    if request.questions:
+        lines.append(f"Questions: {request.questions}")
+    if request.text:
+        lines.append(f"Document text:\n{request.text}")
+    return lines
+
+
+__all__ = ["batch_response_schema", "build_batch_prompt", "build_prompt", "prompt_instructions"]
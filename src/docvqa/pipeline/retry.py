@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+"""Retry policy with jittered exponential backoff and a run-wide retry budget."""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from docvqa.config.models import PipelineConfig
+from docvqa.extractors.base import TransientExtractionError
+from docvqa.utils.logging import get_logger
+from docvqa.utils.metrics import get_metrics
+
+T = TypeVar("T")
+
+
+class RetryBudget:
+    """Caps retries at a fraction of first attempts across the whole run.
+
+    Every first attempt deposits ``ratio`` tokens and every retry withdraws one. A small
+    reserve lets the first few failures retry before any deposits exist; the balance is capped
+    so a long healthy stretch cannot bank an unbounded burst of retries.
+    """
+
+    def __init__(self, ratio: float, *, reserve: float = 10.0, capacity: float = 100.0) -> None:
+        self._ratio = ratio
+        self._capacity = max(capacity, reserve)
+        self._balance = reserve
+        self._lock = threading.Lock()
+
+    def record_attempt(self) -> None:
+        with self._lock:
+            self._balance = min(self._capacity, self._balance + self._ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._balance < 1.0:
+                return False
+            self._balance -= 1.0
+            return True
+
+
+class RetryPolicy:
+    """Retries transient extraction failures with full-jitter exponential backoff.
+
+    Only :class:`TransientExtractionError` is retried. A server-provided ``Retry-After`` acts as
+    a floor for the delay. When the shared :class:`RetryBudget` is exhausted the failure is
+    surfaced immediately instead of adding load to a degraded provider. A ``deadline`` passed to
+    :meth:`call` stops retrying once the next attempt could not start before it.
+    """
+
+    def __init__(
+        self,
+        attempts: int,
+        backoff_seconds: float,
+        *,
+        max_backoff_seconds: float = 30.0,
+        budget: Optional[RetryBudget] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self._attempts = attempts
+        self._backoff_seconds = backoff_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self._budget = budget
+        self._sleep = sleep
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._logger = get_logger(__name__)
+        self._listeners: List[Callable[[TransientExtractionError], None]] = []
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    @classmethod
+    def from_config(cls, config: PipelineConfig) -> "RetryPolicy":
+        return cls(
+            config.retry_attempts,
+            config.retry_backoff_seconds,
+            max_backoff_seconds=config.retry_max_backoff_seconds,
+            budget=RetryBudget(config.retry_budget_ratio),
+        )
+
+    def subscribe(self, listener: Callable[[TransientExtractionError], None]) -> None:
+        """Call ``listener`` for every transient failure, including ones that get retried."""
+
+        self._listeners.append(listener)
+
+    def call(
+        self,
+        func: Callable[[], T],
+        *,
+        doc_id: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """Invoke ``func`` and retry it while failures are transient and budget remains.
+
+        ``deadline`` is a :func:`time.monotonic` timestamp for the whole document.
+        """
+
+        if self._budget is not None:
+            self._budget.record_attempt()
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except TransientExtractionError as exc:
+                delay = self._next_delay(exc, attempt, doc_id, deadline)
+                if delay is None:
+                    raise
+            self._sleep(delay)
+            attempt += 1
+
+    async def call_async(
+        self,
+        func: Callable[[], Awaitable[T]],
+        *,
+        doc_id: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """Asynchronous counterpart of :meth:`call` that backs off with ``asyncio.sleep``."""
+
+        if self._budget is not None:
+            self._budget.record_attempt()
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except TransientExtractionError as exc:
+                delay = self._next_delay(exc, attempt, doc_id, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _next_delay(
+        self,
+        exc: TransientExtractionError,
+        attempt: int,
+        doc_id: Optional[str],
+        deadline: Optional[float] = None,
+    ) -> Optional[float]:
+        """Return the delay before the next attempt, or ``None`` to give up."""
+
+        for listener in self._listeners:
+            listener(exc)
+        if attempt >= self._attempts:
+            return None
+        delay = self.backoff(attempt, exc.retry_after)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            self._logger.warning("retry_deadline_reached", doc_id=doc_id, error=str(exc))
+            return None
+        if self._budget is not None and not self._budget.try_spend():
+            with self._lock:
+                self.budget_exhausted += 1
+            self._logger.warning("retry_budget_exhausted", doc_id=doc_id, error=str(exc))
+            return None
+        with self._lock:
+            self.retries += 1
+        get_metrics().retries.inc(status_code=exc.status_code or "none")
+        self._logger.warning(
+            "extraction_retry",
+            doc_id=doc_id,
+            attempt=attempt + 1,
+            delay_seconds=round(delay, 3),
+            status_code=exc.status_code,
+            error=str(exc),
+        )
+        return delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the delay before retry number ``attempt + 1``."""
+
+        ceiling = min(self._max_backoff_seconds, self._backoff_seconds * (2**attempt))
+        delay = ceiling * self._rng()
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self._max_backoff_seconds))
+        return delay
+
+
+__all__ = ["RetryBudget", "RetryPolicy"]
@@ -2,16 +2,36 @@ from __future__ import annotations
 
 """Pipeline orchestration."""
 
-from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import asyncio
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from functools import partial
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 
-from docvqa.config.models import PipelineConfig
-from docvqa.data.dataset import DocVQADataset
-from docvqa.extractors.base import BaseExtractor, ExtractionError
-from docvqa.pipeline.schemas import ExtractionResult
-from docvqa.storage.base import BaseStorage
+from docvqa.config.models import PipelineConfig, PipelineEngine
+from docvqa.data.dataset import DocumentExample, DocVQADataset
+from docvqa.extractors.base import (
+    BaseExtractor,
+    ExtractionError,
+    ExtractionOutcome,
+    TransientExtractionError,
+)
+from docvqa.pipeline.adaptive import AdaptiveConcurrencyController
+from docvqa.pipeline.checkpoint import CheckpointIndex
+from docvqa.pipeline.hedging import Hedger
+from docvqa.pipeline.retry import RetryPolicy
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.base import BaseStorage, StorageWriteError
 from docvqa.utils.logging import get_logger
+from docvqa.utils.metrics import get_metrics
 
 
 @dataclass
@@ -21,10 +41,28 @@ class PipelineStats:
     processed: int = 0
     succeeded: int = 0
     failed: int = 0
+    retries: int = 0
+    hedged: int = 0
+    concurrency: int = 0
 
 
 class PipelineRunner:
-    """Coordinates dataset iteration, extraction, and persistence."""
+    """Coordinates dataset iteration, extraction, and persistence.
+
+    With the ``processes`` engine, extraction is split into the extractor's network-bound
+    :meth:`~BaseExtractor.fetch`, still run by the worker threads, and its CPU-bound
+    :meth:`~BaseExtractor.parse`, which runs in a process pool. Each worker process builds its
+    own extractor once from the picklable ``extractor_factory``, so only requests and payloads
+    cross the process boundary.
+
+    When the extractor's ``batch_size`` is above 1, documents are submitted in groups of that
+    size through :meth:`~BaseExtractor.from_examples`. A failing group is retried as a whole;
+    documents that come back with a transient error are then retried one by one.
+
+    With ``hedge_percentile`` or ``document_deadline_seconds`` set, single-document attempts run
+    through a :class:`~docvqa.pipeline.hedging.Hedger`; the deadline also bounds retries of
+    batched groups.
+    """
 
     def __init__(
         self,
@@ -32,65 +70,423 @@ class PipelineRunner:
         extractor: BaseExtractor,
         storage: BaseStorage,
         config: PipelineConfig,
+        *,
+        retry_policy: Optional[RetryPolicy] = None,
+        checkpoint: Optional[CheckpointIndex] = None,
+        extractor_factory: Optional[Callable[[], BaseExtractor]] = None,
     ) -> None:
+        if config.engine == PipelineEngine.PROCESSES and extractor_factory is None:
+            msg = "The processes engine needs an extractor_factory to build worker extractors."
+            raise ValueError(msg)
         self._dataset = dataset
         self._extractor = extractor
         self._storage = storage
         self._config = config
+        self._retry = retry_policy or RetryPolicy.from_config(config)
+        self._checkpoint = checkpoint
+        self._extractor_factory = extractor_factory
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._hedger = Hedger.from_config(config, max_workers=config.concurrency * 2)
         self._logger = get_logger(__name__)
+        self._lost = 0
+        self._controller: Optional[AdaptiveConcurrencyController] = None
+        if config.adaptive_concurrency and config.concurrency > 1:
+            self._controller = AdaptiveConcurrencyController(
+                minimum=config.min_concurrency,
+                maximum=config.concurrency,
+                latency_target_seconds=config.latency_target_seconds,
+            )
+            self._retry.subscribe(lambda _exc: self._controller.on_overload())
 
     def run(self) -> PipelineStats:
-        stats = PipelineStats()
+        try:
+            if self._config.engine != PipelineEngine.PROCESSES:
+                return self._run()
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self._config.process_workers,
+                initializer=_init_parse_worker,
+                initargs=(self._extractor_factory,),
+            )
+            try:
+                return self._run()
+            finally:
+                self._parse_pool.shutdown(wait=True)
+                self._parse_pool = None
+        finally:
+            if self._hedger is not None:
+                self._hedger.shutdown()
+
+    def _run(self) -> PipelineStats:
         if self._config.concurrency <= 1:
-            for example in self._dataset:
-                stats.processed += 1
-                try:
-                    result = self._extractor.from_example(example)
-                except ExtractionError as exc:
-                    stats.failed += 1
-                    self._logger.error("extraction_failed", doc_id=example.doc_id, error=str(exc))
-                    continue
-                self._storage.write(result)
-                stats.succeeded += 1
+            stats = PipelineStats()
+            for examples in self._batches():
+                stats.processed += len(examples)
+                self._record(examples, self._extract_batch(examples), stats)
         else:
             stats = self._run_concurrent()
-
-        self._storage.finalize()
-        self._logger.info(
-            "pipeline_completed",
-            processed=stats.processed,
-            succeeded=stats.succeeded,
-            failed=stats.failed,
+        stats.concurrency = (
+            self._controller.limit if self._controller is not None else self._config.concurrency
         )
+
+        with get_metrics().time("storage_commit", provider=self._extractor.name):
+            lost = commit_storage(self._storage.finalize, self._checkpoint, self._logger)
+            self._lost += len(lost)
+        count_lost(stats, self._lost)
+        stats.retries = self._retry.retries
+        stats.hedged = self._hedger.hedged if self._hedger is not None else 0
+        log_completion(self._logger, stats)
         return stats
 
+    def _persist(self, result: ExtractionResult) -> None:
+        metrics = get_metrics()
+        with metrics.time("storage_write", provider=self._extractor.name):
+            self._storage.write(result)
+        if self._checkpoint is None:
+            return
+        self._checkpoint.record(result.doc_id)
+        if self._checkpoint.pending >= self._config.checkpoint_every:
+            with metrics.time("storage_commit", provider=self._extractor.name):
+                lost = commit_storage(self._storage.flush, self._checkpoint, self._logger)
+                self._lost += len(lost)
+
+    def _extract(self, example: DocumentExample) -> ExtractionResult:
+        parse = self._parse_remote if self._parse_pool is not None else None
+        deadline = self._deadline()
+
+        def attempt() -> ExtractionResult:
+            extract = partial(self._extractor.from_example, example, parse=parse)
+            if self._hedger is None:
+                return extract()
+            return self._hedger.call(extract, deadline=deadline, doc_id=example.doc_id)
+
+        return self._retry.call(attempt, doc_id=example.doc_id, deadline=deadline)
+
+    def _deadline(self) -> Optional[float]:
+        seconds = self._config.document_deadline_seconds
+        return time.monotonic() + seconds if seconds is not None else None
+
+    def _extract_batch(self, examples: List[DocumentExample]) -> List[ExtractionOutcome]:
+        if len(examples) == 1:
+            try:
+                return [self._extract(examples[0])]
+            except ExtractionError as exc:
+                return [exc]
+        try:
+            outcomes = self._retry.call(
+                lambda: self._extractor.from_examples(examples),
+                doc_id=examples[0].doc_id,
+                deadline=self._deadline(),
+            )
+        except ExtractionError as exc:
+            return [exc] * len(examples)
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, TransientExtractionError):
+                try:
+                    outcomes[index] = self._extract(examples[index])
+                except ExtractionError as exc:
+                    outcomes[index] = exc
+        return outcomes
+
+    def _batches(self) -> Iterator[List[DocumentExample]]:
+        examples = get_metrics().timed_iter(
+            self._dataset, "dataset_read", provider=self._extractor.name
+        )
+        size = self._extractor.batch_size
+        while True:
+            batch = list(islice(examples, size))
+            if not batch:
+                return
+            yield batch
+
+    def _record(
+        self,
+        examples: List[DocumentExample],
+        outcomes: List[ExtractionOutcome],
+        stats: PipelineStats,
+    ) -> None:
+        documents = get_metrics().documents
+        for example, outcome in zip(examples, outcomes):
+            if isinstance(outcome, ExtractionError):
+                stats.failed += 1
+                documents.inc(provider=self._extractor.name, outcome="failed")
+                self._logger.error("extraction_failed", doc_id=example.doc_id, error=str(outcome))
+                continue
+            self._persist(outcome)
+            stats.succeeded += 1
+            documents.inc(provider=self._extractor.name, outcome="succeeded")
+
+    def _parse_remote(self, request: ExtractionRequest, payload: Any) -> ExtractionResult:
+        outcome, metrics = self._parse_pool.submit(_parse_in_worker, request, payload).result()
+        get_metrics().merge(metrics)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
     def _run_concurrent(self) -> PipelineStats:
+        """Extract concurrently while keeping at most ``max_in_flight`` tasks outstanding.
+
+        A task is one document, or one group of ``batch_size`` documents. The dataset iterator
+        is only advanced as completed results drain, so memory stays bounded by the window
+        rather than the manifest size and results reach storage as soon as they finish. In
+        adaptive mode the window is the controller's current limit.
+        """
+
         stats = PipelineStats()
+        max_in_flight = self._config.max_in_flight or self._config.concurrency * 2
+        batches = self._batches()
+        exhausted = False
+        limit = self._controller.limit if self._controller is not None else max_in_flight
         with ThreadPoolExecutor(max_workers=self._config.concurrency) as executor:
-            futures: dict[Future[ExtractionResult], str] = {}
-            for example in self._dataset:
-                stats.processed += 1
+            pending: dict[
+                Future[List[ExtractionOutcome]], tuple[List[DocumentExample], float]
+            ] = {}
+            while True:
+                while not exhausted and len(pending) < limit:
+                    examples = next(batches, None)
+                    if examples is None:
+                        exhausted = True
+                        break
+                    stats.processed += len(examples)
+                    future = executor.submit(self._extract_batch, examples)
+                    pending[future] = (examples, time.monotonic())
 
-                def _task(ex=example):
-                    return self._extractor.from_example(ex)
+                if not pending:
+                    break
 
-                futures[executor.submit(_task)] = example.doc_id
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    examples, started = pending.pop(future)
+                    try:
+                        outcomes = future.result()
+                    except Exception as exc:  # pragma: no cover - unexpected
+                        stats.failed += len(examples)
+                        get_metrics().documents.inc(
+                            len(examples), provider=self._extractor.name, outcome="failed"
+                        )
+                        for example in examples:
+                            self._logger.error(
+                                "unexpected_failure", doc_id=example.doc_id, error=str(exc)
+                            )
+                        continue
+                    if self._controller is not None and not any(
+                        isinstance(outcome, ExtractionError) for outcome in outcomes
+                    ):
+                        self._controller.on_success(time.monotonic() - started)
+                    self._record(examples, outcomes, stats)
 
-            for future in as_completed(futures):
-                doc_id = futures[future]
-                try:
-                    result = future.result()
-                except ExtractionError as exc:
-                    stats.failed += 1
-                    self._logger.error("extraction_failed", doc_id=doc_id, error=str(exc))
-                    continue
-                except Exception as exc:  # pragma: no cover - unexpected
-                    stats.failed += 1
-                    self._logger.error("unexpected_failure", doc_id=doc_id, error=str(exc))
-                    continue
-                self._storage.write(result)
-                stats.succeeded += 1
+                if self._controller is not None and self._controller.limit != limit:
+                    limit = self._controller.limit
+                    self._logger.info("concurrency_adjusted", concurrency=limit)
+        return stats
+
+
+class AsyncPipelineRunner:
+    """Coordinates extraction on a single asyncio event loop.
+
+    At most ``async_concurrency`` documents are in flight and the dataset is only advanced once
+    a slot frees up. Storage writes are awaited one at a time so backends see serialized calls.
+    """
+
+    def __init__(
+        self,
+        dataset: DocVQADataset,
+        extractor: BaseExtractor,
+        storage: BaseStorage,
+        config: PipelineConfig,
+        *,
+        retry_policy: Optional[RetryPolicy] = None,
+        checkpoint: Optional[CheckpointIndex] = None,
+    ) -> None:
+        self._dataset = dataset
+        self._extractor = extractor
+        self._storage = storage
+        self._config = config
+        self._retry = retry_policy or RetryPolicy.from_config(config)
+        self._checkpoint = checkpoint
+        self._hedger = Hedger.from_config(config, max_workers=1)
+        self._logger = get_logger(__name__)
+        self._lost = 0
+
+    def run(self) -> PipelineStats:
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> PipelineStats:
+        stats = PipelineStats()
+        slots = asyncio.Semaphore(self._config.async_concurrency)
+        write_lock = asyncio.Lock()
+        tasks: set[asyncio.Task[None]] = set()
+        try:
+            examples = get_metrics().timed_iter(
+                self._dataset, "dataset_read", provider=self._extractor.name
+            )
+            for example in examples:
+                await slots.acquire()
+                stats.processed += 1
+                task = asyncio.create_task(self._process(example, stats, slots, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await self._extractor.aclose()
+
+        stats.concurrency = self._config.async_concurrency
+        with get_metrics().time("storage_commit", provider=self._extractor.name):
+            lost = await commit_storage_async(
+                self._storage.finalize_async, self._checkpoint, self._logger
+            )
+            self._lost += len(lost)
+        count_lost(stats, self._lost)
+        stats.retries = self._retry.retries
+        stats.hedged = self._hedger.hedged if self._hedger is not None else 0
+        log_completion(self._logger, stats)
         return stats
 
+    async def _persist(self, result: ExtractionResult) -> None:
+        metrics = get_metrics()
+        with metrics.time("storage_write", provider=self._extractor.name):
+            await self._storage.write_async(result)
+        if self._checkpoint is None:
+            return
+        self._checkpoint.record(result.doc_id)
+        if self._checkpoint.pending >= self._config.checkpoint_every:
+            with metrics.time("storage_commit", provider=self._extractor.name):
+                lost = await asyncio.to_thread(
+                    commit_storage, self._storage.flush, self._checkpoint, self._logger
+                )
+                self._lost += len(lost)
+
+    async def _process(
+        self,
+        example: DocumentExample,
+        stats: PipelineStats,
+        slots: asyncio.Semaphore,
+        write_lock: asyncio.Lock,
+    ) -> None:
+        seconds = self._config.document_deadline_seconds
+        deadline = time.monotonic() + seconds if seconds is not None else None
+        documents = get_metrics().documents
+
+        async def attempt() -> ExtractionResult:
+            extract = partial(self._extractor.from_example_async, example)
+            if self._hedger is None:
+                return await extract()
+            return await self._hedger.call_async(extract, deadline=deadline, doc_id=example.doc_id)
+
+        try:
+            result = await self._retry.call_async(
+                attempt, doc_id=example.doc_id, deadline=deadline
+            )
+        except ExtractionError as exc:
+            stats.failed += 1
+            documents.inc(provider=self._extractor.name, outcome="failed")
+            self._logger.error("extraction_failed", doc_id=example.doc_id, error=str(exc))
+            return
+        except Exception as exc:  # pragma: no cover - unexpected
+            stats.failed += 1
+            documents.inc(provider=self._extractor.name, outcome="failed")
+            self._logger.error("unexpected_failure", doc_id=example.doc_id, error=str(exc))
+            return
+        else:
+            async with write_lock:
+                await self._persist(result)
+            stats.succeeded += 1
+            documents.inc(provider=self._extractor.name, outcome="succeeded")
+        finally:
+            slots.release()
+
+
+_WORKER_EXTRACTOR: Optional[BaseExtractor] = None
+
+
+def _init_parse_worker(factory: Callable[[], BaseExtractor]) -> None:
+    global _WORKER_EXTRACTOR
+    _WORKER_EXTRACTOR = factory()
+
+
+def _parse_in_worker(
+    request: ExtractionRequest, payload: Any
+) -> Tuple[ExtractionOutcome, Dict[str, Any]]:
+    """Parse in a worker process, returning the outcome with the metrics recorded for it.
+
+    The worker's registry is never exported, so its stage timings travel back with each outcome
+    and are merged into the parent's; a parse error is returned rather than raised for the
+    same reason.
+    """
+
+    try:
+        outcome: ExtractionOutcome = _WORKER_EXTRACTOR.parse(request, payload)
+    except Exception as exc:
+        outcome = exc
+    return outcome, get_metrics().drain()
+
+
+def commit_storage(
+    flush: Callable[[], None], checkpoint: Optional[CheckpointIndex], logger
+) -> List[str]:
+    """Run a storage ``flush`` or ``finalize``, then checkpoint the results it persisted.
+
+    Returns the ids storage reported as lost. They are left out of the checkpoint, so a resumed
+    run extracts them again.
+    """
+
+    lost: List[str] = []
+    try:
+        flush()
+    except StorageWriteError as exc:
+        lost = exc.doc_ids
+        logger.error("storage_write_failed", count=len(lost), doc_ids=lost[:20])
+    if checkpoint is not None:
+        checkpoint.discard(lost)
+        checkpoint.flush()
+    return lost
+
+
+async def commit_storage_async(
+    finalize: Callable[[], Awaitable[None]], checkpoint: Optional[CheckpointIndex], logger
+) -> List[str]:
+    """Asynchronous counterpart of :func:`commit_storage`."""
+
+    lost: List[str] = []
+    try:
+        await finalize()
+    except StorageWriteError as exc:
+        lost = exc.doc_ids
+        logger.error("storage_write_failed", count=len(lost), doc_ids=lost[:20])
+    if checkpoint is not None:
+        checkpoint.discard(lost)
+        await asyncio.to_thread(checkpoint.flush)
+    return lost
+
+
+def count_lost(stats: PipelineStats, lost: int) -> None:
+    """Move ``lost`` results, counted as succeeded when handed to storage, to the failures."""
+
+    stats.succeeded -= lost
+    stats.failed += lost
+
+
+def log_completion(logger, stats: PipelineStats) -> None:
+    """Log the final ``stats`` of a run together with the metrics summary."""
+
+    logger.info(
+        "pipeline_completed",
+        processed=stats.processed,
+        succeeded=stats.succeeded,
+        failed=stats.failed,
+        retries=stats.retries,
+        hedged=stats.hedged,
+        concurrency=stats.concurrency,
+        metrics=get_metrics().summary(),
+    )
+
 
-__all__ = ["PipelineRunner", "PipelineStats"]
+__all__ = [
+    "AsyncPipelineRunner",
+    "PipelineRunner",
+    "PipelineStats",
+    "commit_storage",
+    "commit_storage_async",
+    "count_lost",
+    "log_completion",
+]
@@ -15,6 +15,7 @@ class ExtractionRequest(BaseModel):
     document_path: Path
     questions: Optional[List[str]] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    text: Optional[str] = Field(None, description="Document text loaded for the prompt.")
 
 
 class ExtractionResult(BaseModel):
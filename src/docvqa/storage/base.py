@@ -2,11 +2,25 @@ from __future__ import annotations
 
 """Abstract storage writers for pipeline outputs."""
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Iterable
 
 from docvqa.pipeline.schemas import ExtractionResult
 
 
+class StorageWriteError(RuntimeError):
+    """Raised by :meth:`BaseStorage.flush` or ``finalize`` when results could not be persisted.
+
+    ``doc_ids`` lists the lost results so the runner can keep them out of the checkpoint and a
+    resumed run extracts them again.
+    """
+
+    def __init__(self, doc_ids: Iterable[str]) -> None:
+        self.doc_ids = list(doc_ids)
+        super().__init__(f"{len(self.doc_ids)} results could not be persisted")
+
+
 class BaseStorage(ABC):
     """Interface implemented by storage backends."""
 
@@ -14,8 +28,30 @@ class BaseStorage(ABC):
     def write(self, result: ExtractionResult) -> None:
         """Persist a single extraction result."""
 
+    def flush(self) -> None:  # noqa: B027 - optional hook, backends without buffering skip it
+        """Make results written so far durable; called before checkpointing their ids.
+
+        Raises :class:`StorageWriteError` for results that failed to persist since the last
+        flush. The default does nothing, for backends that persist on :meth:`write`.
+        """
+
+        return None
+
     def finalize(self) -> None:
-        """Hook invoked once the pipeline completes."""
+        """Hook invoked once the pipeline completes; raises like :meth:`flush`."""
+
+    async def write_async(self, result: ExtractionResult) -> None:
+        """Persist a result from the asyncio engine without blocking the event loop.
+
+        The engine awaits writes one at a time, so backends need not be thread-safe.
+        """
+
+        await asyncio.to_thread(self.write, result)
+
+    async def finalize_async(self) -> None:
+        """Asynchronous counterpart of :meth:`finalize`."""
+
+        await asyncio.to_thread(self.finalize)
 
 
-__all__ = ["BaseStorage"]
+__all__ = ["BaseStorage", "StorageWriteError"]
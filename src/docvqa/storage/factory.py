@@ -2,26 +2,76 @@ from __future__ import annotations
 
 """Factory helpers for storage backends."""
 
+from datetime import datetime
 from typing import Optional
 
-from docvqa.config.models import StorageConfig, StorageProvider
+from docvqa.config.models import ParquetConfig, StorageConfig, StorageProvider
 from docvqa.storage.base import BaseStorage
-from docvqa.storage.firestore import FirestoreWriter
-from docvqa.storage.local import LocalJSONWriter
 
 
-def create_storage(config: StorageConfig, *, run_id: Optional[str] = None) -> BaseStorage:
-    """Instantiate a storage backend based on configuration."""
+def create_storage(
+    config: StorageConfig,
+    *,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    partition: Optional[str] = None,
+) -> BaseStorage:
+    """Instantiate a storage backend based on configuration.
 
+    ``resume`` continues the output of an earlier attempt of ``run_id`` instead of replacing it.
+    ``partition`` names the shard of a distributed run this process writes.
+
+    Unless ``raw_response.policy`` is ``inline``, the backend is wrapped so raw provider
+    payloads are dropped or offloaded before they are stored. Backend modules are imported
+    on demand, so only the selected backend's dependencies are loaded.
+    """
+
+    storage = _create_backend(config, run_id=run_id, resume=resume, partition=partition)
+    raw_config = config.raw_response
+    if raw_config.policy == "inline":
+        return storage
+    from docvqa.storage.raw import RawResponsePolicyStorage, RawResponseStore
+
+    store = None
+    if raw_config.policy == "offload":
+        run = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        stem = f"{run}.{partition}" if partition else run
+        store = RawResponseStore(
+            raw_config.directory,
+            stem,
+            compression=raw_config.compression,
+            level=raw_config.level,
+            resume=resume,
+        )
+    return RawResponsePolicyStorage(storage, raw_config, store=store)
+
+
+def _create_backend(
+    config: StorageConfig,
+    *,
+    run_id: Optional[str],
+    resume: bool,
+    partition: Optional[str],
+) -> BaseStorage:
     if config.provider == StorageProvider.FIRESTORE:
         if config.firestore is None:  # pragma: no cover - validated earlier
             msg = "Firestore configuration is required for firestore provider"
             raise ValueError(msg)
-        return FirestoreWriter(config.firestore, run_id=run_id)
+        from docvqa.storage.firestore import FirestoreWriter
+
+        return FirestoreWriter(config.firestore, run_id=run_id, partition=partition)
 
     if config.provider == StorageProvider.LOCAL_JSON:
+        from docvqa.storage.local import LocalJSONWriter
+
         target_config = config.local_json or config.model_fields["local_json"].default
-        return LocalJSONWriter(target_config, run_id=run_id)
+        return LocalJSONWriter(target_config, run_id=run_id, resume=resume, partition=partition)
+
+    if config.provider == StorageProvider.PARQUET:
+        from docvqa.storage.parquet import ParquetWriter
+
+        target_config = config.parquet or ParquetConfig()
+        return ParquetWriter(target_config, run_id=run_id, resume=resume, partition=partition)
 
     msg = f"Unsupported storage provider: {config.provider}"
     raise ValueError(msg)
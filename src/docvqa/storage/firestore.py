@@ -2,25 +2,231 @@ from __future__ import annotations
 
 """Firestore storage backend."""
 
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from docvqa.config.models import FirestoreConfig
 from docvqa.pipeline.schemas import ExtractionResult
-from docvqa.storage.base import BaseStorage
+from docvqa.storage.base import BaseStorage, StorageWriteError
+from docvqa.utils.logging import get_logger
 
 try:  # pragma: no cover - optional dependency
+    from google.api_core import exceptions as google_exceptions
     from google.cloud import firestore
     from google.oauth2 import service_account
 except ImportError:  # pragma: no cover - optional dependency
+    google_exceptions = None
     firestore = None
     service_account = None
 
+MAX_BATCH_WRITES = 500
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+_Item = Tuple[str, Dict[str, Any]]
+
+
+class _FlushMarker:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+_STOP = object()
+
 
 class FirestoreWriter(BaseStorage):
-    """Writes results to a Firestore collection with batched commits."""
+    """Writes results to a Firestore collection with batched commits.
+
+    By default batches are committed synchronously from the calling thread once ``batch_size``
+    results are pending. With ``background`` enabled, :meth:`write` only enqueues the result on
+    a bounded queue; a dedicated writer thread assembles batches and keeps up to
+    ``max_inflight_commits`` of them committing in parallel, so persistence never stalls
+    extraction. Transient commit failures are retried with backoff, and once the retries are
+    used up the whole batch fails. A batch rejected for any other reason is split in half until
+    the offending documents are isolated, so one bad document does not sink its neighbours.
+    Failed documents are reported by the next :meth:`flush` or :meth:`finalize` through
+    :class:`StorageWriteError`, so they never reach the checkpoint.
+
+    Shards of one run (see ``partition``) share the run's ``results`` collection, since each
+    document belongs to exactly one shard; on finalize every shard records its counts under
+    ``<run_id>/shards/<partition>`` so completeness of a distributed run can be checked.
+    """
+
+    def __init__(
+        self,
+        config: FirestoreConfig,
+        run_id: Optional[str] = None,
+        *,
+        client: Optional[Any] = None,
+        partition: Optional[str] = None,
+    ) -> None:
+        if client is None:
+            client = self._create_client(config)
+
+        self._client = client
+        self._config = config
+        self._batch_size = min(config.batch_size, MAX_BATCH_WRITES)
+        self._run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        self._run = client.collection(config.collection).document(self._run_id)
+        self._results = self._run.collection("results")
+        self._partition = partition
+        self._written = 0
+        self._logger = get_logger(__name__)
+        self._lock = threading.Lock()
+        self._pending: List[_Item] = []
+        self.failed_doc_ids: List[str] = []
+        self._unreported = 0
+
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if config.background:
+            self._queue = queue.Queue(maxsize=config.queue_size)
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.max_inflight_commits, thread_name_prefix="firestore-commit"
+            )
+            self._thread = threading.Thread(
+                target=self._writer_loop, name="firestore-writer", daemon=True
+            )
+            self._thread.start()
+
+    def write(self, result: ExtractionResult) -> None:
+        if self._queue is not None:
+            with self._lock:
+                self._written += 1
+            self._queue.put(result)
+            return
+        with self._lock:
+            self._written += 1
+            self._pending.append((result.doc_id, result.model_dump()))
+            if len(self._pending) < self._batch_size:
+                return
+            items, self._pending = self._pending, []
+        self._commit_items(items)
+
+    def flush(self) -> None:
+        self._commit_pending()
+        self._raise_failures()
 
-    def __init__(self, config: FirestoreConfig, run_id: Optional[str] = None) -> None:
+    def finalize(self) -> None:
+        self._commit_pending()
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._executor.shutdown(wait=True)
+            self._thread = None
+        if self.failed_doc_ids:
+            self._logger.error(
+                "firestore_writes_failed",
+                count=len(self.failed_doc_ids),
+                doc_ids=self.failed_doc_ids[:20],
+            )
+        if self._partition is not None:
+            self._run.collection("shards").document(self._partition).set(
+                {
+                    "written": self._written - len(self.failed_doc_ids),
+                    "failed": len(self.failed_doc_ids),
+                    "finalized_at": datetime.utcnow(),
+                }
+            )
+        self._raise_failures()
+
+    def _commit_pending(self) -> None:
+        if self._queue is not None:
+            marker = _FlushMarker()
+            self._queue.put(marker)
+            while not marker.done.wait(timeout=1.0):
+                if not self._thread.is_alive():  # pragma: no cover - defensive
+                    msg = "Firestore writer thread exited before flushing pending results."
+                    raise RuntimeError(msg)
+            return
+        with self._lock:
+            items, self._pending = self._pending, []
+        self._commit_items(items)
+
+    def _raise_failures(self) -> None:
+        with self._lock:
+            failed = self.failed_doc_ids[self._unreported :]
+            self._unreported = len(self.failed_doc_ids)
+        if failed:
+            raise StorageWriteError(failed)
+
+    def _writer_loop(self) -> None:
+        batch: List[_Item] = []
+        inflight: Set[Future[None]] = set()
+        linger = self._config.linger_seconds
+
+        def submit() -> None:
+            nonlocal batch
+            if not batch:
+                return
+            while len(inflight) >= self._config.max_inflight_commits:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                inflight.difference_update(done)
+            inflight.add(self._executor.submit(self._commit_items, batch))
+            batch = []
+
+        while True:
+            try:
+                item = self._queue.get(timeout=linger)
+            except queue.Empty:
+                submit()
+                continue
+            if item is _STOP:
+                submit()
+                wait(inflight)
+                return
+            if isinstance(item, _FlushMarker):
+                submit()
+                wait(inflight)
+                inflight.clear()
+                item.done.set()
+                continue
+            batch.append((item.doc_id, item.model_dump()))
+            if len(batch) >= self._batch_size:
+                submit()
+
+    def _commit_items(self, items: List[_Item]) -> None:
+        if not items:
+            return
+        attempt = 0
+        while True:
+            try:
+                batch = self._client.batch()
+                for doc_id, data in items:
+                    batch.set(self._results.document(doc_id), data)
+                batch.commit()
+                return
+            except Exception as exc:
+                retryable = _is_retryable(exc)
+                if retryable and attempt < self._config.commit_retries:
+                    time.sleep(self._config.commit_backoff_seconds * (2**attempt))
+                    attempt += 1
+                    continue
+                # Only a rejected document is worth isolating; splitting a batch during an
+                # outage would just multiply the retries before anything is reported.
+                if not retryable and len(items) > 1:
+                    middle = len(items) // 2
+                    self._commit_items(items[:middle])
+                    self._commit_items(items[middle:])
+                    return
+                doc_ids = [doc_id for doc_id, _ in items]
+                self._logger.error(
+                    "firestore_write_failed",
+                    count=len(doc_ids),
+                    doc_ids=doc_ids[:20],
+                    retryable=retryable,
+                    error=str(exc),
+                )
+                with self._lock:
+                    self.failed_doc_ids.extend(doc_ids)
+                return
+
+    @staticmethod
+    def _create_client(config: FirestoreConfig) -> Any:
         if firestore is None:
             msg = (
                 "google-cloud-firestore is required for FirestoreWriter. Install dependency or "
@@ -36,35 +242,17 @@ class FirestoreWriter(BaseStorage):
             credentials = service_account.Credentials.from_service_account_file(
                 str(config.credentials_path)
             )
+        return firestore.Client(project=config.project_id, credentials=credentials)
 
-        self._client = firestore.Client(project=config.project_id, credentials=credentials)
-        self._collection_name = config.collection
-        self._batch_size = config.batch_size
-        self._batch = self._client.batch()
-        self._pending = 0
-        self._run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-
-    def write(self, result: ExtractionResult) -> None:
-        doc_ref = (
-            self._client.collection(self._collection_name)
-            .document(self._run_id)
-            .collection("results")
-            .document(result.doc_id)
-        )
-        self._batch.set(doc_ref, result.model_dump())
-        self._pending += 1
-        if self._pending >= self._batch_size:
-            self._commit()
 
-    def finalize(self) -> None:
-        self._commit()
+def _is_retryable(exc: Exception) -> bool:
+    """Return whether a failed commit is worth retrying as a whole."""
 
-    def _commit(self) -> None:
-        if self._pending == 0:
-            return
-        self._batch.commit()
-        self._batch = self._client.batch()
-        self._pending = 0
+    if google_exceptions is None:  # pragma: no cover - optional dependency
+        return True
+    if isinstance(exc, google_exceptions.GoogleAPICallError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (google_exceptions.RetryError, ConnectionError, TimeoutError))
 
 
-__all__ = ["FirestoreWriter"]
+__all__ = ["FirestoreWriter", "MAX_BATCH_WRITES"]
@@ -2,36 +2,195 @@ from __future__ import annotations
 
 """Local JSON storage backend for development."""
 
-import json
+import glob
+import os
+import re
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import IO, Dict, List, Optional, Set, Tuple
 
 from docvqa.config.models import LocalJSONConfig
 from docvqa.pipeline.schemas import ExtractionResult
 from docvqa.storage.base import BaseStorage
+from docvqa.utils import codec
+
+_TAIL_CHUNK_SIZE = 64 * 1024
+_PARTITION_PATTERN = re.compile(r"shard-(\d+)-of-(\d+)\.jsonl")
 
 
 class LocalJSONWriter(BaseStorage):
-    """Accumulates results and writes them to a JSONL file."""
+    """Writes results to a JSONL file.
+
+    In streaming mode (the default) each result is appended to ``<run_id>.jsonl.partial`` as it
+    arrives and flushed on a record-count or time threshold. ``finalize`` renames the partial
+    file into place, so a complete ``<run_id>.jsonl`` only ever appears once the run finished
+    and a crash leaves every flushed record in the partial file. With streaming disabled the
+    results are buffered in memory and written out at finalize or an explicit :meth:`flush`.
+
+    A ``partition`` (one per dataset shard) is appended to the file name, giving
+    ``<run_id>.<partition>.jsonl``; :func:`merge_partitions` combines them afterwards.
 
-    def __init__(self, config: LocalJSONConfig, run_id: Optional[str] = None) -> None:
+    With ``resume`` the writer appends to the output of an earlier attempt of the same run,
+    dropping a torn final line if the previous process died mid-write.
+    """
+
+    def __init__(
+        self,
+        config: LocalJSONConfig,
+        run_id: Optional[str] = None,
+        *,
+        resume: bool = False,
+        partition: Optional[str] = None,
+    ) -> None:
         self._config = config
         self._config.output_dir.mkdir(parents=True, exist_ok=True)
         self._run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        stem = f"{self._run_id}.{partition}" if partition else self._run_id
+        self._output_path = self._config.output_dir / f"{stem}.jsonl"
+        self._partial_path = self._output_path.with_name(f"{self._output_path.name}.partial")
         self._buffer: List[ExtractionResult] = []
+        self._handle: Optional[IO[str]] = None
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._resume = resume
+        if resume:
+            self._prepare_resume()
+
+    @property
+    def output_path(self) -> Path:
+        """Final location of the JSONL file once the run is finalized."""
+
+        return self._output_path
 
     def write(self, result: ExtractionResult) -> None:
-        self._buffer.append(result)
+        if not self._config.streaming:
+            self._buffer.append(result)
+            return
+
+        handle = self._open()
+        handle.write(self._serialize(result))
+        handle.write("\n")
+        self._unflushed += 1
+        if (
+            self._unflushed >= self._config.flush_every
+            or time.monotonic() - self._last_flush >= self._config.flush_interval_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Push buffered records to the operating system, honouring the fsync policy."""
+
+        self._drain_buffer()
+        if self._handle is None:
+            return
+        self._handle.flush()
+        if self._config.fsync == "flush":
+            os.fsync(self._handle.fileno())
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
 
     def finalize(self) -> None:
+        self._drain_buffer()
+        if self._handle is not None:
+            self._handle.flush()
+            if self._config.fsync != "never":
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+        elif not (self._resume and self._partial_path.exists()):
+            return
+        os.replace(self._partial_path, self._output_path)
+
+    def _drain_buffer(self) -> None:
         if not self._buffer:
             return
-        output_path = self._config.output_dir / f"{self._run_id}.jsonl"
-        with output_path.open("w", encoding="utf-8") as handle:
-            for result in self._buffer:
-                handle.write(json.dumps(result.model_dump(), indent=self._config.indent))
-                handle.write("\n")
+        handle = self._open()
+        for result in self._buffer:
+            handle.write(self._serialize(result))
+            handle.write("\n")
+        self._buffer.clear()
+
+    def _prepare_resume(self) -> None:
+        if not self._partial_path.exists():
+            if not self._output_path.exists():
+                return
+            os.replace(self._output_path, self._partial_path)
+        with self._partial_path.open("r+b") as handle:
+            size = handle.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(0, end - _TAIL_CHUNK_SIZE)
+                handle.seek(start)
+                newline = handle.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                handle.truncate(end)
+
+    def _open(self) -> IO[str]:
+        if self._handle is None:
+            mode = "a" if self._resume else "w"
+            self._handle = self._partial_path.open(mode, encoding="utf-8")
+            self._last_flush = time.monotonic()
+        return self._handle
+
+    def _serialize(self, result: ExtractionResult) -> str:
+        return codec.dump_model(result, indent=self._config.indent)
+
+
+def merge_partitions(
+    output_dir: Path, run_id: str, *, allow_partial: bool = False
+) -> Tuple[Path, int]:
+    """Combine the per-shard files of ``run_id`` into ``<run_id>.jsonl``.
+
+    Records are streamed line by line, keeping the first record seen for each ``doc_id`` (a
+    document re-processed after a crash can appear twice in one shard). Unless
+    ``allow_partial`` is set, every shard of the run must have been finalized. Returns the
+    merged path and the number of records written.
+    """
+
+    shards: Dict[int, Path] = {}
+    counts = set()
+    for path in output_dir.glob(f"{glob.escape(run_id)}.shard-*-of-*.jsonl"):
+        match = _PARTITION_PATTERN.fullmatch(path.name[len(run_id) + 1 :])
+        if match is None:
+            continue
+        shards[int(match.group(1))] = path
+        counts.add(int(match.group(2)))
+    if not shards:
+        msg = f"No shard outputs found for run {run_id} in {output_dir}"
+        raise FileNotFoundError(msg)
+    if len(counts) > 1:
+        msg = f"Shard outputs of run {run_id} disagree on the shard count: {sorted(counts)}"
+        raise ValueError(msg)
+    missing = sorted(set(range(counts.pop())) - set(shards))
+    if missing and not allow_partial:
+        msg = f"Run {run_id} is missing finalized outputs for shards {missing}"
+        raise ValueError(msg)
+
+    output_path = output_dir / f"{run_id}.jsonl"
+    partial_path = output_path.with_name(f"{output_path.name}.partial")
+    seen: Set[str] = set()
+    written = 0
+    with partial_path.open("w", encoding="utf-8") as target:
+        for index in sorted(shards):
+            with shards[index].open("r", encoding="utf-8") as source:
+                for line in source:
+                    if not line.strip():
+                        continue
+                    doc_id = codec.loads(line)["doc_id"]
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    target.write(line if line.endswith("\n") else line + "\n")
+                    written += 1
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(partial_path, output_path)
+    return output_path, written
 
 
-__all__ = ["LocalJSONWriter"]
+__all__ = ["LocalJSONWriter", "merge_partitions"]
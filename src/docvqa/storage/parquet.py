@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+"""Parquet storage backend for large runs."""
+
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from docvqa.config.models import ParquetConfig
+from docvqa.evaluation.metrics import ContentCounts
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.storage.base import BaseStorage
+from docvqa.utils import codec
+
+try:  # pragma: no cover - optional dependency
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+RAW_DIRECTORY = "raw"
+WAL_SUFFIX = ".wal.jsonl"
+
+_PART_PATTERN = re.compile(r"part-(\d+)\.parquet")
+
+
+def results_schema(raw_column: bool = False) -> "pa.Schema":
+    """Arrow schema of the results part files."""
+
+    fields = [
+        ("doc_id", pa.string()),
+        ("field_count", pa.int32()),
+        ("answer_count", pa.int32()),
+        ("table_count", pa.int32()),
+        ("summary_word_count", pa.int32()),
+        ("summary", pa.string()),
+        ("content", pa.string()),
+    ]
+    if raw_column:
+        fields.append(("raw_response", pa.string()))
+    return pa.schema(fields)
+
+
+class ParquetWriter(BaseStorage):
+    """Writes results as a directory of Parquet part files.
+
+    Each run gets ``<output_dir>/<run_id>/`` holding ``part-NNNNN.parquet`` files. Results are
+    buffered and written in row groups of ``row_group_size``; the per-document counts used by
+    ``evaluate`` and the summary are real columns, while ``content`` is stored as JSON text.
+    Raw provider responses go to ``raw/part-NNNNN.parquet`` (doc_id plus JSON) unless the
+    ``column`` mode keeps them in the results file.
+
+    A part is written as ``.partial`` and renamed into place once ``rows_per_part`` results
+    (or :meth:`finalize`) close it. Its footer is only written at that point, so until then the
+    results of the open part are also appended to ``part-NNNNN.wal.jsonl``. :meth:`flush` syncs
+    that log instead of closing the part, which keeps checkpointed ids and ``--resume`` safe
+    without cutting a run into one small part per checkpoint. A resumed writer replays the log
+    of the unfinished part and deletes it once the part is closed.
+    """
+
+    def __init__(
+        self,
+        config: ParquetConfig,
+        run_id: Optional[str] = None,
+        *,
+        resume: bool = False,
+        partition: Optional[str] = None,
+    ) -> None:
+        if pa is None:
+            msg = (
+                "pyarrow is required for ParquetWriter. Install the 'parquet' extra: "
+                "pip install docvqa[parquet]."
+            )
+            raise ImportError(msg)
+        self._config = config
+        self._run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        name = f"{self._run_id}.{partition}" if partition else self._run_id
+        self._directory = config.output_dir / name
+        self._raw_directory = self._directory / RAW_DIRECTORY
+        self._raw_column = config.raw_response == "column"
+        self._schema = results_schema(self._raw_column)
+        self._raw_schema = pa.schema([("doc_id", pa.string()), ("raw_response", pa.string())])
+        self._compression = None if config.compression == "none" else config.compression
+        self._rows: List[ExtractionResult] = []
+        self._unlogged: List[ExtractionResult] = []
+        self._part_rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._raw_writer: Optional[pq.ParquetWriter] = None
+        self._wal: Optional[BinaryIO] = None
+        self._part, log = self._prepare(resume)
+        if log is not None:
+            self._replay(log)
+
+    @property
+    def output_path(self) -> Path:
+        """Directory holding the part files of this run."""
+
+        return self._directory
+
+    def write(self, result: ExtractionResult) -> None:
+        self._rows.append(result)
+        self._unlogged.append(result)
+        self._part_rows += 1
+        if self._part_rows >= self._config.rows_per_part:
+            self._close_part()
+        elif len(self._rows) >= self._config.row_group_size:
+            self._write_row_group()
+
+    def flush(self) -> None:
+        self._log()
+        if self._wal is not None:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+
+    def finalize(self) -> None:
+        self._close_part()
+
+    def _log(self) -> None:
+        """Append the results not yet in the open part's log to it."""
+
+        if not self._unlogged:
+            return
+        if self._wal is None:
+            self._wal = self._wal_path().open("ab")
+        for result in self._unlogged:
+            self._wal.write(codec.dump_model(result).encode("utf-8"))
+            self._wal.write(b"\n")
+        self._unlogged.clear()
+
+    def _write_row_group(self) -> None:
+        if not self._rows:
+            return
+        # Rows leave memory here, so the log must hold them before they go.
+        self._log()
+        rows, self._rows = self._rows, []
+        counts = [ContentCounts.from_content(result.content) for result in rows]
+        columns: Dict[str, List[Any]] = {
+            "doc_id": [result.doc_id for result in rows],
+            "field_count": [count.fields for count in counts],
+            "answer_count": [count.answers for count in counts],
+            "table_count": [count.tables for count in counts],
+            "summary_word_count": [count.summary_words for count in counts],
+            "summary": [str(result.content.get("summary") or "") for result in rows],
+            "content": [codec.dumps(result.content) for result in rows],
+        }
+        raw = [
+            codec.dumps(result.raw_response) if result.raw_response is not None else None
+            for result in rows
+        ]
+        if self._raw_column:
+            columns["raw_response"] = raw
+        if self._writer is None:
+            self._writer = self._open(self._part_path(self._directory), self._schema)
+        self._writer.write_table(pa.table(columns, schema=self._schema))
+        if not self._raw_column:
+            if self._raw_writer is None:
+                raw_path = self._part_path(self._raw_directory)
+                self._raw_writer = self._open(raw_path, self._raw_schema)
+            raw_columns = {"doc_id": columns["doc_id"], "raw_response": raw}
+            self._raw_writer.write_table(pa.table(raw_columns, schema=self._raw_schema))
+
+    def _close_part(self) -> None:
+        # The remaining rows go straight into the closed part, so they need no log entry.
+        self._unlogged.clear()
+        self._write_row_group()
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        if self._writer is not None:
+            parts = ((self._raw_writer, self._raw_directory), (self._writer, self._directory))
+            for writer, directory in parts:
+                if writer is None:
+                    continue
+                writer.close()
+                path = self._part_path(directory)
+                os.replace(path.with_name(path.name + ".partial"), path)
+        # The log is only deleted once its results are in a closed part.
+        self._wal_path().unlink(missing_ok=True)
+        if self._writer is None:
+            return
+        self._writer = None
+        self._raw_writer = None
+        self._part_rows = 0
+        self._part += 1
+
+    def _open(self, path: Path, schema: "pa.Schema") -> "pq.ParquetWriter":
+        return pq.ParquetWriter(
+            str(path.with_name(path.name + ".partial")), schema, compression=self._compression
+        )
+
+    def _part_path(self, directory: Path) -> Path:
+        return directory / f"part-{self._part:05d}.parquet"
+
+    def _wal_path(self) -> Path:
+        return self._directory / f"part-{self._part:05d}{WAL_SUFFIX}"
+
+    def _prepare(self, resume: bool) -> Tuple[int, Optional[Path]]:
+        """Create the run directories; return the first part to write and its log to replay."""
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        if not self._raw_column:
+            self._raw_directory.mkdir(exist_ok=True)
+        next_part = 0
+        logs: List[Path] = []
+        for directory in (self._directory, self._raw_directory):
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.name.endswith(".partial"):
+                    path.unlink()
+                    continue
+                if path.name.endswith(WAL_SUFFIX):
+                    logs.append(path)
+                    continue
+                match = _PART_PATTERN.fullmatch(path.name)
+                if match is None:
+                    continue
+                if not resume:
+                    path.unlink()
+                    continue
+                next_part = max(next_part, int(match.group(1)) + 1)
+        replay = None
+        for path in logs:
+            # Only the log of the part that was open can still hold results missing from the
+            # closed parts; an older one outlived its part's rename.
+            if resume and path.name == f"part-{next_part:05d}{WAL_SUFFIX}":
+                replay = path
+            else:
+                path.unlink()
+        return next_part, replay
+
+    def _replay(self, path: Path) -> None:
+        """Rewrite the logged results of an unfinished part, dropping a torn last line."""
+
+        valid = 0
+        with path.open("rb") as handle:
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    result = codec.load_model(ExtractionResult, line)
+                except ValueError:
+                    break
+                valid += len(line)
+                self._rows.append(result)
+                self._part_rows += 1
+                if len(self._rows) >= self._config.row_group_size:
+                    self._write_row_group()
+            size = handle.seek(0, os.SEEK_END)
+        if valid < size:
+            os.truncate(path, valid)
+
+
+def list_parts(path: Path) -> List[Path]:
+    """Results part files of a Parquet run directory (or ``path`` itself for a single file)."""
+
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if _PART_PATTERN.fullmatch(p.name))
+    return [path]
+
+
+__all__ = ["ParquetWriter", "list_parts", "results_schema"]
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+"""Raw provider response policies: keep inline, drop, or offload to compressed pack files."""
+
+import asyncio
+import gzip
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+from docvqa.config.models import RawResponseConfig
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.storage.base import BaseStorage
+from docvqa.utils import codec
+from docvqa.utils.logging import get_logger
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Key of the reference left in ``raw_response`` when the payload is offloaded.
+REFERENCE_KEY = "$raw_ref"
+
+_SUFFIXES = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+
+
+class RawResponseStore:
+    """Append-only pack file of compressed raw responses for one run (or shard).
+
+    Every response is compressed on its own, with a trailing newline, and appended to
+    ``<directory>/<stem>.raw.jsonl.<ext>``, so a reference (file, offset, length) reads one
+    response back without touching the others. gzip members and zstd frames concatenate, so
+    the whole file also decompresses with ``zcat``/``zstdcat`` into JSON lines. With ``resume``
+    new responses are appended to the existing file; references written before stay valid.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        stem: str,
+        *,
+        compression: str = "gzip",
+        level: Optional[int] = None,
+        resume: bool = False,
+    ) -> None:
+        if compression == "zstd" and zstandard is None:
+            msg = (
+                "zstandard is required for zstd-compressed raw responses. Install the 'zstd' "
+                "extra: pip install docvqa[zstd]."
+            )
+            raise ImportError(msg)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+        self._name = f"{stem}.raw{_SUFFIXES[compression]}"
+        self._compression = compression
+        self._level = level
+        self._compressor = (
+            zstandard.ZstdCompressor(level=level or 3) if compression == "zstd" else None
+        )
+        self._handle: Optional[BinaryIO] = None
+        self._resume = resume
+        self.stored = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    @property
+    def path(self) -> Path:
+        return self._directory / self._name
+
+    def put(self, raw_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Append ``raw_response`` and return the reference to store in its place."""
+
+        data = codec.dumpb(raw_response) + b"\n"
+        payload = self._compress(data)
+        handle = self._open()
+        offset = handle.tell()
+        handle.write(payload)
+        self.stored += 1
+        self.raw_bytes += len(data)
+        self.stored_bytes += len(payload)
+        return {
+            REFERENCE_KEY: {
+                "path": self._name,
+                "offset": offset,
+                "length": len(payload),
+                "compression": self._compression,
+            }
+        }
+
+    def flush(self) -> None:
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self.flush()
+            self._handle.close()
+            self._handle = None
+
+    def _open(self) -> BinaryIO:
+        if self._handle is None:
+            self._handle = self.path.open("ab" if self._resume else "wb")
+            self._handle.seek(0, os.SEEK_END)
+            # Later writes of this run append, even after a close.
+            self._resume = True
+        return self._handle
+
+    def _compress(self, data: bytes) -> bytes:
+        if self._compression == "gzip":
+            return gzip.compress(data, compresslevel=self._level or 6, mtime=0)
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return data
+
+
+def is_reference(raw_response: Optional[Dict[str, Any]]) -> bool:
+    """Return whether ``raw_response`` points into a pack file instead of holding the payload."""
+
+    return raw_response is not None and REFERENCE_KEY in raw_response
+
+
+def load_raw_response(
+    raw_response: Optional[Dict[str, Any]], directory: Path
+) -> Optional[Dict[str, Any]]:
+    """Return the full payload of ``raw_response``, reading offloaded ones from ``directory``."""
+
+    if not is_reference(raw_response):
+        return raw_response
+    reference = raw_response[REFERENCE_KEY]
+    with (directory / reference["path"]).open("rb") as handle:
+        handle.seek(reference["offset"])
+        payload = handle.read(reference["length"])
+    compression = reference.get("compression", "none")
+    if compression == "gzip":
+        payload = gzip.decompress(payload)
+    elif compression == "zstd":
+        if zstandard is None:
+            msg = "zstandard is required to read zstd raw responses. Install the 'zstd' extra."
+            raise ImportError(msg)
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    return codec.loads(payload)
+
+
+class RawResponsePolicyStorage(BaseStorage):
+    """Applies a :class:`RawResponseConfig` policy before results reach ``storage``.
+
+    ``drop`` removes ``raw_response``; ``offload`` moves it into a :class:`RawResponseStore`
+    and leaves a small reference (see :func:`load_raw_response`). The pack file is flushed
+    before the wrapped backend, so a checkpointed result never references a missing payload.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        config: RawResponseConfig,
+        *,
+        store: Optional[RawResponseStore] = None,
+    ) -> None:
+        if config.policy == "offload" and store is None:
+            msg = "The offload raw_response policy needs a RawResponseStore."
+            raise ValueError(msg)
+        self._storage = storage
+        self._config = config
+        self._store = store
+        self._logger = get_logger(__name__)
+
+    @property
+    def storage(self) -> BaseStorage:
+        return self._storage
+
+    def write(self, result: ExtractionResult) -> None:
+        self._storage.write(self._slim(result))
+
+    async def write_async(self, result: ExtractionResult) -> None:
+        slim = await asyncio.to_thread(self._slim, result)
+        await self._storage.write_async(slim)
+
+    def flush(self) -> None:
+        if self._store is not None:
+            self._store.flush()
+        self._storage.flush()
+
+    def finalize(self) -> None:
+        self._close_store()
+        self._storage.finalize()
+
+    async def finalize_async(self) -> None:
+        await asyncio.to_thread(self._close_store)
+        await self._storage.finalize_async()
+
+    def _slim(self, result: ExtractionResult) -> ExtractionResult:
+        if result.raw_response is None or is_reference(result.raw_response):
+            return result
+        if self._config.policy == "drop":
+            return result.model_copy(update={"raw_response": None})
+        if self._config.policy == "offload":
+            reference = self._store.put(result.raw_response)
+            return result.model_copy(update={"raw_response": reference})
+        return result
+
+    def _close_store(self) -> None:
+        if self._store is None:
+            return
+        self._store.close()
+        if self._store.stored:
+            self._logger.info(
+                "raw_responses_offloaded",
+                path=str(self._store.path),
+                responses=self._store.stored,
+                raw_bytes=self._store.raw_bytes,
+                stored_bytes=self._store.stored_bytes,
+            )
+
+
+__all__ = [
+    "REFERENCE_KEY",
+    "RawResponsePolicyStorage",
+    "RawResponseStore",
+    "is_reference",
+    "load_raw_response",
+]
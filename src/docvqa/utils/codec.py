@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+"""JSON encoding and decoding through the fastest available backend."""
+
+import json
+import os
+from typing import Any, Dict, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # pragma: no cover - optional dependency
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+CODEC_ENV_VAR = "DOCVQA_JSON_CODEC"
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+JSONInput = Union[str, bytes, bytearray, memoryview]
+
+
+class JSONCodec:
+    """Standard library codec; the fallback when no faster backend is installed.
+
+    Every codec emits compact UTF-8 JSON (no spaces after separators, non-ASCII characters
+    unescaped) unless ``indent`` is given, and raises :class:`ValueError` on malformed input.
+    """
+
+    name = "json"
+
+    def loads(self, data: JSONInput) -> Any:
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+    def dumps(self, value: Any, *, indent: Optional[int] = None) -> bytes:
+        return _stdlib_dumps(value, indent).encode("utf-8")
+
+    def dumps_str(self, value: Any, *, indent: Optional[int] = None) -> str:
+        return _stdlib_dumps(value, indent)
+
+    def dump_model(self, model: BaseModel, *, indent: Optional[int] = None) -> str:
+        return model.model_dump_json(indent=indent or None)
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec backed by ``orjson``.
+
+    orjson only indents by two spaces, so other indents and values it rejects (integers beyond
+    64 bits, non-string keys) are encoded by the standard library instead.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            msg = (
+                "orjson is not installed. Install the 'fast-json' extra: "
+                "pip install docvqa[fast-json]."
+            )
+            raise ImportError(msg)
+
+    def loads(self, data: JSONInput) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, value: Any, *, indent: Optional[int] = None) -> bytes:
+        if not indent or indent == 2:
+            try:
+                return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else 0)
+            except TypeError:
+                pass
+        return _stdlib_dumps(value, indent).encode("utf-8")
+
+    def dumps_str(self, value: Any, *, indent: Optional[int] = None) -> str:
+        return self.dumps(value, indent=indent).decode("utf-8")
+
+    def dump_model(self, model: BaseModel, *, indent: Optional[int] = None) -> str:
+        # Encoding the field values directly skips the deep copy ``model_dump`` makes. Values
+        # orjson cannot encode itself (nested models, paths) go through pydantic instead.
+        if not indent:
+            try:
+                return orjson.dumps(dict(model)).decode("utf-8")
+            except TypeError:
+                pass
+        return super().dump_model(model, indent=indent)
+
+
+class MsgspecCodec(JSONCodec):
+    """Codec backed by ``msgspec.json``; indented output uses the standard library."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            msg = (
+                "msgspec is not installed. Install the 'msgspec' extra: "
+                "pip install docvqa[msgspec]."
+            )
+            raise ImportError(msg)
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, data: JSONInput) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as exc:
+            raise ValueError(str(exc)) from exc
+
+    def dumps(self, value: Any, *, indent: Optional[int] = None) -> bytes:
+        if not indent:
+            try:
+                return self._encoder.encode(value)
+            except (TypeError, OverflowError):
+                pass
+        return _stdlib_dumps(value, indent).encode("utf-8")
+
+    def dumps_str(self, value: Any, *, indent: Optional[int] = None) -> str:
+        return self.dumps(value, indent=indent).decode("utf-8")
+
+
+def _stdlib_dumps(value: Any, indent: Optional[int]) -> str:
+    separators = (",", ": ") if indent else (",", ":")
+    return json.dumps(value, indent=indent or None, separators=separators, ensure_ascii=False)
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+    JSONCodec.name: JSONCodec,
+}
+
+_CODEC: Optional[JSONCodec] = None
+
+
+def get_codec() -> JSONCodec:
+    """Return the process-wide codec, choosing it on first use.
+
+    ``DOCVQA_JSON_CODEC`` (``orjson``, ``msgspec`` or ``json``) forces a backend; otherwise
+    orjson is preferred, then msgspec, then the standard library.
+    """
+
+    global _CODEC
+    if _CODEC is None:
+        _CODEC = use_codec(os.environ.get(CODEC_ENV_VAR))
+    return _CODEC
+
+
+def use_codec(name: Optional[str] = None) -> JSONCodec:
+    """Select the process-wide codec by name, or the fastest installed one when ``None``."""
+
+    global _CODEC
+    if name is None:
+        for codec_type in CODECS.values():
+            try:
+                _CODEC = codec_type()
+            except ImportError:
+                continue
+            return _CODEC
+    if name not in CODECS:
+        msg = f"Unknown JSON codec {name!r}; expected one of {sorted(CODECS)}."
+        raise ValueError(msg)
+    _CODEC = CODECS[name]()
+    return _CODEC
+
+
+def loads(data: JSONInput) -> Any:
+    """Decode a JSON document; raises :class:`ValueError` when it is malformed."""
+
+    return get_codec().loads(data)
+
+
+def dumps(value: Any, *, indent: Optional[int] = None) -> str:
+    """Encode ``value`` as compact JSON text."""
+
+    return get_codec().dumps_str(value, indent=indent)
+
+
+def dumpb(value: Any, *, indent: Optional[int] = None) -> bytes:
+    """Encode ``value`` as compact UTF-8 JSON bytes."""
+
+    return get_codec().dumps(value, indent=indent)
+
+
+def dump_model(model: BaseModel, *, indent: Optional[int] = None) -> str:
+    """Serialize a pydantic model to JSON text without an intermediate ``model_dump`` dict.
+
+    The standard library codec uses ``model_dump_json``, which encodes the model in one pass
+    in pydantic-core.
+    """
+
+    return get_codec().dump_model(model, indent=indent)
+
+
+def load_model(model_type: Type[ModelT], data: JSONInput) -> ModelT:
+    """Parse JSON and validate it into ``model_type``.
+
+    The document is decoded by the active codec and then validated. For the free-form
+    ``Dict[str, Any]`` payloads of :class:`~docvqa.pipeline.schemas.ExtractionResult` this is
+    faster than ``model_validate_json``, which has to build every nested value itself.
+    """
+
+    return model_type.model_validate(get_codec().loads(data))
+
+
+__all__ = [
+    "CODECS",
+    "JSONCodec",
+    "MsgspecCodec",
+    "OrjsonCodec",
+    "dump_model",
+    "dumpb",
+    "dumps",
+    "get_codec",
+    "load_model",
+    "loads",
+    "use_codec",
+]
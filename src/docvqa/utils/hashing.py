@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+"""Content hashing helpers."""
+
+import hashlib
+from pathlib import Path
+
+_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: Path) -> str:
+    """Return the hex SHA-256 digest of a file's bytes, read in 1 MiB chunks."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+__all__ = ["file_digest"]
@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+"""Process-wide pipeline metrics with Prometheus text exposition."""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+# Upper bounds, in seconds, of the stage latency histogram buckets.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+STAGE_SECONDS = "docvqa_stage_seconds"
+LLM_TOKENS = "docvqa_llm_tokens_total"
+CACHE_LOOKUPS = "docvqa_cache_lookups_total"
+RETRIES = "docvqa_retries_total"
+DOCUMENTS = "docvqa_documents_total"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+T = TypeVar("T")
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + rendered + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def total(self, **labels: Any) -> float:
+        """Sum over every label set that includes ``labels``."""
+
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(value for key, value in self._values.items() if wanted <= set(key))
+
+    def drain(self) -> Dict[LabelKey, float]:
+        """Return the values recorded so far and reset them."""
+
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values: Dict[LabelKey, float]) -> None:
+        """Add values drained from a counter of the same name, e.g. in a worker process."""
+
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self._buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket plus +Inf, then the running sum.
+                series = self._series[key] = [0.0] * (len(self._buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def drain(self) -> Dict[LabelKey, List[float]]:
+        """Return the bucket counts and sums recorded so far and reset them."""
+
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: Dict[LabelKey, List[float]]) -> None:
+        """Add series drained from a histogram with the same buckets."""
+
+        with self._lock:
+            for key, values in series.items():
+                current = self._series.setdefault(key, [0.0] * len(values))
+                for index, value in enumerate(values):
+                    current[index] += value
+
+    def snapshot(self) -> Dict[LabelKey, Tuple[int, float, float]]:
+        """Per label set: observation count, sum, and approximate 95th percentile."""
+
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        result = {}
+        for key, values in series.items():
+            counts = values[:-1]
+            count = int(sum(counts))
+            result[key] = (count, values[-1], self._quantile(counts, count, 0.95))
+        return result
+
+    def _quantile(self, counts: List[float], count: int, quantile: float) -> float:
+        threshold = quantile * count
+        seen = 0.0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return self._buckets[index] if index < len(self._buckets) else float("inf")
+        return float("inf")
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self._buckets, values):
+                cumulative += bucket_count
+                le = (("le", _number(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {_number(cumulative)}")
+            cumulative += values[len(self._buckets)]
+            inf = (("le", "+Inf"),)
+            lines.append(f"{self.name}_bucket{_format_labels(key, inf)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_number(cumulative)}")
+        return lines
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """Named counters and histograms rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.stages = self.histogram(
+            STAGE_SECONDS, "Wall-clock seconds spent per pipeline stage and provider."
+        )
+        self.tokens = self.counter(LLM_TOKENS, "LLM tokens reported in response usage blocks.")
+        self.cache = self.counter(CACHE_LOOKUPS, "Result cache lookups by outcome.")
+        self.retries = self.counter(RETRIES, "Extraction attempts retried after transient errors.")
+        self.documents = self.counter(DOCUMENTS, "Documents finished by outcome.")
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(name, Counter(name, help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(name, Histogram(name, help_text, buckets))
+
+    def _register(self, name: str, metric: Any) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(name, metric)
+
+    @contextmanager
+    def time(self, stage: str, **labels: Any) -> Iterator[None]:
+        """Record the duration of the ``with`` block under ``stage``."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.observe(time.perf_counter() - started, stage=stage, **labels)
+
+    def timed_iter(self, iterable: Iterable[T], stage: str, **labels: Any) -> Iterator[T]:
+        """Yield from ``iterable``, recording the time spent producing each item."""
+
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.stages.observe(time.perf_counter() - started, stage=stage, **labels)
+            yield item
+
+    def drain(self) -> Dict[str, Any]:
+        """Return and reset everything recorded so far, keyed by metric name.
+
+        Worker processes record into their own registry; they ship the drained values back to
+        the parent, which folds them into its registry with :meth:`merge`.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.drain() for metric in metrics}
+
+    def merge(self, values: Dict[str, Any]) -> None:
+        """Fold values from another registry's :meth:`drain` into this one."""
+
+        for name, series in values.items():
+            with self._lock:
+                metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(series)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact totals for the ``pipeline_completed`` log event."""
+
+        stages: Dict[str, Dict[str, float]] = {}
+        for key, (count, total, p95) in sorted(self.stages.snapshot().items()):
+            labels = dict(key)
+            stage = labels.pop("stage", "")
+            name = ".".join([*labels.values(), stage]) if labels else stage
+            stages[name] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 2) if count else 0.0,
+                "p95_ms": round(p95 * 1000, 2) if p95 != float("inf") else None,
+            }
+        return {
+            "stages": stages,
+            "tokens": {
+                "prompt": int(self.tokens.total(kind="prompt")),
+                "completion": int(self.tokens.total(kind="completion")),
+            },
+            "cache": {
+                "hits": int(self.cache.total(result="hit")),
+                "misses": int(self.cache.total(result="miss")),
+            },
+            "retries": int(self.retries.total()),
+        }
+
+    def write_textfile(self, path: Path) -> None:
+        """Atomically write the exposition to ``path`` (node_exporter textfile collector)."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temporary.write_text(self.render(), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+class MetricsExporter:
+    """Publishes a registry during a run: a ``/metrics`` endpoint and/or a textfile.
+
+    The textfile is rewritten every ``interval_seconds`` and once more on :meth:`stop`, so the
+    final values of a short run are always captured.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        *,
+        port: Optional[int] = None,
+        host: str = "127.0.0.1",
+        textfile: Optional[Path] = None,
+        interval_seconds: float = 15.0,
+    ) -> None:
+        self._registry = registry
+        self._port = port
+        self._host = host
+        self._textfile = textfile
+        self._interval = interval_seconds
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        return self._server.server_address[:2] if self._server is not None else None
+
+    def start(self) -> None:
+        if self._port is not None:
+            self._server = ThreadingHTTPServer((self._host, self._port), _handler(self._registry))
+            self._spawn(self._server.serve_forever)
+        if self._textfile is not None:
+            self._spawn(self._write_periodically)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        if self._textfile is not None:
+            self._registry.write_textfile(self._textfile)
+
+    def _spawn(self, target: Any) -> None:
+        thread = threading.Thread(target=target, name="docvqa-metrics", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(self._interval):
+            self._registry.write_textfile(self._textfile)
+
+
+def _handler(registry: MetricsRegistry) -> type:
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    return _MetricsHandler
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide registry every component records into."""
+
+    return _REGISTRY
+
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsExporter",
+    "MetricsRegistry",
+    "get_metrics",
+]
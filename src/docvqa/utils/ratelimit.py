@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+"""Client-side request and token rate limiting shared across workers."""
+
+import asyncio
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Hashable, List, Optional
+
+# Burst allowance expressed as seconds of the per-minute budget.
+BURST_SECONDS = 10.0
+
+WINDOW_SECONDS = 60.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English text)."""
+
+    return math.ceil(len(text) / 4)
+
+
+class TokenBucket:
+    """Token bucket that lets callers go into debt and wait it off.
+
+    :meth:`reserve` always succeeds and returns how long the caller must wait before using the
+    reservation. Reservations are therefore served in arrival order and a single request larger
+    than the burst capacity is still admitted, just after a proportionally longer wait.
+
+    The bucket refills at ``per_minute / 60`` per second and holds up to ``burst_seconds`` of
+    that, so the sustained rate is the configured one. A full bucket plus a minute of refill
+    would still exceed the budget, so reservations are also checked against a sliding
+    one-minute window: one that would push the window above ``per_minute`` waits until enough
+    earlier reservations have left it.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        *,
+        burst_seconds: float = BURST_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if burst_seconds < 0:
+            msg = f"burst_seconds must not be negative, got {burst_seconds}"
+            raise ValueError(msg)
+        self._per_minute = per_minute
+        self._capacity = per_minute * burst_seconds / 60.0
+        self._rate = per_minute / 60.0
+        self._level = self._capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+        # Start times of reservations and the running total of their amounts, oldest first;
+        # entries before ``_head`` left the window.
+        self._starts: List[float] = []
+        self._totals: List[float] = []
+        self._head = 0
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = self._refill()
+            self._level -= amount
+            start = now + max(0.0, -self._level / self._rate)
+            start = self._fit_window(now, start, amount)
+            self._record(start, amount)
+            return start - now
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) ``delta`` after the fact."""
+
+        with self._lock:
+            now = self._refill()
+            self._level = min(self._capacity, self._level - delta)
+            if delta > 0:
+                # Refunds are not taken out of the window, which only errs on the safe side.
+                self._record(max(now, self._starts[-1] if self._starts else now), delta)
+
+    def _refill(self) -> float:
+        now = self._clock()
+        self._level = min(self._capacity, self._level + (now - self._updated) * self._rate)
+        self._updated = now
+        return now
+
+    def _fit_window(self, now: float, start: float, amount: float) -> float:
+        """Earliest time from ``start`` at which ``amount`` fits in the trailing minute."""
+
+        while self._head < len(self._starts) and self._starts[self._head] <= now - WINDOW_SECONDS:
+            self._head += 1
+        if self._head == len(self._starts):
+            return start
+        start = max(start, self._starts[-1])
+        # Reservations up to the running total ``excess`` must have left the window first.
+        excess = self._totals[-1] + amount - self._per_minute
+        if excess <= (self._totals[self._head - 1] if self._head else 0.0):
+            return start
+        index = bisect_left(self._totals, excess, self._head)
+        if index < len(self._totals):
+            return max(start, self._starts[index] + WINDOW_SECONDS)
+        return max(start, self._starts[-1] + WINDOW_SECONDS)
+
+    def _record(self, start: float, amount: float) -> None:
+        if self._head > 1024 and self._head * 2 > len(self._starts):
+            del self._starts[: self._head]
+            del self._totals[: self._head]
+            self._head = 0
+        self._starts.append(start)
+        self._totals.append((self._totals[-1] if self._totals else 0.0) + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one provider quota.
+
+    Callers :meth:`acquire` with an estimated token count before sending a request and
+    :meth:`adjust` by the difference once the provider reports actual usage.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._requests: Optional[TokenBucket] = None
+        self._tokens: Optional[TokenBucket] = None
+        if requests_per_minute:
+            self._requests = TokenBucket(requests_per_minute, clock=clock)
+        if tokens_per_minute:
+            self._tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self._sleep = sleep
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request and ``tokens`` tokens; return the required wait in seconds."""
+
+        wait = 0.0
+        if self._requests is not None:
+            wait = max(wait, self._requests.reserve(1))
+        if self._tokens is not None and tokens:
+            wait = max(wait, self._tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def adjust(self, delta_tokens: int) -> None:
+        """Correct an earlier token estimate by ``actual - estimated``."""
+
+        if self._tokens is not None and delta_tokens:
+            self._tokens.adjust(delta_tokens)
+
+
+_LIMITERS: Dict[Hashable, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    key: Hashable,
+    *,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> Optional[RateLimiter]:
+    """Return the process-wide limiter for ``key``, creating it on first use.
+
+    Every client that talks to the same provider quota shares one limiter. Returns ``None`` when
+    no budget is configured.
+    """
+
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = RateLimiter(
+                requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute
+            )
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+__all__ = ["RateLimiter", "TokenBucket", "estimate_tokens", "get_rate_limiter"]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import random
+import statistics
+import urllib.error
+import urllib.request
+
+import pytest
+
+from docvqa.bench.server import FakeProviderServer, LatencyModel
+from docvqa.bench.suite import (
+    BenchScenario,
+    BenchUnsupportedError,
+    build_scenarios,
+    run_scenario,
+    run_suite,
+    write_manifest,
+)
+from docvqa.config.models import ExtractorProvider, PipelineEngine, StorageProvider
+
+
+def _post(server, payload):
+    request = urllib.request.Request(
+        server.llm_api_base,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "uniform", "exponential", "lognormal"])
+def test_latency_model_median(distribution):
+    model = LatencyModel(distribution, median_ms=40.0, spread=0.5)
+    rng = random.Random(7)
+
+    median = statistics.median(model.sample(rng) for _ in range(4000))
+
+    assert median == pytest.approx(0.040, rel=0.1)
+
+
+def test_server_answers_and_injects_failures():
+    with FakeProviderServer(LatencyModel("fixed", 0.0), throttle_rate=1.0) as server:
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(server, {"model": "m", "messages": []})
+        assert excinfo.value.code == 429
+
+        server.throttle_rate = 0.0
+        body = _post(server, {"model": "m", "messages": [{"role": "user", "content": "x" * 40}]})
+
+    assert json.loads(body["choices"][0]["message"]["content"])["summary"]
+    assert body["usage"]["prompt_tokens"] == 10
+    assert (server.requests, server.throttled) == (2, 1)
+
+
+def test_build_scenarios_measures_batch_engine_once():
+    scenarios = build_scenarios(
+        [PipelineEngine.THREADS, PipelineEngine.BATCH], [1, 8], [StorageProvider.LOCAL_JSON]
+    )
+
+    assert [scenario.label for scenario in scenarios] == [
+        "llm/threads/c1/local_json",
+        "llm/threads/c8/local_json",
+        "llm/batch/c-/local_json",
+    ]
+
+
+@pytest.mark.parametrize(
+    "engine", [PipelineEngine.THREADS, PipelineEngine.PROCESSES, PipelineEngine.BATCH]
+)
+def test_run_scenario_reports_throughput_and_latency(tmp_path, engine):
+    dataset = write_manifest(tmp_path / "dataset", 12)
+    with FakeProviderServer(LatencyModel("fixed", 5.0), throttle_rate=0.1, seed=3) as server:
+        result = run_scenario(BenchScenario(engine, 4), server, dataset, tmp_path / "work")
+
+    assert result.documents == 12
+    assert result.succeeded + result.failed == 12
+    assert result.docs_per_second > 0
+    assert result.p50_ms <= result.p95_ms <= result.p99_ms
+    if result.peak_rss_mb is not None:
+        assert result.peak_rss_mb > 0
+    output = tmp_path / "work" / BenchScenario(engine, 4).label.replace("/", "-") / "results"
+    lines = (output / "bench.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == result.succeeded
+
+
+def test_unsupported_scenarios_are_reported_as_skipped(tmp_path):
+    scenario = BenchScenario(PipelineEngine.BATCH, provider=ExtractorProvider.DOCUMENT_AI)
+    with FakeProviderServer(LatencyModel("fixed", 0.0)) as server:
+        with pytest.raises(BenchUnsupportedError):
+            run_scenario(scenario, server, write_manifest(tmp_path / "data", 1), tmp_path)
+        (result,) = run_suite([scenario], server, documents=1, work_dir=tmp_path)
+
+    assert result.skipped
+    assert result.documents == 0
+
+
+def test_document_ai_scenario_uses_rest_transport(tmp_path):
+    pytest.importorskip("google.cloud.documentai")
+    scenario = BenchScenario(concurrency=2, provider=ExtractorProvider.DOCUMENT_AI)
+    with FakeProviderServer(LatencyModel("fixed", 1.0)) as server:
+        (result,) = run_suite([scenario], server, documents=5, work_dir=tmp_path)
+
+    assert (result.documents, result.succeeded) == (5, 5)
+    assert server.requests == 5
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+
+from docvqa.bench.server import FakeProviderServer, LatencyModel
+from docvqa.bench.suite import BenchScenario, build_scenarios, run_scenario, write_manifest
+from docvqa.config.models import PipelineEngine, StorageProvider
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark
+
+DOCUMENTS = 50
+
+SCENARIOS = build_scenarios(
+    list(PipelineEngine), [1, 8], [StorageProvider.LOCAL_JSON, StorageProvider.PARQUET]
+)
+
+
+@pytest.fixture(scope="module")
+def provider():
+    with FakeProviderServer(LatencyModel("lognormal", 5.0, 0.5), seed=0) as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    return write_manifest(tmp_path_factory.mktemp("bench-dataset"), DOCUMENTS)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda scenario: scenario.label)
+def test_pipeline_throughput(benchmark, provider, dataset, tmp_path, scenario: BenchScenario):
+    if scenario.storage == StorageProvider.PARQUET:
+        pytest.importorskip("pyarrow")
+    if scenario.engine == PipelineEngine.ASYNCIO:
+        pytest.importorskip("httpx")
+
+    result = benchmark.pedantic(
+        run_scenario, args=(scenario, provider, dataset, tmp_path), rounds=3, iterations=1
+    )
+
+    benchmark.extra_info.update(result.as_dict())
+    assert result.documents == DOCUMENTS
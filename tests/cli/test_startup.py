@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+import sys
+from typing import List, Set
+
+import pytest
+
+# Modules that only the `run` and `bench` commands need; loading any of them for `--help` or
+# `evaluate` costs from tens of milliseconds (structlog, requests) to seconds (Google SDKs).
+HEAVY_MODULES = (
+    "google",
+    "requests",
+    "httpx",
+    "pyarrow",
+    "structlog",
+    "docvqa.bench",
+    "docvqa.extractors",
+    "docvqa.storage",
+    "docvqa.pipeline.run",
+    "docvqa.config.models",
+)
+
+_LINE = re.compile(r"import time:\s+\d+ \|\s+\d+ \| \s*(\S+)")
+
+
+def _imported_modules(args: List[str]) -> Set[str]:
+    """Run the CLI under ``-X importtime`` and return the modules it imported."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "docvqa.cli.main", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        match.group(1)
+        for match in map(_LINE.match, completed.stderr.splitlines())
+        if match is not None
+    }
+
+
+def _assert_lean(modules: Set[str]) -> None:
+    loaded = sorted(
+        name
+        for name in modules
+        if any(name == heavy or name.startswith(f"{heavy}.") for heavy in HEAVY_MODULES)
+    )
+    assert loaded == []
+
+
+def test_help_does_not_import_command_dependencies():
+    _assert_lean(_imported_modules(["--help"]))
+
+
+@pytest.mark.parametrize("command", ["evaluate", "merge", "run", "bench"])
+def test_command_help_does_not_import_command_dependencies(command):
+    _assert_lean(_imported_modules([command, "--help"]))
+
+
+def test_evaluate_does_not_import_command_dependencies(tmp_path):
+    runs = []
+    for name in ["a", "b"]:
+        path = tmp_path / f"{name}.jsonl"
+        record = {"doc_id": "doc-1", "content": {"summary": "two words"}}
+        path.write_text(json.dumps(record) + "\n", encoding="utf-8")
+        runs += ["--run", f"{name}={path}"]
+
+    _assert_lean(_imported_modules(["evaluate", *runs]))
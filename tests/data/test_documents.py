@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from docvqa.data import documents
+from docvqa.data.dataset import DocumentExample
+from docvqa.data.documents import (
+    DocumentLoader,
+    DocumentLoadError,
+    OCRBackend,
+    PageTextCache,
+    fit_pages,
+)
+from docvqa.extractors.cache import ResultCache
+from docvqa.extractors.llm import LLMExtractor
+from docvqa.pipeline.schemas import ExtractionRequest
+
+
+class _CountingOCR(OCRBackend):
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def recognize(self, path):
+        self.calls += 1
+        return ["first page", "second page"]
+
+
+def test_ocr_text_is_cached_by_content_hash(tmp_path):
+    ocr = _CountingOCR()
+    loader = DocumentLoader(ocr=ocr, cache=PageTextCache(tmp_path / "cache"))
+    (tmp_path / "a.png").write_bytes(b"image-bytes")
+    (tmp_path / "copy.png").write_bytes(b"image-bytes")
+
+    assert loader.load_pages(tmp_path / "a.png") == ["first page", "second page"]
+    assert loader.load_pages(tmp_path / "copy.png") == ["first page", "second page"]
+    assert ocr.calls == 1
+    assert "--- Page 2 ---\nsecond page" in loader.load_text(tmp_path / "a.png")
+
+
+def test_page_text_cache_tolerates_concurrent_writers(tmp_path):
+    cache = PageTextCache(tmp_path / "cache")
+    errors = []
+
+    def write() -> None:
+        try:
+            for _ in range(50):
+                cache.put("ab12", ["page"])
+        except Exception as exc:  # noqa: BLE001 - surfaced by the assertion below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.get("ab12") == ["page"]
+    assert [path.name for path in (tmp_path / "cache" / "ab").iterdir()] == ["ab12.json"]
+
+
+def test_page_text_cache_write_failures_are_not_fatal(tmp_path):
+    (tmp_path / "cache").write_text("not a directory", encoding="utf-8")
+    cache = PageTextCache(tmp_path / "cache")
+
+    cache.put("ab12", ["page"])
+
+    assert cache.get("ab12") is None
+
+
+def test_images_without_ocr_backend_fail_cleanly(tmp_path):
+    (tmp_path / "scan.jpg").write_bytes(b"")
+    with pytest.raises(DocumentLoadError, match="OCR"):
+        DocumentLoader().load_pages(tmp_path / "scan.jpg")
+
+
+def test_pdfs_without_pypdf_fail_as_extraction_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, "PdfReader", None)
+    (tmp_path / "report.pdf").write_bytes(b"%PDF-1.4")
+    with pytest.raises(DocumentLoadError, match=r"docvqa\[pdf\]"):
+        DocumentLoader().load_text(tmp_path / "report.pdf")
+
+
+def test_fit_pages_truncates_to_budget():
+    pages = ["a" * 100, "b" * 100, "c" * 100]
+
+    text, omitted = fit_pages(pages, max_tokens=40)
+
+    assert omitted == 2
+    assert text.startswith("--- Page 1 ---\n" + "a" * 100)
+    assert "b" * 100 not in text and "ccc" not in text
+    assert "2 of 3 pages" in text
+    full, omitted = fit_pages(pages, max_tokens=1000)
+    assert omitted == 0
+    assert full.count("--- Page") == 3
+
+
+class _RecordingClient:
+    def __init__(self) -> None:
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        content = json.dumps({"summary": "ok", "fields": [], "answers": []})
+        return {"choices": [{"message": {"content": content}}]}
+
+
+def test_llm_extractor_sends_document_text(tmp_path):
+    document = tmp_path / "invoice.txt"
+    document.write_text("Total due: 42 EUR", encoding="utf-8")
+    client = _RecordingClient()
+    extractor = LLMExtractor(client, loader=DocumentLoader())
+
+    extractor.extract(ExtractionRequest(doc_id="invoice", document_path=document))
+
+    assert "Document text:\nTotal due: 42 EUR" in client.prompts[0]
+
+
+def test_llm_extractor_sends_only_the_path_for_images_without_ocr(tmp_path):
+    document = tmp_path / "scan.png"
+    document.write_bytes(b"image-bytes")
+    client = _RecordingClient()
+    extractor = LLMExtractor(client, loader=DocumentLoader())
+
+    result = extractor.extract(ExtractionRequest(doc_id="scan", document_path=document))
+
+    assert result.content["summary"] == "ok"
+    assert f"Document path: {document}" in client.prompts[0]
+    assert "Document text:" not in client.prompts[0]
+
+
+def test_result_cache_is_keyed_by_document_content_not_path(tmp_path):
+    client = _RecordingClient()
+    client.config = SimpleNamespace(provider="openai", model="model", temperature=0.0)
+    extractor = LLMExtractor(client, loader=DocumentLoader())
+    extractor.use_cache(ResultCache(tmp_path / "results", max_bytes=1 << 20))
+    for name in ["a", "copy"]:
+        (tmp_path / f"{name}.txt").write_text("Total due: 42 EUR", encoding="utf-8")
+
+    extractor.from_example(DocumentExample(doc_id="a", document_path=tmp_path / "a.txt"))
+    copy = DocumentExample(doc_id="copy", document_path=tmp_path / "copy.txt")
+
+    assert extractor.from_example(copy).doc_id == "copy"
+    assert len(client.prompts) == 1
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from docvqa.data.dataset import DEFAULT_MANIFEST, DocVQADataset
+from docvqa.data.index import ManifestIndex
+
+
+def _write_manifest(root, count):
+    lines = [
+        json.dumps({"id": f"doc-{i}", "document_path": f"doc-{i}.pdf", "metadata": {"i": i}})
+        for i in range(count)
+    ]
+    path = root / DEFAULT_MANIFEST
+    path.write_text("\n".join(lines) + "\n\n", encoding="utf-8")
+    return path
+
+
+def test_dataset_supports_len_lookup_and_slicing(tmp_path):
+    _write_manifest(tmp_path, 10)
+    dataset = DocVQADataset(tmp_path)
+
+    assert len(dataset) == 10
+    assert dataset[3].doc_id == "doc-3"
+    assert dataset[-1].doc_id == "doc-9"
+    assert dataset["doc-7"].metadata == {"i": 7}
+    with pytest.raises(KeyError):
+        dataset["missing"]
+
+    view = dataset[2:8:2]
+    assert len(view) == 3
+    assert [example.doc_id for example in view] == ["doc-2", "doc-4", "doc-6"]
+
+
+def test_start_and_limit_select_a_window(tmp_path):
+    _write_manifest(tmp_path, 10)
+    dataset = DocVQADataset(tmp_path, start=4, limit=3, skip_ids={"doc-5"})
+
+    assert len(dataset) == 3
+    assert [example.doc_id for example in dataset] == ["doc-4", "doc-6"]
+    assert dataset.skipped == 1
+
+
+def test_index_is_reused_and_rebuilt_when_manifest_changes(tmp_path):
+    manifest = _write_manifest(tmp_path, 3)
+    ManifestIndex(manifest).close()
+    sidecar = manifest.with_name(manifest.name + ".idx")
+    assert sidecar.exists()
+
+    built = sidecar.stat().st_mtime_ns
+    index = ManifestIndex(manifest)
+    assert len(index) == 3
+    assert index.record(2)["id"] == "doc-2"
+    index.close()
+    assert sidecar.stat().st_mtime_ns == built
+
+    _write_manifest(tmp_path, 5)
+    stat = manifest.stat()
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert len(DocVQADataset(tmp_path)) == 5
+    assert DocVQADataset(tmp_path)["doc-4"].document_path == tmp_path / "doc-4.pdf"
+
+
+def test_directory_dataset_is_indexable(tmp_path):
+    for name in ("b.pdf", "a.png", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    dataset = DocVQADataset(tmp_path)
+
+    assert len(dataset) == 2
+    assert dataset[0].doc_id == "a"
+    assert dataset["b"].document_path == tmp_path / "b.pdf"
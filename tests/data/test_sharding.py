@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from docvqa.config.models import ShardStrategy
+from docvqa.data.dataset import DEFAULT_MANIFEST, DocVQADataset
+from docvqa.data.sharding import shard_of, shard_partition
+
+
+def _write_manifest(root, count):
+    lines = [json.dumps({"id": f"doc-{i}", "document_path": f"doc-{i}.pdf"}) for i in range(count)]
+    (root / DEFAULT_MANIFEST).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.mark.parametrize("strategy", [ShardStrategy.HASH, ShardStrategy.RANGE])
+def test_shards_partition_the_manifest(tmp_path, strategy):
+    _write_manifest(tmp_path, 50)
+    shards = [
+        [
+            example.doc_id
+            for example in DocVQADataset(
+                tmp_path, shard_index=index, shard_count=4, shard_strategy=strategy
+            )
+        ]
+        for index in range(4)
+    ]
+
+    assert sorted(doc_id for shard in shards for doc_id in shard) == sorted(
+        f"doc-{i}" for i in range(50)
+    )
+    assert all(shards)
+    if strategy == ShardStrategy.HASH:
+        for index, shard in enumerate(shards):
+            assert all(shard_of(doc_id, 4) == index for doc_id in shard)
+    else:
+        assert shards[0] == [f"doc-{i}" for i in range(12)]
+
+
+def test_directory_mode_sharding_and_limit_apply_within_shard(tmp_path):
+    for i in range(6):
+        (tmp_path / f"page-{i}.png").write_bytes(b"")
+    dataset = DocVQADataset(
+        tmp_path, shard_index=1, shard_count=2, shard_strategy=ShardStrategy.RANGE, limit=2
+    )
+
+    assert len(dataset) == 2
+    assert [example.doc_id for example in dataset] == ["page-3", "page-4"]
+
+
+def test_hash_assignment_is_stable():
+    assert shard_of("invoice-001", 8) == shard_of("invoice-001", 8)
+    assert shard_partition(2, 8) == "shard-00002-of-00008"
+    with pytest.raises(ValueError):
+        DocVQADataset(None, shard_index=2, shard_count=2)
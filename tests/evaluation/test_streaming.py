@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from docvqa.evaluation.loader import (
+    evaluate_result_files,
+    iter_result_fields,
+    load_results,
+)
+from docvqa.evaluation.metrics import compare_runs
+
+
+def _write_run(path, rows):
+    with path.open("w", encoding="utf-8") as handle:
+        for row in rows:
+            handle.write(json.dumps(row))
+            handle.write("\n")
+    return path
+
+
+def _row(doc_id, summary="", fields=0):
+    return {
+        "doc_id": doc_id,
+        "content": {"summary": summary, "fields": [{}] * fields, "answers": [], "tables": []},
+        "raw_response": {"blob": "x" * 1000},
+    }
+
+
+def test_iter_result_fields_skips_trailing_raw_response(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text(
+        '{"doc_id": "a", "content": {"summary": "s"}, "raw_response": {not json}}\n'
+        '\n'
+        '{ "content" : {}, "raw_response": null, "doc_id": "b" }\n',
+        encoding="utf-8",
+    )
+
+    records = list(iter_result_fields(path))
+
+    assert records == [{"doc_id": "a", "content": {"summary": "s"}}, {"content": {}, "doc_id": "b"}]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_streaming_report_matches_in_memory_comparison(tmp_path, max_workers):
+    runs = {
+        "a": _write_run(tmp_path / "a.jsonl", [_row("d1", "two words", 2), _row("d2")]),
+        "b": _write_run(tmp_path / "b.jsonl", [_row("d1", "one", 1), _row("d3", "x y z")]),
+    }
+
+    streamed = evaluate_result_files(runs, max_workers=max_workers)
+    expected = compare_runs({name: load_results(path) for name, path in runs.items()})
+
+    assert streamed == expected
+    assert streamed.union_documents == 3
+    assert streamed.shared_documents == 1
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.base import BaseExtractor
+from docvqa.extractors.cache import ResultCache
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+
+
+class _CountingExtractor(BaseExtractor):
+    def __init__(self, prompt_version: str = "v1") -> None:
+        self.prompt_version = prompt_version
+        self.calls = 0
+
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:
+        self.calls += 1
+        return ExtractionResult(doc_id=request.doc_id, content={"summary": "x" * 200})
+
+    def cache_fingerprint(self, request: ExtractionRequest):
+        return {"prompt": self.prompt_version, "questions": request.questions}
+
+
+def _example(tmp_path, doc_id: str, text: str = "amount due") -> DocumentExample:
+    path = tmp_path / f"{doc_id}.txt"
+    path.write_text(text, encoding="utf-8")
+    return DocumentExample(doc_id=doc_id, document_path=path)
+
+
+def test_cache_skips_unchanged_documents(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+    extractor = _CountingExtractor()
+    extractor.use_cache(cache)
+    example = _example(tmp_path, "doc-1")
+
+    extractor.from_example(example)
+    extractor.from_example(example)
+    assert extractor.calls == 1
+    assert cache.hits == 1
+
+    copy = _example(tmp_path, "doc-copy")
+    assert extractor.from_example(copy).doc_id == "doc-copy"
+    assert extractor.calls == 1
+
+    changed = _CountingExtractor(prompt_version="v2")
+    changed.use_cache(ResultCache(tmp_path / "cache", max_bytes=1 << 20))
+    changed.from_example(example)
+    assert changed.calls == 1
+
+
+def test_cache_refresh_bypasses_reads(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+    extractor = _CountingExtractor()
+    extractor.use_cache(cache, refresh=True)
+    example = _example(tmp_path, "doc-1")
+
+    extractor.from_example(example)
+    extractor.from_example(example)
+    assert extractor.calls == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=600)
+    extractor = _CountingExtractor()
+    extractor.use_cache(cache)
+    first = _example(tmp_path, "doc-1", "first")
+    extractor.from_example(first)
+    for index in range(5):
+        extractor.from_example(_example(tmp_path, f"doc-{index + 2}", f"text {index}"))
+
+    assert cache.size_bytes <= 600
+    extractor.from_example(first)
+    assert extractor.calls == 7
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import pytest
+
+documentai = pytest.importorskip("google.cloud.documentai")
+
+from docvqa.config.models import DocumentAIConfig  # noqa: E402
+from docvqa.extractors.base import ExtractionError, TransientExtractionError  # noqa: E402
+from docvqa.extractors.document_ai import DocumentAIExtractor  # noqa: E402
+from docvqa.pipeline.schemas import ExtractionRequest  # noqa: E402
+
+
+class _Blob:
+    def __init__(self, store, bucket, name):
+        self._store = store
+        self.name = name
+        self._key = (bucket, name)
+
+    def upload_from_filename(self, filename, content_type=None):
+        for suffix, error in self._store.upload_errors.items():
+            if self.name.endswith(suffix):
+                raise error
+        with open(filename, "rb") as handle:
+            self._store.objects[self._key] = handle.read()
+
+    def download_as_bytes(self):
+        return self._store.objects[self._key]
+
+
+class _Bucket:
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+
+    def blob(self, name):
+        return _Blob(self._store, self._name, name)
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.objects = {}
+        self.upload_errors = {}
+
+    def bucket(self, name):
+        return _Bucket(self, name)
+
+    def list_blobs(self, bucket, prefix=""):
+        return [
+            _Blob(self, bucket, name)
+            for (owner, name) in sorted(self.objects)
+            if owner == bucket and name.startswith(prefix)
+        ]
+
+
+class _Operation:
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.waited = None
+
+    def result(self, timeout=None):
+        self.waited = timeout
+
+
+class _FakeDocumentAI:
+    """Runs batches synchronously against the fake bucket; inputs named bad.pdf fail."""
+
+    def __init__(self, storage):
+        self._storage = storage
+        self.batches = []
+
+    def batch_process_documents(self, request):
+        self.batches.append(request)
+        output = request.document_output_config.gcs_output_config.gcs_uri
+        statuses = []
+        for index, document in enumerate(request.input_documents.gcs_documents.documents):
+            destination = f"{output}op/{index}"
+            status = documentai.BatchProcessMetadata.IndividualProcessStatus(
+                input_gcs_source=document.gcs_uri, output_gcs_destination=destination
+            )
+            if document.gcs_uri.endswith("bad.pdf"):
+                status.status.code = 3
+                status.status.message = "unsupported file"
+            else:
+                bucket, name = destination[len("gs://") :].split("/", 1)
+                for shard, text in enumerate(("first half ", "second half")):
+                    payload = documentai.Document(
+                        text=text,
+                        entities=[documentai.Document.Entity(type_="total", mention_text=text)],
+                    )
+                    key = (bucket, f"{name}/doc-{shard}.json")
+                    self._storage.objects[key] = documentai.Document.to_json(payload).encode()
+            statuses.append(status)
+        return _Operation(
+            documentai.BatchProcessMetadata(individual_process_statuses=statuses)
+        )
+
+
+def _config(**overrides):
+    values = dict(
+        project_id="project",
+        location="us",
+        processor_id="processor",
+        batch_size=3,
+        gcs_staging_uri="gs://staging/docvqa",
+    )
+    values.update(overrides)
+    return DocumentAIConfig(**values)
+
+
+def test_batch_mode_processes_documents_through_one_operation(tmp_path):
+    requests = []
+    for name in ("a.pdf", "bad.pdf", "c.png"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF-1.4 " + name.encode())
+        requests.append(ExtractionRequest(doc_id=name, document_path=path))
+    storage = _FakeStorage()
+    client = _FakeDocumentAI(storage)
+    extractor = DocumentAIExtractor(_config(), client=client, storage_client=storage)
+
+    outcomes = extractor.extract_many(requests)
+
+    assert len(client.batches) == 1
+    documents = client.batches[0].input_documents.gcs_documents.documents
+    assert [document.mime_type for document in documents] == [
+        "application/pdf",
+        "application/pdf",
+        "image/png",
+    ]
+    assert all(document.gcs_uri.startswith("gs://staging/docvqa/") for document in documents)
+    first, failed, last = outcomes
+    assert first.doc_id == "a.pdf"
+    assert first.content["summary"] == "first half second half"
+    assert [field["mention_text"] for field in first.content["fields"]] == [
+        "first half ",
+        "second half",
+    ]
+    assert "unsupported file" in str(failed)
+    assert last.doc_id == "c.png"
+
+
+def test_batch_mode_reports_unreadable_documents(tmp_path):
+    present = tmp_path / "present.pdf"
+    present.write_bytes(b"%PDF")
+    requests = [
+        ExtractionRequest(doc_id="missing", document_path=tmp_path / "missing.pdf"),
+        ExtractionRequest(doc_id="present", document_path=present),
+    ]
+    storage = _FakeStorage()
+    extractor = DocumentAIExtractor(
+        _config(), client=_FakeDocumentAI(storage), storage_client=storage
+    )
+
+    missing, found = extractor.extract_many(requests)
+
+    assert "Cannot read document" in str(missing)
+    assert found.doc_id == "present"
+
+
+def test_batch_mode_maps_staging_errors_per_document(tmp_path):
+    exceptions = pytest.importorskip("google.api_core.exceptions")
+    requests = []
+    for name in ("denied.pdf", "busy.pdf", "ok.pdf"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF")
+        requests.append(ExtractionRequest(doc_id=name, document_path=path))
+    storage = _FakeStorage()
+    storage.upload_errors = {
+        "denied.pdf": exceptions.Forbidden("no access"),
+        "busy.pdf": exceptions.ServiceUnavailable("try later"),
+    }
+    extractor = DocumentAIExtractor(
+        _config(), client=_FakeDocumentAI(storage), storage_client=storage
+    )
+
+    denied, busy, ok = extractor.extract_many(requests)
+
+    assert isinstance(denied, ExtractionError)
+    assert not isinstance(denied, TransientExtractionError)
+    assert "no access" in str(denied)
+    assert isinstance(busy, TransientExtractionError)
+    assert ok.doc_id == "ok.pdf"
+
+
+def test_batch_mode_requires_a_staging_bucket():
+    with pytest.raises(ValueError, match="gcs_staging_uri"):
+        DocumentAIExtractor(_config(gcs_staging_uri=None), client=object(), storage_client=object())
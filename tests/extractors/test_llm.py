@@ -30,3 +30,62 @@ def test_llm_extractor_parses_json():
     )
     result = extractor.extract(request)
     assert result.content["summary"] == "ok"
+
+
+class _BatchClient:
+    """Answers batched prompts with ``entries``; single-document prompts with a fixed result."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.prompts = []
+        self.max_tokens = []
+
+    def generate(self, prompt: str, *, max_tokens=None):
+        self.prompts.append(prompt)
+        self.max_tokens.append(max_tokens)
+        if "Document key:" in prompt:
+            content = json.dumps(self.entries) if isinstance(self.entries, dict) else self.entries
+        else:
+            content = json.dumps({"summary": "single", "fields": [], "answers": []})
+        return {"id": "cmpl", "choices": [{"message": {"content": content}}]}
+
+
+def _requests(count):
+    return [
+        ExtractionRequest(doc_id=f"doc-{index}", document_path=Path(f"doc-{index}.pdf"))
+        for index in range(count)
+    ]
+
+
+def test_llm_extractor_splits_batched_response():
+    client = _BatchClient(
+        {"doc_0": {"summary": "first", "fields": []}, "doc_1": {"summary": "second"}}
+    )
+    extractor = LLMExtractor(client, batch_size=2)
+
+    outcomes = extractor.extract_many(_requests(2))
+
+    assert [outcome.doc_id for outcome in outcomes] == ["doc-0", "doc-1"]
+    assert [outcome.content["summary"] for outcome in outcomes] == ["first", "second"]
+    assert outcomes[1].raw_response["batch"] == {"key": "doc_1", "documents": 2}
+    assert len(client.prompts) == 1
+    assert "doc-1.pdf" in client.prompts[0]
+
+
+def test_llm_extractor_falls_back_for_missing_batch_entries():
+    client = _BatchClient({"doc_0": {"summary": "first"}, "doc_2": "not an object"})
+    extractor = LLMExtractor(client, batch_size=3)
+
+    outcomes = extractor.extract_many(_requests(3))
+
+    assert [outcome.content["summary"] for outcome in outcomes] == ["first", "single", "single"]
+    assert len(client.prompts) == 3
+
+
+def test_llm_extractor_falls_back_when_batch_is_not_json():
+    client = _BatchClient("{truncated")
+    extractor = LLMExtractor(client, batch_size=2)
+
+    outcomes = extractor.extract_many(_requests(2))
+
+    assert [outcome.content["summary"] for outcome in outcomes] == ["single", "single"]
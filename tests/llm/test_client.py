@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from docvqa.config.models import LLMConfig
+from docvqa.extractors.base import TransientExtractionError
+from docvqa.llm.client import LLMClient
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    status = 200
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"choices": [{"message": {"content": "{}"}}]}).encode()
+        self.send_response(self.status)
+        if self.status == 429:
+            self.send_header("Retry-After", "7")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:  # pragma: no cover - silence test output
+        pass
+
+
+@pytest.fixture
+def chat_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    _ChatHandler.status = 200
+
+
+def _config(server) -> LLMConfig:
+    host, port = server.server_address
+    return LLMConfig(api_base=f"http://{host}:{port}/v1/chat/completions", api_key="k", model="m")
+
+
+def test_client_reuses_pooled_connections(chat_server):
+    client = LLMClient(_config(chat_server), pool_size=2)
+    for _ in range(3):
+        assert client.generate("prompt")["choices"]
+
+    stats = client.pool_stats()
+    assert stats.misses == 1
+    assert stats.hits == 2
+    client.close()
+
+
+def test_client_marks_throttling_as_transient(chat_server):
+    _ChatHandler.status = 429
+    client = LLMClient(_config(chat_server))
+
+    with pytest.raises(TransientExtractionError) as excinfo:
+        client.generate("prompt")
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after == 7.0
+
+
+def test_async_client_generates_completion(chat_server):
+    pytest.importorskip("httpx")
+    from docvqa.llm.client import AsyncLLMClient
+
+    async def _generate():
+        client = AsyncLLMClient(_config(chat_server), pool_size=4)
+        try:
+            return await client.generate("prompt")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(_generate())["choices"]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from docvqa.config.models import LocalJSONConfig, PipelineConfig
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.base import BaseExtractor
+from docvqa.pipeline.adaptive import AdaptiveConcurrencyController
+from docvqa.pipeline.run import PipelineRunner
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.local import LocalJSONWriter
+
+
+def _controller(**overrides) -> AdaptiveConcurrencyController:
+    options = {"minimum": 1, "maximum": 8, "latency_target_seconds": 1.0}
+    options.update(overrides)
+    return AdaptiveConcurrencyController(**options)
+
+
+def test_controller_increases_additively_while_healthy():
+    controller = _controller()
+    for expected in [2, 3, 4]:
+        for _ in range(controller.limit):
+            controller.on_success(0.1)
+        assert controller.limit == expected
+
+
+def test_controller_cuts_multiplicatively_once_per_burst():
+    controller = _controller(minimum=2)
+    while controller.limit < 8:
+        controller.on_success(0.1)
+
+    controller.on_overload()
+    controller.on_overload()
+    assert controller.limit == 4
+
+    for _ in range(4):
+        controller.on_success(0.1)
+    controller.on_overload()
+    assert controller.limit == 2
+
+
+def test_controller_backs_off_when_p95_exceeds_target():
+    controller = _controller(minimum=1)
+    while controller.limit < 4:
+        controller.on_success(0.1)
+    for _ in range(20):
+        controller.on_success(5.0)
+    assert controller.limit < 4
+
+
+class _FastExtractor(BaseExtractor):
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:
+        return ExtractionResult(doc_id=request.doc_id, content={})
+
+
+def test_adaptive_runner_reports_current_concurrency(tmp_path):
+    dataset = [
+        DocumentExample(doc_id=f"doc-{index}", document_path=tmp_path / f"{index}.pdf")
+        for index in range(30)
+    ]
+    storage = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path), run_id="adaptive")
+    config = PipelineConfig(concurrency=8, adaptive_concurrency=True, min_concurrency=2)
+
+    stats = PipelineRunner(dataset, _FastExtractor(), storage, config).run()
+
+    assert stats.succeeded == 30
+    assert 2 < stats.concurrency <= 8
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from docvqa.config.models import LocalJSONConfig, PipelineConfig
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.base import BaseExtractor, ExtractionError
+from docvqa.pipeline.run import AsyncPipelineRunner
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.local import LocalJSONWriter
+
+
+class _SlowAsyncExtractor(BaseExtractor):
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:  # pragma: no cover
+        raise AssertionError("sync path should not be used")
+
+    async def extract_async(self, request: ExtractionRequest) -> ExtractionResult:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if request.doc_id == "doc-3":
+            raise ExtractionError("boom")
+        return ExtractionResult(doc_id=request.doc_id, content={"summary": request.doc_id})
+
+
+def test_async_runner_limits_concurrency_and_writes_results(tmp_path):
+    dataset = [
+        DocumentExample(doc_id=f"doc-{index}", document_path=tmp_path / f"{index}.txt")
+        for index in range(40)
+    ]
+    extractor = _SlowAsyncExtractor()
+    storage = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path), run_id="async")
+    config = PipelineConfig(engine="asyncio", async_concurrency=8)
+
+    stats = AsyncPipelineRunner(dataset, extractor, storage, config).run()
+
+    assert stats.processed == 40
+    assert stats.succeeded == 39
+    assert stats.failed == 1
+    assert 1 < extractor.peak <= 8
+    lines = (tmp_path / "async.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len({json.loads(line)["doc_id"] for line in lines}) == 39
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from docvqa.config.models import BatchAPIConfig, LLMConfig, LocalJSONConfig, PipelineConfig
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.llm import LLMExtractor
+from docvqa.llm.batch import BatchAPIClient
+from docvqa.llm.client import LLMClient
+from docvqa.pipeline.batch import BatchPipelineRunner
+from docvqa.pipeline.checkpoint import CheckpointIndex
+from docvqa.storage.local import LocalJSONWriter
+
+
+class _FakeBatchServer(ThreadingHTTPServer):
+    """In-memory OpenAI-style Batch API: batches complete after ``polls_until_done`` polls."""
+
+    def __init__(self, polls_until_done: int = 1) -> None:
+        super().__init__(("127.0.0.1", 0), _BatchHandler)
+        self.polls_until_done = polls_until_done
+        self.files = {}
+        self.batches = {}
+        self.created = 0
+        self.expiring = 0
+
+    def run_batch(self, batch) -> None:
+        if self.expiring:
+            self.expiring -= 1
+            batch.update(status="expired")
+            return
+        lines = []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            doc_id = request["custom_id"]
+            if doc_id.endswith("bad"):
+                lines.append({"custom_id": doc_id, "response": None, "error": {"message": "nope"}})
+                continue
+            content = json.dumps({"summary": f"summary of {doc_id}", "fields": []})
+            body = {"choices": [{"message": {"content": content}}]}
+            lines.append({"custom_id": doc_id, "response": {"status_code": 200, "body": body}})
+        output_id = f"file-out-{batch['id']}"
+        self.files[output_id] = "\n".join(json.dumps(line) for line in lines)
+        batch.update(status="completed", output_file_id=output_id)
+
+
+class _BatchHandler(BaseHTTPRequestHandler):
+    server: _FakeBatchServer
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "file":
+                    file_id = f"file-{len(self.server.files)}"
+                    content = part.get_content()
+                    if isinstance(content, bytes):
+                        content = content.decode()
+                    self.server.files[file_id] = content
+                    return self._reply({"id": file_id})
+            return self._reply({"error": "missing file"}, status=400)
+        if self.path == "/v1/batches":
+            payload = json.loads(body)
+            assert payload["endpoint"] == "/v1/chat/completions"
+            self.server.created += 1
+            batch_id = f"batch-{self.server.created}"
+            self.server.batches[batch_id] = {
+                "id": batch_id,
+                "status": "validating",
+                "input_file_id": payload["input_file_id"],
+                "polls": 0,
+            }
+            return self._reply(self.server.batches[batch_id])
+        self._reply({"error": "not found"}, status=404)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        parts = self.path.strip("/").split("/")
+        if parts[1] == "batches":
+            batch = self.server.batches[parts[2]]
+            batch["polls"] += 1
+            if batch["status"] != "completed" and batch["polls"] >= self.server.polls_until_done:
+                self.server.run_batch(batch)
+            return self._reply(batch)
+        if parts[1] == "files" and parts[3] == "content":
+            data = self.server.files[parts[2]].encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return None
+        return self._reply({"error": "not found"}, status=404)
+
+    def _reply(self, payload, status: int = 200) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:  # pragma: no cover - keep test output quiet
+        pass
+
+
+@pytest.fixture
+def batch_server():
+    server = _FakeBatchServer(polls_until_done=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _runner(server, tmp_path, dataset, *, run_id="nightly", checkpoint=None, sleeps=None):
+    resume = checkpoint is not None and bool(checkpoint.completed)
+    config = LLMConfig(
+        api_base=f"http://127.0.0.1:{server.server_port}/v1/chat/completions",
+        api_key="key",
+        model="model",
+        batch_api=BatchAPIConfig(max_requests_per_file=2, work_dir=tmp_path / "batches"),
+    )
+    storage = LocalJSONWriter(
+        LocalJSONConfig(output_dir=tmp_path / "out"), run_id=run_id, resume=resume
+    )
+    return BatchPipelineRunner(
+        dataset,
+        LLMExtractor(LLMClient(config)),
+        storage,
+        PipelineConfig(),
+        BatchAPIClient(config),
+        config.batch_api,
+        run_id=run_id,
+        checkpoint=checkpoint,
+        sleep=(sleeps.append if sleeps is not None else lambda _seconds: None),
+    )
+
+
+def _dataset(tmp_path, names):
+    return [DocumentExample(doc_id=name, document_path=tmp_path / f"{name}.pdf") for name in names]
+
+
+def _written(tmp_path, run_id="nightly"):
+    path = tmp_path / "out" / f"{run_id}.jsonl"
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_batch_runner_submits_polls_and_streams_results(batch_server, tmp_path):
+    sleeps = []
+    runner = _runner(
+        batch_server, tmp_path, _dataset(tmp_path, ["a", "b", "c-bad", "d", "e"]), sleeps=sleeps
+    )
+
+    stats = runner.run()
+
+    assert batch_server.created == 3
+    assert (stats.processed, stats.succeeded, stats.failed) == (5, 4, 1)
+    results = {record["doc_id"]: record for record in _written(tmp_path)}
+    assert sorted(results) == ["a", "b", "d", "e"]
+    assert results["a"]["content"]["summary"] == "summary of a"
+    assert sleeps == [30.0]
+    state = json.loads((tmp_path / "batches" / "nightly" / "state.json").read_text())
+    assert all(job["collected"] for job in state["batches"])
+
+
+def test_batch_runner_resumes_submitted_batches(batch_server, tmp_path):
+    checkpoint = CheckpointIndex.for_run(tmp_path / "checkpoints", "nightly")
+    _runner(batch_server, tmp_path, _dataset(tmp_path, ["a", "b", "c"]), checkpoint=checkpoint).run()
+    state_path = tmp_path / "batches" / "nightly" / "state.json"
+    state = json.loads(state_path.read_text())
+    state["batches"][1]["collected"] = False
+    state_path.write_text(json.dumps(state))
+
+    checkpoint = CheckpointIndex.for_run(tmp_path / "checkpoints", "nightly")
+    resumed = _runner(batch_server, tmp_path, [], checkpoint=checkpoint)
+    stats = resumed.run()
+
+    assert batch_server.created == 2
+    assert (stats.processed, stats.succeeded) == (3, 1)
+    assert [record["doc_id"] for record in _written(tmp_path)] == ["a", "b", "c"]
+
+
+def test_batch_runner_resumes_an_interrupted_submission(batch_server, tmp_path):
+    dataset = _dataset(tmp_path, ["a", "b", "c", "d", "e"])
+    interrupted = _runner(batch_server, tmp_path, dataset)
+    create = interrupted._client.create
+
+    def crash_after_first_batch(file_id):
+        if batch_server.created:
+            raise KeyboardInterrupt
+        return create(file_id)
+
+    interrupted._client.create = crash_after_first_batch
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.run()
+    state = json.loads((tmp_path / "batches" / "nightly" / "state.json").read_text())
+    assert (len(state["batches"]), state["submitted"]) == (1, False)
+
+    stats = _runner(batch_server, tmp_path, dataset).run()
+
+    assert batch_server.created == 3
+    assert (stats.processed, stats.succeeded) == (5, 5)
+    assert sorted(record["doc_id"] for record in _written(tmp_path)) == ["a", "b", "c", "d", "e"]
+    requests = tmp_path / "batches" / "nightly" / "requests-00002.jsonl"
+    assert json.loads(requests.read_text())["document_path"] == str(tmp_path / "e.pdf")
+
+
+def test_batch_runner_resubmits_documents_of_expired_batches_on_resume(batch_server, tmp_path):
+    dataset = _dataset(tmp_path, ["a", "b", "c"])
+    batch_server.expiring = 1
+    checkpoint = CheckpointIndex.for_run(tmp_path / "checkpoints", "nightly")
+    stats = _runner(batch_server, tmp_path, dataset, checkpoint=checkpoint).run()
+    assert (stats.processed, stats.succeeded, stats.failed) == (3, 1, 2)
+
+    checkpoint = CheckpointIndex.for_run(tmp_path / "checkpoints", "nightly")
+    stats = _runner(batch_server, tmp_path, dataset, checkpoint=checkpoint).run()
+
+    assert batch_server.created == 3
+    assert (stats.processed, stats.succeeded, stats.failed) == (3, 2, 0)
+    assert sorted(record["doc_id"] for record in _written(tmp_path)) == ["a", "b", "c"]
+    requests = tmp_path / "batches" / "nightly" / "requests-00002.jsonl"
+    assert [json.loads(line)["doc_id"] for line in requests.read_text().splitlines()] == ["a", "b"]
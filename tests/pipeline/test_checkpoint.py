@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from docvqa.config.models import LocalJSONConfig, PipelineConfig
+from docvqa.data.dataset import DEFAULT_MANIFEST, DocVQADataset
+from docvqa.extractors.base import BaseExtractor
+from docvqa.pipeline.checkpoint import CheckpointIndex
+from docvqa.pipeline.run import PipelineRunner
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.local import LocalJSONWriter
+
+
+class _CrashingExtractor(BaseExtractor):
+    def __init__(self, crash_on=None) -> None:
+        self.crash_on = crash_on
+        self.seen = []
+
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:
+        if request.doc_id == self.crash_on:
+            raise KeyboardInterrupt
+        self.seen.append(request.doc_id)
+        return ExtractionResult(doc_id=request.doc_id, content={})
+
+
+def _write_manifest(root, count: int) -> None:
+    with (root / DEFAULT_MANIFEST).open("w", encoding="utf-8") as handle:
+        for index in range(count):
+            handle.write(json.dumps({"id": f"doc-{index}", "document_path": f"{index}.pdf"}) + "\n")
+
+
+def _run(tmp_path, extractor, *, resume: bool) -> CheckpointIndex:
+    checkpoint = CheckpointIndex.for_run(tmp_path / "checkpoints", "run")
+    dataset = DocVQADataset(tmp_path, skip_ids=checkpoint.completed)
+    config = LocalJSONConfig(output_dir=tmp_path / "out", flush_every=1000)
+    storage = LocalJSONWriter(config, run_id="run", resume=resume)
+    pipeline_config = PipelineConfig(checkpoint_every=2)
+    PipelineRunner(dataset, extractor, storage, pipeline_config, checkpoint=checkpoint).run()
+    return checkpoint
+
+
+def test_resumed_run_skips_checkpointed_documents(tmp_path):
+    _write_manifest(tmp_path, 8)
+
+    with pytest.raises(KeyboardInterrupt):
+        _run(tmp_path, _CrashingExtractor(crash_on="doc-5"), resume=False)
+
+    resumed = _CrashingExtractor()
+    checkpoint = _run(tmp_path, resumed, resume=True)
+
+    assert resumed.seen == ["doc-4", "doc-5", "doc-6", "doc-7"]
+    assert checkpoint.completed == {f"doc-{index}" for index in range(8)}
+    lines = (tmp_path / "out" / "run.jsonl").read_text(encoding="utf-8").splitlines()
+    assert {json.loads(line)["doc_id"] for line in lines} == checkpoint.completed
+
+
+def test_checkpoint_ignores_torn_final_line(tmp_path):
+    path = tmp_path / "run.done"
+    path.write_text("doc-1\ndoc-2\ndoc-", encoding="utf-8")
+
+    checkpoint = CheckpointIndex(path)
+    checkpoint.record("doc-3")
+    checkpoint.flush()
+
+    assert CheckpointIndex(path).completed == {"doc-1", "doc-2", "doc-3"}
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from docvqa.pipeline.hedging import DeadlineExceededError, Hedger, LatencyTracker
+
+
+def _primed(percentile=90.0, samples=20, latency=0.01, max_workers=4, **kwargs):
+    hedger = Hedger(percentile=percentile, min_samples=samples, max_workers=max_workers, **kwargs)
+    for _ in range(samples):
+        hedger.tracker.record(latency)
+    return hedger
+
+
+class _StuckOnce:
+    """The first call blocks until released; later calls return immediately."""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> str:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            self.release.wait(5)
+            return "slow"
+        return "fast"
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(95) is None
+    for value in range(1, 101):
+        tracker.record(float(value))
+    assert tracker.percentile(50) == 51.0
+    assert tracker.percentile(99) == 100.0
+
+
+def test_hedger_duplicates_a_slow_attempt_and_takes_the_first_result():
+    hedger = _primed()
+    func = _StuckOnce()
+    try:
+        started = time.monotonic()
+        assert hedger.call(func) == "fast"
+        assert time.monotonic() - started < 1.0
+    finally:
+        func.release.set()
+        hedger.shutdown()
+    assert (hedger.hedged, hedger.hedge_wins) == (1, 1)
+
+
+def test_hedger_waits_for_enough_samples_before_hedging():
+    hedger = Hedger(percentile=90.0, min_samples=5, max_workers=2)
+    assert hedger.hedge_delay() is None
+    assert hedger.call(lambda: "ok") == "ok"
+    assert hedger.hedged == 0
+    hedger.shutdown()
+
+
+def test_hedger_respects_the_hedge_budget():
+    hedger = _primed(budget_ratio=0.0)
+    first, second = _StuckOnce(), _StuckOnce()
+    try:
+        assert hedger.call(first) == "fast"
+        threading.Timer(0.2, second.release.set).start()
+        assert hedger.call(second) == "slow"
+    finally:
+        first.release.set()
+        second.release.set()
+        hedger.shutdown()
+    assert hedger.hedged == 1
+    assert (first.calls, second.calls) == (2, 1)
+
+
+def test_hedger_enforces_the_document_deadline():
+    hedger = Hedger(percentile=None, max_workers=2)
+    release = threading.Event()
+    try:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            hedger.call(lambda: release.wait(5), deadline=started + 0.1)
+        assert time.monotonic() - started < 1.0
+    finally:
+        release.set()
+        hedger.shutdown()
+
+
+def test_hedge_is_sent_on_time_while_abandoned_attempts_hold_the_pool():
+    hedger = _primed(latency=0.3, max_workers=1)
+    stuck = threading.Event()
+    func = _StuckOnce()
+    try:
+        for _ in range(2):
+            with pytest.raises(DeadlineExceededError):
+                hedger.call(lambda: stuck.wait(5), deadline=time.monotonic() + 0.05)
+        started = time.monotonic()
+        assert hedger.call(func) == "fast"
+        assert time.monotonic() - started < 1.0
+    finally:
+        stuck.set()
+        func.release.set()
+        hedger.shutdown()
+    assert (hedger.hedged, hedger.hedge_wins) == (1, 1)
+
+
+def test_hedger_async_cancels_the_losing_attempt():
+    hedger = _primed()
+    state = {"calls": 0, "cancelled": False}
+
+    async def attempt() -> str:
+        state["calls"] += 1
+        if state["calls"] == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+            return "slow"
+        return "fast"
+
+    async def main() -> str:
+        result = await hedger.call_async(attempt)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "fast"
+    assert state["cancelled"]
+    assert hedger.hedged == 1
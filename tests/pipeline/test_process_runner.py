@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from docvqa.config.models import LocalJSONConfig, PipelineConfig, PipelineEngine
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.base import BaseExtractor, ExtractionError
+from docvqa.pipeline.run import PipelineRunner
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.local import LocalJSONWriter
+from docvqa.utils.metrics import get_metrics
+
+_BUILT_IN = []
+
+
+class _SplitExtractor(BaseExtractor):
+    def __init__(self) -> None:
+        _BUILT_IN.append(os.getpid())
+
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:  # pragma: no cover
+        return self.parse(request, self.fetch(request))
+
+    def fetch(self, request: ExtractionRequest) -> dict:
+        return {"doc_id": request.doc_id, "fetched_by": os.getpid()}
+
+    def parse(self, request: ExtractionRequest, payload: dict) -> ExtractionResult:
+        if request.doc_id == "bad":
+            raise ExtractionError("unparseable")
+        content = {"fetched_by": payload["fetched_by"], "parsed_by": os.getpid()}
+        content["builds"] = _BUILT_IN.count(os.getpid())
+        return ExtractionResult(doc_id=request.doc_id, content=content)
+
+
+def test_parse_runs_in_worker_processes(tmp_path):
+    dataset = [
+        DocumentExample(doc_id=doc_id, document_path=tmp_path / f"{doc_id}.pdf")
+        for doc_id in ["doc-1", "doc-2", "bad", "doc-3", "doc-4"]
+    ]
+    storage = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path), run_id="run")
+    config = PipelineConfig(
+        engine=PipelineEngine.PROCESSES, concurrency=2, process_workers=2, retry_attempts=0
+    )
+    runner = PipelineRunner(
+        dataset, _SplitExtractor(), storage, config, extractor_factory=_SplitExtractor
+    )
+
+    stats = runner.run()
+
+    assert stats.succeeded == 4
+    assert stats.failed == 1
+    records = [json.loads(line) for line in storage.output_path.read_text().splitlines()]
+    assert {record["doc_id"] for record in records} == {"doc-1", "doc-2", "doc-3", "doc-4"}
+    for record in records:
+        assert record["content"]["fetched_by"] == os.getpid()
+        assert record["content"]["parsed_by"] != os.getpid()
+        assert record["content"]["builds"] == 1
+
+
+def test_processes_engine_requires_a_factory(tmp_path):
+    storage = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path), run_id="run")
+    with pytest.raises(ValueError, match="extractor_factory"):
+        PipelineRunner([], _SplitExtractor(), storage, PipelineConfig(engine="processes"))
+
+
+def test_parse_timings_from_worker_processes_reach_the_parent_registry(tmp_path):
+    dataset = [
+        DocumentExample(doc_id=doc_id, document_path=tmp_path / f"{doc_id}.pdf")
+        for doc_id in ["doc-1", "bad", "doc-2"]
+    ]
+    storage = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path), run_id="run")
+    config = PipelineConfig(
+        engine=PipelineEngine.PROCESSES, concurrency=2, process_workers=2, retry_attempts=0
+    )
+    runner = PipelineRunner(
+        dataset, _TimedExtractor(), storage, config, extractor_factory=_TimedExtractor
+    )
+    before = _parse_count()
+
+    stats = runner.run()
+
+    assert stats.succeeded == 2
+    assert _parse_count() - before == 3
+
+
+class _TimedExtractor(_SplitExtractor):
+    name = "timed"
+
+    def parse(self, request: ExtractionRequest, payload: dict) -> ExtractionResult:
+        with get_metrics().time("parse", provider=self.name):
+            return super().parse(request, payload)
+
+
+def _parse_count() -> int:
+    key = (("provider", "timed"), ("stage", "parse"))
+    return get_metrics().stages.snapshot().get(key, (0, 0.0, 0.0))[0]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+
+from docvqa.extractors.base import ExtractionError, TransientExtractionError
+from docvqa.pipeline.retry import RetryBudget, RetryPolicy
+
+
+class _Flaky:
+    def __init__(self, failures: int, error: Exception) -> None:
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def test_retry_policy_retries_transient_errors_with_retry_after():
+    delays = []
+    policy = RetryPolicy(3, 0.5, sleep=delays.append, rng=lambda: 1.0)
+    func = _Flaky(2, TransientExtractionError("throttled", status_code=429, retry_after=4.0))
+
+    assert policy.call(func) == "ok"
+    assert func.calls == 3
+    assert delays == [4.0, 4.0]
+    assert policy.retries == 2
+
+
+def test_retry_policy_backoff_grows_and_is_capped():
+    policy = RetryPolicy(5, 1.0, max_backoff_seconds=3.0, rng=lambda: 1.0)
+    assert [policy.backoff(attempt) for attempt in range(4)] == [1.0, 2.0, 3.0, 3.0]
+
+
+def test_retry_policy_does_not_retry_permanent_errors():
+    policy = RetryPolicy(3, 0.5, sleep=lambda _: None)
+    func = _Flaky(1, ExtractionError("bad request"))
+
+    with pytest.raises(ExtractionError):
+        policy.call(func)
+    assert func.calls == 1
+
+
+def test_retry_budget_stops_retry_storms():
+    budget = RetryBudget(0.0, reserve=1.0)
+    policy = RetryPolicy(3, 0.5, budget=budget, sleep=lambda _: None)
+    func = _Flaky(10, TransientExtractionError("unavailable", status_code=503))
+
+    with pytest.raises(TransientExtractionError):
+        policy.call(func)
+    assert func.calls == 2
+    assert policy.budget_exhausted == 1
+
+
+def test_retry_policy_stops_when_backoff_would_pass_the_deadline():
+    import time
+
+    delays = []
+    policy = RetryPolicy(3, 5.0, sleep=delays.append, rng=lambda: 1.0)
+    func = _Flaky(1, TransientExtractionError("unavailable", status_code=503))
+
+    with pytest.raises(TransientExtractionError):
+        policy.call(func, deadline=time.monotonic() + 1.0)
+    assert func.calls == 1
+    assert delays == []
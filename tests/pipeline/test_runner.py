@@ -4,7 +4,7 @@ import json
 
 from docvqa.config.models import LocalJSONConfig, PipelineConfig
 from docvqa.data.dataset import DocumentExample
-from docvqa.extractors.base import BaseExtractor
+from docvqa.extractors.base import BaseExtractor, ExtractionError
 from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
 from docvqa.pipeline.run import PipelineRunner
 from docvqa.storage.local import LocalJSONWriter
@@ -37,3 +37,61 @@ def test_pipeline_runner_writes_results(tmp_path):
     for line in contents:
         payload = json.loads(line)
         assert payload["raw_response"]["status"] == "ok"
+
+
+class _RecordingStorage(LocalJSONWriter):
+    def __init__(self, tmp_path) -> None:
+        super().__init__(LocalJSONConfig(output_dir=tmp_path / "out"), run_id="window")
+        self.written = 0
+
+    def write(self, result: ExtractionResult) -> None:
+        super().write(result)
+        self.written += 1
+
+
+def test_concurrent_runner_bounds_in_flight_documents(tmp_path):
+    storage = _RecordingStorage(tmp_path)
+    observed_in_flight = []
+
+    def _examples():
+        for index in range(50):
+            observed_in_flight.append(index - storage.written)
+            yield DocumentExample(doc_id=f"doc-{index}", document_path=tmp_path / f"{index}.txt")
+
+    config = PipelineConfig(concurrency=4, max_in_flight=6)
+    stats = PipelineRunner(_examples(), _FakeExtractor(), storage, config).run()
+
+    assert stats.succeeded == 50
+    assert max(observed_in_flight) <= 6
+
+
+class _BatchingExtractor(_FakeExtractor):
+    def __init__(self) -> None:
+        self.calls = []
+
+    @property
+    def batch_size(self) -> int:
+        return 3
+
+    def extract_many(self, requests):
+        self.calls.append([request.doc_id for request in requests])
+        outcomes = super().extract_many(requests)
+        if requests[0].doc_id == "doc-3":
+            outcomes[-1] = ExtractionError("unparseable")
+        return outcomes
+
+
+def test_pipeline_runner_groups_documents_into_batches(tmp_path):
+    dataset = [
+        DocumentExample(doc_id=f"doc-{index}", document_path=tmp_path / f"doc-{index}.txt")
+        for index in range(5)
+    ]
+    storage = _RecordingStorage(tmp_path)
+    extractor = _BatchingExtractor()
+    runner = PipelineRunner(dataset, extractor, storage, PipelineConfig(concurrency=2))
+
+    stats = runner.run()
+
+    assert sorted(extractor.calls) == [["doc-0", "doc-1", "doc-2"], ["doc-3", "doc-4"]]
+    assert (stats.processed, stats.succeeded, stats.failed) == (5, 4, 1)
+    assert storage.written == 4
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import threading
+
+import pytest
+
+from docvqa.config.models import FirestoreConfig, PipelineConfig
+from docvqa.data.dataset import DEFAULT_MANIFEST, DocVQADataset
+from docvqa.extractors.base import BaseExtractor
+from docvqa.pipeline.checkpoint import CheckpointIndex
+from docvqa.pipeline.run import PipelineRunner
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.base import StorageWriteError
+from docvqa.storage.firestore import FirestoreWriter
+
+
+class _FakeRef:
+    def __init__(self, path: str, client: "_FakeClient") -> None:
+        self.path = path
+        self._client = client
+
+    def collection(self, name: str) -> "_FakeRef":
+        return _FakeRef(f"{self.path}/{name}", self._client)
+
+    def document(self, name: str) -> "_FakeRef":
+        return _FakeRef(f"{self.path}/{name}", self._client)
+
+    def set(self, data: dict) -> None:
+        with self._client.lock:
+            self._client.documents[self.path] = data
+
+
+class _FakeBatch:
+    def __init__(self, client: "_FakeClient") -> None:
+        self._client = client
+        self._writes = []
+
+    def set(self, ref: _FakeRef, data: dict) -> None:
+        self._writes.append((ref.path, data))
+
+    def commit(self) -> None:
+        with self._client.lock:
+            self._client.commits += 1
+            for path, _ in self._writes:
+                if self._client.rejecting or path.endswith("/poison"):
+                    raise ValueError("document too large")
+            if self._client.transient_failures:
+                self._client.transient_failures -= 1
+                raise ConnectionError("unavailable")
+            self._client.documents.update(dict(self._writes))
+
+
+class _FakeClient:
+    def __init__(self, transient_failures: int = 0) -> None:
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.commits = 0
+        self.transient_failures = transient_failures
+        self.rejecting = False
+
+    def collection(self, name: str) -> _FakeRef:
+        return _FakeRef(name, self)
+
+    def batch(self) -> _FakeBatch:
+        return _FakeBatch(self)
+
+
+def _config(**overrides) -> FirestoreConfig:
+    return FirestoreConfig(project_id="test", commit_backoff_seconds=0, **overrides)
+
+
+def _result(doc_id: str) -> ExtractionResult:
+    return ExtractionResult(doc_id=doc_id, content={"summary": doc_id})
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_writer_commits_all_results(background):
+    client = _FakeClient(transient_failures=1)
+    writer = FirestoreWriter(
+        _config(batch_size=10, background=background), run_id="run", client=client
+    )
+    for index in range(45):
+        writer.write(_result(f"doc-{index}"))
+    writer.finalize()
+
+    assert len(client.documents) == 45
+    assert "docvqa_runs/run/results/doc-44" in client.documents
+    assert not writer.failed_doc_ids
+
+
+def test_background_flush_persists_pending_results():
+    client = _FakeClient()
+    writer = FirestoreWriter(_config(batch_size=100, background=True), run_id="run", client=client)
+    writer.write(_result("doc-1"))
+    writer.flush()
+
+    assert "docvqa_runs/run/results/doc-1" in client.documents
+    writer.finalize()
+
+
+def test_failed_batch_is_split_to_isolate_bad_documents():
+    client = _FakeClient()
+    writer = FirestoreWriter(_config(batch_size=8), run_id="run", client=client)
+    for doc_id in ["a", "b", "c", "poison", "d", "e", "f", "g"]:
+        writer.write(_result(doc_id))
+    with pytest.raises(StorageWriteError) as raised:
+        writer.finalize()
+
+    assert raised.value.doc_ids == ["poison"]
+    assert writer.failed_doc_ids == ["poison"]
+    assert len(client.documents) == 7
+
+
+def test_exhausted_transient_failures_fail_the_batch_without_splitting():
+    client = _FakeClient(transient_failures=100)
+    writer = FirestoreWriter(_config(batch_size=8, commit_retries=2), run_id="run", client=client)
+    for index in range(8):
+        writer.write(_result(f"doc-{index}"))
+    with pytest.raises(StorageWriteError) as raised:
+        writer.finalize()
+
+    assert raised.value.doc_ids == [f"doc-{index}" for index in range(8)]
+    assert client.commits == 3
+    assert not client.documents
+
+
+def test_shard_partition_records_completion():
+    client = _FakeClient()
+    writer = FirestoreWriter(
+        _config(), run_id="run", client=client, partition="shard-00001-of-00004"
+    )
+    writer.write(_result("doc-1"))
+    writer.write(_result("poison"))
+    with pytest.raises(StorageWriteError):
+        writer.finalize()
+
+    assert "docvqa_runs/run/results/doc-1" in client.documents
+    status = client.documents["docvqa_runs/run/shards/shard-00001-of-00004"]
+    assert status["written"] == 1
+    assert status["failed"] == 1
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_flush_reports_each_failure_once(background):
+    client = _FakeClient()
+    writer = FirestoreWriter(_config(background=background), run_id="run", client=client)
+    writer.write(_result("poison"))
+    with pytest.raises(StorageWriteError) as raised:
+        writer.flush()
+    assert raised.value.doc_ids == ["poison"]
+
+    writer.write(_result("doc-1"))
+    writer.flush()
+    writer.finalize()
+
+
+class _EchoExtractor(BaseExtractor):
+    def __init__(self) -> None:
+        self.seen = []
+
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:
+        self.seen.append(request.doc_id)
+        return _result(request.doc_id)
+
+
+def test_unpersisted_documents_are_not_checkpointed(tmp_path):
+    with (tmp_path / DEFAULT_MANIFEST).open("w", encoding="utf-8") as handle:
+        for index in range(5):
+            handle.write(json.dumps({"id": f"doc-{index}", "document_path": f"{index}.pdf"}))
+            handle.write("\n")
+    client = _FakeClient()
+    client.rejecting = True
+
+    def run() -> tuple:
+        checkpoint = CheckpointIndex.for_run(tmp_path / "checkpoints", "run")
+        dataset = DocVQADataset(tmp_path, skip_ids=checkpoint.completed)
+        extractor = _EchoExtractor()
+        writer = FirestoreWriter(_config(batch_size=2), run_id="run", client=client)
+        config = PipelineConfig(checkpoint_every=2)
+        stats = PipelineRunner(dataset, extractor, writer, config, checkpoint=checkpoint).run()
+        return stats, extractor.seen
+
+    stats, _ = run()
+    assert (stats.succeeded, stats.failed) == (0, 5)
+    assert CheckpointIndex.for_run(tmp_path / "checkpoints", "run").completed == set()
+
+    client.rejecting = False
+    stats, seen = run()
+    assert seen == [f"doc-{index}" for index in range(5)]
+    assert stats.succeeded == 5
+    assert len([path for path in client.documents if "/results/" in path]) == 5
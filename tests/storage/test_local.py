@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from docvqa.config.models import LocalJSONConfig
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.storage.local import LocalJSONWriter, merge_partitions
+
+
+def _result(doc_id: str) -> ExtractionResult:
+    return ExtractionResult(doc_id=doc_id, content={"summary": doc_id}, raw_response={"ok": True})
+
+
+def test_streaming_writer_flushes_before_finalize(tmp_path):
+    config = LocalJSONConfig(output_dir=tmp_path, flush_every=2, fsync="flush")
+    writer = LocalJSONWriter(config, run_id="stream")
+    partial_path = tmp_path / "stream.jsonl.partial"
+
+    writer.write(_result("doc-1"))
+    writer.write(_result("doc-2"))
+    writer.write(_result("doc-3"))
+
+    flushed = partial_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["doc_id"] for line in flushed] == ["doc-1", "doc-2"]
+    assert not writer.output_path.exists()
+
+    writer.finalize()
+
+    assert not partial_path.exists()
+    lines = writer.output_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["doc_id"] for line in lines] == ["doc-1", "doc-2", "doc-3"]
+
+
+def test_buffered_writer_writes_on_finalize(tmp_path):
+    writer = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path, streaming=False), run_id="buf")
+    writer.write(_result("doc-1"))
+    assert not list(tmp_path.iterdir())
+
+    writer.finalize()
+
+    assert json.loads(writer.output_path.read_text(encoding="utf-8"))["doc_id"] == "doc-1"
+
+
+def test_merge_combines_finalized_shards(tmp_path):
+    config = LocalJSONConfig(output_dir=tmp_path)
+    for index, doc_ids in enumerate([["a", "b"], ["c", "a"]]):
+        writer = LocalJSONWriter(config, run_id="run", partition=f"shard-{index:05d}-of-00003")
+        for doc_id in doc_ids:
+            writer.write(_result(doc_id))
+        writer.finalize()
+
+    with pytest.raises(ValueError, match=r"shards \[2\]"):
+        merge_partitions(tmp_path, "run")
+
+    path, written = merge_partitions(tmp_path, "run", allow_partial=True)
+    assert path == tmp_path / "run.jsonl"
+    assert written == 3
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["doc_id"] for line in lines] == ["a", "b", "c"]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from docvqa.config.models import ParquetConfig  # noqa: E402
+from docvqa.evaluation.loader import accumulate_results  # noqa: E402
+from docvqa.evaluation.metrics import compute_provider_metrics  # noqa: E402
+from docvqa.pipeline.schemas import ExtractionResult  # noqa: E402
+from docvqa.storage.parquet import ParquetWriter, list_parts  # noqa: E402
+
+
+def _result(index: int) -> ExtractionResult:
+    return ExtractionResult(
+        doc_id=f"doc-{index}",
+        content={
+            "summary": " ".join(["word"] * (index % 3)),
+            "fields": [{"name": "f"}] * index,
+            "answers": ["a"] * (index % 2),
+            "tables": [],
+        },
+        raw_response={"index": index},
+    )
+
+
+def test_writer_produces_row_groups_and_raw_sidecar(tmp_path):
+    writer = ParquetWriter(ParquetConfig(output_dir=tmp_path, row_group_size=4), run_id="run")
+    for index in range(10):
+        writer.write(_result(index))
+    writer.finalize()
+
+    (part,) = list_parts(writer.output_path)
+    metadata = pq.ParquetFile(part).metadata
+    assert metadata.num_rows == 10
+    assert metadata.num_row_groups == 3
+    table = pq.read_table(part)
+    assert "raw_response" not in table.column_names
+    assert json.loads(table.column("content")[3].as_py())["fields"] == [{"name": "f"}] * 3
+    raw = pq.read_table(writer.output_path / "raw" / part.name)
+    assert json.loads(raw.column("raw_response")[9].as_py()) == {"index": 9}
+
+
+def test_flush_keeps_the_part_open_and_resume_replays_its_log(tmp_path):
+    config = ParquetConfig(output_dir=tmp_path, raw_response="column")
+    writer = ParquetWriter(config, run_id="run")
+    for index in range(3):
+        writer.write(_result(index))
+        writer.flush()
+    writer.write(_result(3))
+    assert list_parts(writer.output_path) == []
+
+    resumed = ParquetWriter(config, run_id="run", resume=True)
+    resumed.write(_result(4))
+    resumed.finalize()
+
+    (part,) = list_parts(resumed.output_path)
+    assert pq.read_table(part).column("doc_id").to_pylist() == ["doc-0", "doc-1", "doc-2", "doc-4"]
+    assert sorted(path.name for path in resumed.output_path.iterdir()) == ["part-00000.parquet"]
+
+
+def test_parts_rotate_by_row_count_and_resume_continues_numbering(tmp_path):
+    config = ParquetConfig(output_dir=tmp_path, row_group_size=2, rows_per_part=5)
+    writer = ParquetWriter(config, run_id="run")
+    for index in range(7):
+        writer.write(_result(index))
+        writer.flush()
+    writer.write(_result(7))
+
+    resumed = ParquetWriter(config, run_id="run", resume=True)
+    resumed.write(_result(8))
+    resumed.finalize()
+
+    parts = list_parts(resumed.output_path)
+    assert [part.name for part in parts] == ["part-00000.parquet", "part-00001.parquet"]
+    assert [pq.ParquetFile(part).metadata.num_row_groups for part in parts] == [3, 2]
+    doc_ids = [pq.read_table(part).column("doc_id").to_pylist() for part in parts]
+    assert doc_ids == [[f"doc-{index}" for index in range(5)], ["doc-5", "doc-6", "doc-8"]]
+    raw = pq.read_table(resumed.output_path / "raw" / "part-00001.parquet")
+    assert raw.column("doc_id").to_pylist() == ["doc-5", "doc-6", "doc-8"]
+    assert not list(resumed.output_path.glob("*.partial"))
+
+
+def test_resume_drops_a_torn_log_line(tmp_path):
+    config = ParquetConfig(output_dir=tmp_path, raw_response="column")
+    writer = ParquetWriter(config, run_id="run")
+    writer.write(_result(0))
+    writer.flush()
+    log = writer.output_path / "part-00000.wal.jsonl"
+    with log.open("ab") as handle:
+        handle.write(b'{"doc_id": "doc-1", "con')
+
+    resumed = ParquetWriter(config, run_id="run", resume=True)
+    resumed.write(_result(2))
+    resumed.finalize()
+
+    (part,) = list_parts(resumed.output_path)
+    assert pq.read_table(part).column("doc_id").to_pylist() == ["doc-0", "doc-2"]
+
+
+def test_vectorized_metrics_match_row_metrics(tmp_path):
+    results = [_result(index) for index in range(25)]
+    writer = ParquetWriter(ParquetConfig(output_dir=tmp_path, row_group_size=7), run_id="run")
+    for result in results:
+        writer.write(result)
+    writer.finalize()
+
+    columnar = accumulate_results("p", writer.output_path).metrics()
+
+    assert columnar == compute_provider_metrics("p", results)
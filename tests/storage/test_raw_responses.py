@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+
+from docvqa.config.models import LocalJSONConfig, RawResponseConfig, StorageConfig
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.storage.factory import create_storage
+from docvqa.storage.raw import RawResponseStore, is_reference, load_raw_response
+
+
+def _result(doc_id: str) -> ExtractionResult:
+    raw = {"document": {"text": f"text of {doc_id} " * 50, "pages": [{"image": "A" * 2000}]}}
+    return ExtractionResult(doc_id=doc_id, content={"summary": doc_id}, raw_response=raw)
+
+
+def _config(tmp_path, **raw_response) -> StorageConfig:
+    return StorageConfig(
+        provider="local_json",
+        local_json=LocalJSONConfig(output_dir=tmp_path / "out"),
+        raw_response=RawResponseConfig(directory=tmp_path / "raw", **raw_response),
+    )
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_offload_leaves_references_that_load_back(tmp_path):
+    storage = create_storage(_config(tmp_path, policy="offload"), run_id="run")
+    for doc_id in ["a", "b"]:
+        storage.write(_result(doc_id))
+    storage.finalize()
+
+    records = _lines(tmp_path / "out" / "run.jsonl")
+    assert all(is_reference(record["raw_response"]) for record in records)
+    for record in records:
+        loaded = load_raw_response(record["raw_response"], tmp_path / "raw")
+        assert loaded == _result(record["doc_id"]).raw_response
+
+    pack = tmp_path / "raw" / "run.raw.jsonl.gz"
+    with gzip.open(pack, "rt", encoding="utf-8") as handle:
+        assert len([json.loads(line) for line in handle]) == 2
+    assert pack.stat().st_size < len(json.dumps(_result("a").raw_response))
+
+
+def test_drop_removes_raw_response(tmp_path):
+    storage = create_storage(_config(tmp_path, policy="drop"), run_id="run")
+    storage.write(_result("a"))
+    storage.finalize()
+
+    assert _lines(tmp_path / "out" / "run.jsonl")[0]["raw_response"] is None
+    assert not (tmp_path / "raw").exists()
+
+
+def test_inline_is_the_default(tmp_path):
+    storage = create_storage(_config(tmp_path), run_id="run")
+    storage.write(_result("a"))
+    storage.finalize()
+
+    assert _lines(tmp_path / "out" / "run.jsonl")[0]["raw_response"] == _result("a").raw_response
+
+
+def test_resume_appends_and_keeps_earlier_references(tmp_path):
+    first = RawResponseStore(tmp_path, "run", compression="none")
+    reference = first.put({"n": 1})
+    first.close()
+
+    second = RawResponseStore(tmp_path, "run", compression="none", resume=True)
+    later = second.put({"n": 2})
+    second.close()
+
+    assert load_raw_response(reference, tmp_path) == {"n": 1}
+    assert load_raw_response(later, tmp_path) == {"n": 2}
+    assert (tmp_path / "run.raw.jsonl").read_text(encoding="utf-8").count("\n") == 2
+
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    store = RawResponseStore(tmp_path, "run.shard-00000-of-00002", compression="zstd", level=5)
+    references = [store.put({"n": index}) for index in range(3)]
+    store.close()
+
+    assert store.path.name == "run.shard-00000-of-00002.raw.jsonl.zst"
+    assert [load_raw_response(ref, tmp_path) for ref in references] == [{"n": i} for i in range(3)]
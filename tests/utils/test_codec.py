@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from docvqa.pipeline.schemas import ExtractionResult
+from docvqa.utils import codec
+
+
+@pytest.fixture(params=sorted(codec.CODECS))
+def active_codec(request):
+    previous = codec.get_codec()
+    try:
+        selected = codec.use_codec(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    yield selected
+    codec.use_codec(previous.name)
+
+
+def _result() -> ExtractionResult:
+    return ExtractionResult(
+        doc_id="doc-1",
+        content={"summary": "Größe €", "fields": [{"name": "total", "value": 4.5}]},
+        raw_response={"choices": [{"message": {"content": "{}"}}], "usage": {"total": 7}},
+    )
+
+
+def test_codec_round_trips_compact_utf8(active_codec):
+    value = {"text": "naïve ✓", "items": [1, 2.5, None, True], "nested": {"a": "b"}}
+
+    encoded = codec.dumps(value)
+
+    assert encoded == '{"text":"naïve ✓","items":[1,2.5,null,true],"nested":{"a":"b"}}'
+    assert codec.dumpb(value) == encoded.encode("utf-8")
+    assert codec.loads(encoded) == value
+    assert codec.loads(encoded.encode("utf-8")) == value
+
+
+def test_codec_indents_on_request(active_codec):
+    assert json.loads(codec.dumps({"a": [1]}, indent=4)) == {"a": [1]}
+    assert "\n    " in codec.dumps({"a": [1]}, indent=4)
+
+
+def test_codec_rejects_malformed_json(active_codec):
+    with pytest.raises(ValueError):
+        codec.loads('{"unterminated": ')
+
+
+def test_codec_falls_back_for_values_fast_backends_reject(active_codec):
+    assert codec.loads(codec.dumps({"big": 2**70})) == {"big": 2**70}
+
+
+def test_model_helpers_match_pydantic(active_codec):
+    result = _result()
+
+    line = codec.dump_model(result)
+
+    assert json.loads(line) == json.loads(result.model_dump_json())
+    assert "\n" not in line
+    assert codec.load_model(ExtractionResult, line) == result
+    assert json.loads(codec.dump_model(result, indent=2)) == result.model_dump()
+
+
+def test_use_codec_rejects_unknown_names():
+    with pytest.raises(ValueError, match="Unknown JSON codec"):
+        codec.use_codec("yaml")
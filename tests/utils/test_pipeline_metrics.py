@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import urllib.request
+
+from docvqa.config.models import LLMConfig, LocalJSONConfig, PipelineConfig
+from docvqa.data.dataset import DocumentExample
+from docvqa.extractors.base import BaseExtractor
+from docvqa.llm.client import count_tokens
+from docvqa.pipeline.run import PipelineRunner
+from docvqa.pipeline.schemas import ExtractionRequest, ExtractionResult
+from docvqa.storage.local import LocalJSONWriter
+from docvqa.utils.metrics import MetricsExporter, MetricsRegistry, get_metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    for value in (0.002, 0.002, 0.3):
+        registry.stages.observe(value, stage="network", provider="llm")
+
+    text = registry.render()
+
+    assert "# TYPE docvqa_stage_seconds histogram" in text
+    assert 'docvqa_stage_seconds_bucket{provider="llm",stage="network",le="0.005"} 2' in text
+    assert 'docvqa_stage_seconds_bucket{provider="llm",stage="network",le="0.5"} 3' in text
+    assert 'docvqa_stage_seconds_bucket{provider="llm",stage="network",le="+Inf"} 3' in text
+    assert 'docvqa_stage_seconds_count{provider="llm",stage="network"} 3' in text
+    summary = registry.summary()["stages"]["llm.network"]
+    assert summary["count"] == 3
+    assert summary["p95_ms"] == 500.0
+
+
+def test_drained_values_merge_into_another_registry():
+    worker = MetricsRegistry()
+    worker.stages.observe(0.002, stage="parse", provider="llm")
+    worker.retries.inc(status_code=429)
+    parent = MetricsRegistry()
+    parent.stages.observe(0.3, stage="parse", provider="llm")
+
+    parent.merge(worker.drain())
+
+    assert parent.summary()["stages"]["llm.parse"]["count"] == 2
+    assert parent.retries.total() == 1
+    assert worker.summary()["stages"] == {}
+
+
+def test_counters_and_summary():
+    registry = MetricsRegistry()
+    registry.cache.inc(provider="llm", result="hit")
+    registry.cache.inc(provider="llm", result="miss")
+    registry.cache.inc(provider="llm", result="hit")
+    registry.retries.inc(status_code=429)
+
+    summary = registry.summary()
+
+    assert summary["cache"] == {"hits": 2, "misses": 1}
+    assert summary["retries"] == 1
+    assert 'docvqa_cache_lookups_total{provider="llm",result="hit"} 2' in registry.render()
+
+
+def test_llm_usage_is_counted():
+    config = LLMConfig(api_base="http://localhost", api_key="key", model="counting-model")
+    tokens = get_metrics().tokens
+    before = tokens.total(model="counting-model")
+
+    count_tokens(
+        config,
+        {
+            "usage": {
+                "prompt_tokens": 120,
+                "completion_tokens": 30,
+                "prompt_tokens_details": {"cached_tokens": 100},
+            }
+        },
+    )
+
+    assert tokens.value(provider="openai", model="counting-model", kind="prompt") == 120
+    assert tokens.value(provider="openai", model="counting-model", kind="cached_prompt") == 100
+    assert tokens.total(model="counting-model") - before == 250
+
+
+class _Extractor(BaseExtractor):
+    name = "metrics-test"
+
+    def extract(self, request: ExtractionRequest) -> ExtractionResult:
+        return ExtractionResult(doc_id=request.doc_id, content={})
+
+
+def test_runner_records_stage_latencies(tmp_path):
+    dataset = [
+        DocumentExample(doc_id=f"doc-{index}", document_path=tmp_path / "doc.txt")
+        for index in range(3)
+    ]
+    storage = LocalJSONWriter(LocalJSONConfig(output_dir=tmp_path), run_id="metrics")
+
+    PipelineRunner(dataset, _Extractor(), storage, PipelineConfig()).run()
+
+    stages = get_metrics().summary()["stages"]
+    assert stages["metrics-test.dataset_read"]["count"] == 3
+    assert stages["metrics-test.storage_write"]["count"] == 3
+    assert stages["metrics-test.storage_commit"]["count"] == 1
+    documents = get_metrics().documents
+    assert documents.value(provider="metrics-test", outcome="succeeded") == 3
+
+
+def test_exporter_serves_metrics_and_writes_textfile(tmp_path):
+    registry = MetricsRegistry()
+    registry.documents.inc(provider="llm", outcome="succeeded")
+    textfile = tmp_path / "docvqa.prom"
+    exporter = MetricsExporter(registry, port=0, textfile=textfile, interval_seconds=60)
+    exporter.start()
+    try:
+        host, port = exporter.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        exporter.stop()
+
+    expected = 'docvqa_documents_total{outcome="succeeded",provider="llm"} 1'
+    assert expected in body
+    assert expected in textfile.read_text()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+from docvqa.utils.ratelimit import RateLimiter
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_request_budget_spaces_out_requests_after_burst():
+    clock = _Clock()
+    limiter = RateLimiter(requests_per_minute=60, clock=clock)
+
+    waits = [limiter.reserve() for _ in range(12)]
+
+    assert waits[:10] == [0.0] * 10
+    assert waits[10:] == pytest.approx([1.0, 2.0])
+    clock.now = 2.4
+    assert limiter.reserve() == pytest.approx(0.6)
+
+
+def test_token_budget_is_corrected_from_reported_usage():
+    clock = _Clock()
+    limiter = RateLimiter(tokens_per_minute=600, clock=clock)
+
+    assert limiter.reserve(100) == 0.0
+    assert limiter.reserve(100) == pytest.approx(10.0)
+
+    clock.now = 10.0
+    limiter.adjust(-150)
+    assert limiter.reserve(50) == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("idle_seconds", [0.0, 3600.0])
+def test_no_minute_admits_more_than_the_budget(idle_seconds):
+    clock = _Clock()
+    limiter = RateLimiter(requests_per_minute=60, clock=clock)
+    clock.now = idle_seconds
+
+    starts = [clock.now + limiter.reserve() for _ in range(200)]
+
+    assert sum(start < idle_seconds + 60 for start in starts) <= 60
+    assert all(
+        sum(begin <= start < begin + 60 for start in starts) <= 60 for begin in starts
+    )
+
+
+def test_long_run_rate_matches_the_budget():
+    clock = _Clock()
+    limiter = RateLimiter(requests_per_minute=600, clock=clock)
+
+    starts = [limiter.reserve() for _ in range(6000)]
+
+    # Past the initial burst, requests go out at the full configured rate.
+    steady = starts[1000:]
+    assert (len(steady) - 1) / (steady[-1] - steady[0]) == pytest.approx(10.0, rel=0.001)